@@ -0,0 +1,149 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "3000"))
+CHAT_SUMMARY_TOKEN_BUDGET = int(os.getenv("CHAT_SUMMARY_TOKEN_BUDGET", "400"))
+CHAT_SUMMARY_CACHE_SIZE = int(os.getenv("CHAT_SUMMARY_CACHE_SIZE", "2048"))
+CHAT_SUMMARY_MODEL = os.getenv("CHAT_SUMMARY_MODEL", "gpt-4o-mini")
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:  # tiktoken is optional; fall back to the ~4 chars/token rule of thumb
+    _encoding = None
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return len(text) // 4 + 1
+
+
+def message_tokens(message: dict) -> int:
+    # Every chat message carries a few tokens of framing on top of its content
+    return count_tokens(message["content"]) + 4
+
+
+def prefix_hashes(messages: list) -> list:
+    """Chained hashes: hashes[i] identifies messages[:i + 1], so a longer prefix extends a shorter one."""
+    hashes = []
+    digest = ""
+    for msg in messages:
+        digest = hashlib.sha256(f"{digest}|{msg['role']}|{msg['content']}".encode("utf-8")).hexdigest()
+        hashes.append(digest)
+    return hashes
+
+
+class SummaryCache:
+    """Bounded LRU of rolling summaries keyed by the prefix hash of the turns they cover."""
+
+    def __init__(self, max_size: int = CHAT_SUMMARY_CACHE_SIZE):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            if key not in self._items:
+                return None
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key: str, summary: str):
+        with self._lock:
+            self._items[key] = summary
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def claim(self, key: str) -> bool:
+        """Mark a summary as being computed; False if it is cached or already in progress."""
+        with self._lock:
+            if key in self._items or key in self._pending:
+                return False
+            self._pending.add(key)
+            return True
+
+    def release(self, key: str):
+        with self._lock:
+            self._pending.discard(key)
+
+
+summary_cache = SummaryCache()
+
+
+def build_chat_messages(system_prompt: str, history: list, message: str,
+                        budget: int = CHAT_HISTORY_TOKEN_BUDGET, cache: SummaryCache = summary_cache):
+    """
+    Fit a conversation into `budget` history tokens.
+
+    The newest turns are kept verbatim; everything older is represented by the best cached
+    rolling summary (the longest summarised prefix). Returns the messages to send and, when
+    the folded turns aren't fully summarised yet, a job for summarize_job() to run in the
+    background so the next turn can use it.
+    """
+    recent_budget = max(budget - CHAT_SUMMARY_TOKEN_BUDGET, 0)
+
+    # Newest-first until the recent window is full
+    split = len(history)
+    used = 0
+    while split > 0:
+        cost = message_tokens(history[split - 1])
+        if used + cost > recent_budget:
+            break
+        used += cost
+        split -= 1
+
+    folded, recent = history[:split], history[split:]
+    messages = [{"role": "system", "content": system_prompt}]
+    job = None
+
+    if folded:
+        hashes = prefix_hashes(folded)
+        covered, summary = 0, None
+        for i in range(len(hashes) - 1, -1, -1):
+            summary = cache.get(hashes[i])
+            if summary is not None:
+                covered = i + 1
+                break
+
+        if summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"})
+
+        if covered < len(folded) and cache.claim(hashes[-1]):
+            job = {"key": hashes[-1], "summary": summary, "turns": folded[covered:]}
+
+    messages.extend(recent)
+    messages.append({"role": "user", "content": message})
+    return messages, job
+
+
+def summarize_job(client, job: dict, cache: SummaryCache = summary_cache):
+    """Fold new turns into the previous summary. Meant to run after the response is sent."""
+    try:
+        transcript = "\n".join(
+            f"{'Student' if m['role'] == 'user' else 'Assistant'}: {m['content']}" for m in job["turns"]
+        )
+        prompt = (
+            f"Summary so far:\n{job['summary'] or '(none)'}\n\n"
+            f"New conversation turns:\n{transcript}\n\n"
+            f"Update the summary so it captures the student's goals, background, decisions and open questions. "
+            f"Keep it under {CHAT_SUMMARY_TOKEN_BUDGET} tokens."
+        )
+        response = client.chat.completions.create(
+            model=CHAT_SUMMARY_MODEL,
+            messages=[
+                {"role": "system", "content": "You write concise running summaries of tutoring conversations."},
+                {"role": "user", "content": prompt}
+            ]
+        )
+        cache.put(job["key"], response.choices[0].message.content.strip())
+    except Exception as e:
+        print(f"Chat summary failed: {e}")
+    finally:
+        cache.release(job["key"])
@@ -0,0 +1,74 @@
+import os
+import zlib
+
+from sqlalchemy import LargeBinary, Text
+from sqlalchemy.types import TypeDecorator
+
+try:
+    import zstandard
+except ImportError:  # optional; zlib is always available
+    zstandard = None
+
+# First byte of every value written by CompressedText. Legacy rows are plain UTF-8 text and can never
+# start with these control bytes, so they keep reading back unchanged.
+MARKER_PLAIN = 0x00
+MARKER_ZLIB = 0x01
+MARKER_ZSTD = 0x02
+
+TEXT_COMPRESSION = os.getenv("TEXT_COMPRESSION", "zlib").lower()
+TEXT_COMPRESSION_MIN_BYTES = int(os.getenv("TEXT_COMPRESSION_MIN_BYTES", "256"))
+
+if TEXT_COMPRESSION == "zstd" and zstandard is None:
+    print("TEXT_COMPRESSION=zstd but zstandard is not installed; falling back to zlib")
+    TEXT_COMPRESSION = "zlib"
+
+
+def compress_text(value: str) -> bytes:
+    raw = value.encode("utf-8")
+    if len(raw) < TEXT_COMPRESSION_MIN_BYTES:
+        return bytes([MARKER_PLAIN]) + raw
+    if TEXT_COMPRESSION == "zstd":
+        packed = bytes([MARKER_ZSTD]) + zstandard.ZstdCompressor(level=6).compress(raw)
+    else:
+        packed = bytes([MARKER_ZLIB]) + zlib.compress(raw, 6)
+    # Incompressible text isn't worth the decode cost
+    return packed if len(packed) < len(raw) else bytes([MARKER_PLAIN]) + raw
+
+
+def decompress_text(value):
+    if value is None or isinstance(value, str):
+        return value  # legacy TEXT row (SQLite hands these back as str)
+    data = bytes(value)
+    if not data:
+        return ""
+    marker = data[0]
+    if marker == MARKER_PLAIN:
+        return data[1:].decode("utf-8")
+    if marker == MARKER_ZLIB:
+        return zlib.decompress(data[1:]).decode("utf-8")
+    if marker == MARKER_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Row is zstd-compressed but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(data[1:]).decode("utf-8")
+    return data.decode("utf-8")  # legacy text converted to bytes (Postgres bytea migration)
+
+
+class CompressedText(TypeDecorator):
+    """Text column stored compressed, with a marker byte so uncompressed legacy rows stay readable."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "sqlite":
+            # SQLite is dynamically typed: new BLOBs and legacy TEXT values share the existing column
+            return dialect.type_descriptor(Text())
+        return dialect.type_descriptor(LargeBinary())
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        return decompress_text(value)
@@ -0,0 +1,84 @@
+import os
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import func
+
+from .. import models
+
+CHAT_CONVERSATION_CACHE_SIZE = int(os.getenv("CHAT_CONVERSATION_CACHE_SIZE", "512"))
+
+
+class ConversationStore:
+    """
+    Persisted chat conversations with a bounded LRU of hot histories in front of the table.
+
+    A cached entry remembers the last message id it has seen; on every hit only newer rows are
+    fetched (an index range scan), so entries stay correct when another worker appended to the
+    same conversation.
+    """
+
+    def __init__(self, max_size: int = CHAT_CONVERSATION_CACHE_SIZE):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, db, user_id=None, title=None, history=None) -> models.Conversation:
+        conversation = models.Conversation(user_id=user_id, title=title)
+        db.add(conversation)
+        db.flush()
+        if history:
+            self.append(db, conversation.id, history)
+        return conversation
+
+    def history(self, db, conversation_id: int) -> list:
+        """All messages of a conversation as [{"role", "content"}], oldest first."""
+        with self._lock:
+            entry = self._items.get(conversation_id)
+            if entry is not None:
+                self._items.move_to_end(conversation_id)
+                last_id, messages = entry
+            else:
+                last_id, messages = 0, []
+
+        newer = (
+            db.query(models.ConversationMessage.id, models.ConversationMessage.role, models.ConversationMessage.content)
+            .filter(
+                models.ConversationMessage.conversation_id == conversation_id,
+                models.ConversationMessage.id > last_id
+            )
+            .order_by(models.ConversationMessage.id)
+            .all()
+        )
+        if newer:
+            messages = messages + [{"role": m.role, "content": m.content} for m in newer]
+            last_id = newer[-1].id
+
+        self._put(conversation_id, last_id, messages)
+        return messages
+
+    def append(self, db, conversation_id: int, messages: list):
+        rows = [
+            models.ConversationMessage(conversation_id=conversation_id, role=m["role"], content=m["content"])
+            for m in messages
+        ]
+        db.add_all(rows)
+        db.query(models.Conversation).filter(models.Conversation.id == conversation_id).update(
+            {"updated_at": func.now()}, synchronize_session=False
+        )
+        db.flush()
+        # The hot copy picks these rows up on its next read (id > last seen id)
+
+    def forget(self, conversation_id: int):
+        with self._lock:
+            self._items.pop(conversation_id, None)
+
+    def _put(self, conversation_id: int, last_id: int, messages: list):
+        with self._lock:
+            self._items[conversation_id] = (last_id, messages)
+            self._items.move_to_end(conversation_id)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+
+conversation_store = ConversationStore()
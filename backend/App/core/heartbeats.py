@@ -0,0 +1,141 @@
+import os
+import threading
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+
+from .. import models
+from ..database import SessionLocal
+from . import leaderboard
+
+HEARTBEAT_INTERVAL_SECONDS = float(os.getenv("HEARTBEAT_INTERVAL_SECONDS", "30"))
+HEARTBEAT_FLUSH_SIZE = int(os.getenv("HEARTBEAT_FLUSH_SIZE", "500"))
+HEARTBEAT_FLUSH_INTERVAL_SECONDS = float(os.getenv("HEARTBEAT_FLUSH_INTERVAL_SECONDS", "15"))
+
+
+class HeartbeatBuffer:
+    """
+    Write-behind buffer for time-tracking heartbeats.
+
+    Beats are summed per (user_id, lesson_id) in memory and written to learning_sessions as one
+    row per pair when the buffer holds `flush_size` beats or every `flush_interval` seconds,
+    whichever comes first, and once more on shutdown. Beats for users or lessons that don't exist
+    (any more) are dropped at flush time, and a row the database still rejects is dropped on its
+    own; a flush that fails for any other reason (database unreachable) keeps its data for the next.
+    """
+
+    def __init__(self, flush_size: int = HEARTBEAT_FLUSH_SIZE, flush_interval: float = HEARTBEAT_FLUSH_INTERVAL_SECONDS):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._beats = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def add(self, user_id: int, lesson_id: int, seconds: float):
+        with self._lock:
+            key = (user_id, lesson_id)
+            self._pending[key] = self._pending.get(key, 0.0) + seconds
+            self._beats += 1
+            full = self._beats >= self.flush_size
+
+        if full:
+            # Wake the flusher thread early; the request never pays for the write
+            self._wake.set()
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._beats = 0
+            if not pending:
+                return 0
+
+            now = datetime.utcnow()
+            rows = [
+                {
+                    "user_id": user_id,
+                    "lesson_id": lesson_id,
+                    "time_spent": seconds / 3600,  # learning_sessions stores hours
+                    "completed": False,
+                    "created_at": now
+                }
+                for (user_id, lesson_id), seconds in pending.items()
+            ]
+
+            db = SessionLocal()
+            try:
+                rows = self._known_rows(db, rows)
+                try:
+                    self._write(db, rows)
+                except (IntegrityError, DataError):
+                    # One bad row must not hold back everyone's time: write the rows one by one
+                    db.rollback()
+                    rows = [row for row in rows if self._write_one(db, row)]
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                print(f"Heartbeat flush failed, keeping {len(pending)} rows for retry: {e}")
+                with self._lock:
+                    for key, seconds in pending.items():
+                        self._pending[key] = self._pending.get(key, 0.0) + seconds
+                return 0
+            finally:
+                db.close()
+
+            return len(rows)
+
+    @staticmethod
+    def _known_rows(db, rows: list) -> list:
+        user_ids = {row["user_id"] for row in rows}
+        lesson_ids = {row["lesson_id"] for row in rows}
+        known_users = {uid for (uid,) in db.query(models.User.id).filter(models.User.id.in_(user_ids))}
+        known_lessons = {lid for (lid,) in db.query(models.Lesson.id).filter(models.Lesson.id.in_(lesson_ids))}
+        kept = [row for row in rows if row["user_id"] in known_users and row["lesson_id"] in known_lessons]
+        if len(kept) < len(rows):
+            print(f"Heartbeat flush dropped {len(rows) - len(kept)} rows for unknown users or lessons")
+        return kept
+
+    @staticmethod
+    def _write(db, rows: list):
+        if rows:
+            db.execute(insert(models.LearningSession), rows)
+            leaderboard.record_sessions(db, rows)
+
+    def _write_one(self, db, row: dict) -> bool:
+        try:
+            with db.begin_nested():
+                self._write(db, [row])
+            return True
+        except (IntegrityError, DataError) as e:
+            print(f"Heartbeat flush dropped a row for user {row['user_id']}, lesson {row['lesson_id']}: {e}")
+            return False
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="heartbeat-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval)
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if not self._stop.is_set():
+                self.flush()
+
+
+heartbeat_buffer = HeartbeatBuffer()
@@ -0,0 +1,86 @@
+import json
+
+
+class StreamingPathParser:
+    """
+    Incrementally parses a learning path JSON document as it streams in from the model.
+
+    The document is expected to look like {"title": ..., "description": ..., "modules": [{...}, ...]}.
+    feed() returns ("header", dict) as soon as the "modules" array opens (so the path row can be
+    created) and ("module", dict) for every module object once its closing brace arrives.
+    """
+
+    def __init__(self, array_key: str = "modules"):
+        self.array_key = array_key
+        self.buffer = ""
+        self._pos = 0
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._last_string = None
+        self._array_start = None
+        self._item_start = None
+        self.header_emitted = False
+
+    def feed(self, chunk: str):
+        events = []
+        self.buffer += chunk
+        buf = self.buffer
+
+        while self._pos < len(buf):
+            i = self._pos
+            ch = buf[i]
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1:
+                        self._last_string = buf[self._string_start + 1:i]
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch in "{[":
+                # "modules": [  -> the array we stream items out of
+                if ch == "[" and self._stack == ["{"] and self._last_string == self.array_key:
+                    self._array_start = i
+                    if not self.header_emitted:
+                        events.append(("header", self._parse_header()))
+                        self.header_emitted = True
+                elif ch == "{" and self._in_array():
+                    self._item_start = i
+                self._stack.append(ch)
+            elif ch in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if ch == "}" and self._in_array() and self._item_start is not None:
+                    item = json.loads(buf[self._item_start:i + 1])
+                    self._item_start = None
+                    events.append(("module", item))
+                elif ch == "]" and self._stack == ["{"]:
+                    self._array_start = None
+
+        return events
+
+    def finish(self):
+        """Parse the complete document once the stream has ended."""
+        return json.loads(self.buffer)
+
+    def _in_array(self):
+        return self._array_start is not None and len(self._stack) == 2
+
+    def _parse_header(self):
+        # Everything before the array is the header: close it off with an empty list
+        try:
+            header = json.loads(self.buffer[:self._array_start] + "[]}")
+        except json.JSONDecodeError:
+            return {}
+        header.pop(self.array_key, None)
+        return header
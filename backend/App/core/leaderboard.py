@@ -0,0 +1,187 @@
+"""
+Leaderboards over learning time, read from precomputed rollups.
+
+Every write to learning_sessions also adds its hours (and completed lesson, if any) to the user's
+leaderboard_rollups rows for the week, the month and all time, in the same transaction, so the
+rollups always equal what a (capped) scan of learning_sessions would give (`python -m App.migrations
+rebuild-leaderboards` recomputes them that way). Each row carries the user's career-goal cohort;
+top-N and "my rank" are then range reads on the (period, period_start[, cohort], hours) indexes.
+
+A user is credited at most MAX_DAILY_HOURS per day, however many sessions or heartbeats they
+send: a private "day" rollup row counts the hours claimed that day, and only the part under the
+cap is added to the boards.
+"""
+import os
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func
+
+from .. import models
+
+WINDOWS = ("week", "month", "all")
+ALL_TIME_START = date(1970, 1, 1)
+# Upper bound on the hours one learning session can claim (the progress endpoints reject more)
+MAX_SESSION_HOURS = float(os.getenv("MAX_SESSION_HOURS", "12"))
+# Upper bound on the hours one user is credited per (UTC) day, across all their sessions
+MAX_DAILY_HOURS = float(os.getenv("MAX_DAILY_HOURS", "16"))
+DAY = "day"  # rollup period holding the hours claimed per day; not a leaderboard window
+
+
+def normalize_cohort(career_goal: str) -> str:
+    return " ".join((career_goal or "").lower().split())
+
+
+def period_start(window: str, day: date) -> date:
+    if window == "week":
+        return day - timedelta(days=day.weekday())  # Monday, like the progress overview
+    if window == "month":
+        return day.replace(day=1)
+    return ALL_TIME_START
+
+
+def _daily_claims(sessions) -> dict:
+    """{(user_id, day): [hours, lessons]} for learning_sessions rows given as dicts."""
+    today = datetime.utcnow().date()
+    claims = {}
+    for s in sessions:
+        created = s.get("created_at")
+        # Rows written before the progress endpoints were bounded can't reach future periods or outweigh the cap
+        day = min(created.date(), today) if created else today
+        claim = claims.setdefault((s["user_id"], day), [0.0, 0])
+        claim[0] += min(max(s.get("time_spent") or 0.0, 0.0), MAX_SESSION_HOURS)
+        claim[1] += 1 if s.get("completed") else 0
+    return claims
+
+
+def _insert(db):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert(models.LeaderboardRollup)
+
+
+def _add_stmt(db):
+    stmt = _insert(db)
+    if stmt is None:
+        return None
+    return stmt.on_conflict_do_update(
+        index_elements=["user_id", "period", "period_start"],
+        set_={
+            "hours": models.LeaderboardRollup.hours + stmt.excluded.hours,
+            "lessons_completed": models.LeaderboardRollup.lessons_completed + stmt.excluded.lessons_completed,
+            "cohort": stmt.excluded.cohort,
+        }
+    )
+
+
+def _add(db, rows: list, returning: bool = False):
+    """Add rows' hours and lessons onto existing rollups (or create them); with `returning`, the new hours per row."""
+    stmt = _add_stmt(db)
+    if stmt is not None:
+        # One atomic read-modify-write per row: concurrent completions can't lose each other's hours
+        if not returning:
+            db.execute(stmt, rows)
+            return None
+        return [db.execute(stmt.returning(models.LeaderboardRollup.hours), row).scalar_one() for row in rows]
+    totals = []
+    for row in rows:
+        rollup = db.query(models.LeaderboardRollup).filter_by(
+            user_id=row["user_id"], period=row["period"], period_start=row["period_start"]
+        ).with_for_update().first()
+        if rollup is None:
+            rollup = models.LeaderboardRollup(**row)
+            db.add(rollup)
+        else:
+            rollup.hours += row["hours"]
+            rollup.lessons_completed += row["lessons_completed"]
+            rollup.cohort = row["cohort"]
+        db.flush()
+        totals.append(rollup.hours)
+    return totals if returning else None
+
+
+def record_sessions(db, sessions):
+    """Add learning_sessions rows (dicts with user_id, time_spent, completed, created_at) to the rollups. No commit."""
+    claims = _daily_claims(sessions)
+    if not claims:
+        return
+    user_ids = {user_id for user_id, _ in claims}
+    cohorts = {
+        uid: normalize_cohort(goal)
+        for uid, goal in db.query(models.User.id, models.User.career_goal).filter(models.User.id.in_(user_ids))
+    }
+
+    # The day row counts everything claimed; its row lock orders concurrent writers for the same user and day
+    day_rows = [
+        {"user_id": uid, "period": DAY, "period_start": day, "cohort": cohorts.get(uid, ""),
+         "hours": hours, "lessons_completed": lessons}
+        for (uid, day), (hours, lessons) in claims.items()
+    ]
+    claimed_totals = _add(db, day_rows, returning=True)
+
+    deltas = {}
+    for row, total in zip(day_rows, claimed_totals):
+        before = total - row["hours"]
+        credited = max(0.0, min(total, MAX_DAILY_HOURS) - min(before, MAX_DAILY_HOURS))
+        for window in WINDOWS:
+            delta = deltas.setdefault((row["user_id"], window, period_start(window, row["period_start"])), [0.0, 0])
+            delta[0] += credited
+            delta[1] += row["lessons_completed"]
+    _add(db, [
+        {"user_id": uid, "period": window, "period_start": start, "cohort": cohorts.get(uid, ""),
+         "hours": hours, "lessons_completed": lessons}
+        for (uid, window, start), (hours, lessons) in deltas.items()
+    ])
+
+
+def set_cohort(db, user_id: int, career_goal: str):
+    """Move the user's rollups to their new cohort (after a career goal change). No commit."""
+    db.query(models.LeaderboardRollup).filter(models.LeaderboardRollup.user_id == user_id).update(
+        {"cohort": normalize_cohort(career_goal)}, synchronize_session=False
+    )
+
+
+def _window_filter(query, window: str, start: date, cohort):
+    query = query.filter(models.LeaderboardRollup.period == window, models.LeaderboardRollup.period_start == start)
+    if cohort is not None:
+        query = query.filter(models.LeaderboardRollup.cohort == cohort)
+    return query
+
+
+def top(db, window: str, start: date, cohort: str = None, limit: int = 10) -> list:
+    """The top `limit` learners, in index order; tied hours share a rank (1, 2, 2, 4)."""
+    rows = (
+        _window_filter(
+            db.query(models.LeaderboardRollup, models.User.full_name)
+            .join(models.User, models.User.id == models.LeaderboardRollup.user_id),
+            window, start, cohort
+        )
+        .order_by(models.LeaderboardRollup.hours.desc(), models.LeaderboardRollup.user_id.desc())
+        .limit(limit)
+        .all()
+    )
+    entries = []
+    for position, (rollup, full_name) in enumerate(rows, start=1):
+        rank = entries[-1]["rank"] if entries and entries[-1]["hours"] == rollup.hours else position
+        entries.append({
+            "rank": rank, "user_id": rollup.user_id, "full_name": full_name,
+            "hours": rollup.hours, "lessons_completed": rollup.lessons_completed
+        })
+    return entries
+
+
+def rank_of(db, user_id: int, window: str, start: date, cohort: str = None):
+    """The user's entry with its rank (1 + learners with more hours), or None if they have no time in the window."""
+    rollup = db.get(models.LeaderboardRollup, (user_id, window, start))
+    if rollup is None or (cohort is not None and rollup.cohort != cohort):
+        return None
+    ahead = (
+        _window_filter(db.query(func.count()).select_from(models.LeaderboardRollup), window, start, cohort)
+        .filter(models.LeaderboardRollup.hours > rollup.hours)
+        .scalar()
+    )
+    return {"rank": ahead + 1, "user_id": user_id, "hours": rollup.hours, "lessons_completed": rollup.lessons_completed}
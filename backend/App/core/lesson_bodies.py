@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+from sqlalchemy.exc import IntegrityError
+
+BODY_FIELDS = ("content", "why_it_matters", "what_you_learn", "ai_resources")
+LESSON_BODY_CACHE_SIZE = int(os.getenv("LESSON_BODY_CACHE_SIZE", "2048"))
+
+# Immutable snapshot of a lesson_bodies row; safe to share between sessions and threads
+BodySnapshot = namedtuple("BodySnapshot", BODY_FIELDS)
+
+
+def body_hash(fields: dict) -> str:
+    payload = json.dumps([fields.get(f) for f in BODY_FIELDS], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class BodyCache:
+    """Process-wide LRU of lesson bodies by hash. Bodies never change once written, so no invalidation."""
+
+    def __init__(self, max_size: int = LESSON_BODY_CACHE_SIZE):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, loader):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+        body = loader()
+        if body is not None:
+            self.put(key, body)
+        return body
+
+    def put(self, key: str, body: BodySnapshot):
+        with self._lock:
+            self._items[key] = body
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+
+body_cache = BodyCache()
+
+
+def snapshot(row) -> BodySnapshot:
+    return BodySnapshot(*(getattr(row, f) for f in BODY_FIELDS))
+
+
+def load_body(db, key: str):
+    from ..models import LessonBody
+    row = db.get(LessonBody, key)
+    return snapshot(row) if row is not None else None
+
+
+def store_body(db, fields: dict) -> str:
+    """Get-or-create the shared body for these fields and return its hash."""
+    from ..models import LessonBody
+    key = body_hash(fields)
+    if db.get(LessonBody, key) is None:
+        try:
+            # Savepoint: another request may insert the same body concurrently
+            with db.begin_nested():
+                db.add(LessonBody(hash=key, **{f: fields.get(f) for f in BODY_FIELDS}))
+        except IntegrityError:
+            pass
+    body_cache.put(key, BodySnapshot(*(fields.get(f) for f in BODY_FIELDS)))
+    return key
+
+
+def assign_body(db, lesson, **fields):
+    """Point a lesson at the shared body holding these fields, dropping any inline copy."""
+    lesson.body_hash = store_body(db, fields)
+    for f in BODY_FIELDS:
+        setattr(lesson, "_" + f, None)
+
+
+def store_bodies(db, field_sets: list) -> list:
+    """Bulk store_body: one lookup and one batched insert for many bodies. Returns their hashes in order."""
+    from ..models import LessonBody
+    keys = [body_hash(fields) for fields in field_sets]
+    existing = {h for (h,) in db.query(LessonBody.hash).filter(LessonBody.hash.in_(set(keys)))} if keys else set()
+    new = {}
+    for key, fields in zip(keys, field_sets):
+        if key not in existing and key not in new:
+            new[key] = LessonBody(hash=key, **{f: fields.get(f) for f in BODY_FIELDS})
+    if new:
+        db.add_all(new.values())
+        db.flush()
+    for key, fields in zip(keys, field_sets):
+        body_cache.put(key, BodySnapshot(*(fields.get(f) for f in BODY_FIELDS)))
+    return keys
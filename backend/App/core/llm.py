@@ -0,0 +1,201 @@
+"""
+Resilient wrapper around the OpenAI chat completions API.
+
+LLMClient exposes the same `client.chat.completions.create(...)` call as the SDK, so call sites
+don't change, and adds per-call timeouts, retries with exponential backoff and full jitter,
+optional hedging (a second identical request once the first has been slower than a running
+latency percentile, first result wins) and model fallback once a model's retries are exhausted.
+
+    LLM_FALLBACK_MODELS='{"gpt-4o-mini": ["gpt-3.5-turbo"]}'
+"""
+import json
+import math
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import openai
+
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "0.5"))
+LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "8"))
+# Hedging doubles the cost of every slow call, so it is opt-in (globally or per call with hedge=True)
+LLM_HEDGE = os.getenv("LLM_HEDGE", "false").lower() == "true"
+# The backup request goes out once the first has run longer than this percentile of recent calls;
+# it has to sit below the slow tail, so with more than ~5% slow calls lower it
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+LLM_HEDGE_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_DELAY_SECONDS", "5"))  # until there are enough samples
+LLM_HEDGE_POOL_SIZE = int(os.getenv("LLM_HEDGE_POOL_SIZE", "16"))
+LLM_FALLBACK_MODELS = json.loads(os.getenv("LLM_FALLBACK_MODELS", "{}"))
+
+LATENCY_WINDOW = 200
+MIN_LATENCY_SAMPLES = 20
+
+RETRYABLE = (openai.APITimeoutError, openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, RETRYABLE):
+        return True
+    return isinstance(error, openai.APIStatusError) and (error.status_code == 429 or error.status_code >= 500)
+
+
+def retry_after(error: Exception):
+    """The provider's Retry-After in seconds, capped at LLM_BACKOFF_MAX_SECONDS so it can't park a worker for minutes."""
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        seconds = float(value) if value is not None else None
+    except ValueError:
+        return None
+    if seconds is None or not math.isfinite(seconds):
+        return None
+    return min(max(seconds, 0.0), LLM_BACKOFF_MAX_SECONDS)
+
+
+def upstream_status(error: Exception) -> int:
+    """HTTP status for a failed model call: 503 if the provider kept failing transiently, else 500."""
+    return 503 if is_retryable(error) else 500
+
+
+def backoff_delay(attempt: int) -> float:
+    # Full jitter: spreads retries from many callers instead of having them hit the API in lockstep
+    return random.uniform(0, min(LLM_BACKOFF_MAX_SECONDS, LLM_BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+class LatencyStats:
+    """Rolling per-model latency window and call counters; feeds the hedge delay and /ai/llm/stats."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._counters = {}
+
+    def observe(self, model: str, seconds: float):
+        with self._lock:
+            self._latencies.setdefault(model, deque(maxlen=self.window)).append(seconds)
+
+    def count(self, model: str, name: str):
+        with self._lock:
+            counters = self._counters.setdefault(model, {})
+            counters[name] = counters.get(name, 0) + 1
+
+    def percentile(self, model: str, q: float):
+        with self._lock:
+            samples = sorted(self._latencies.get(model, ()))
+        if len(samples) < MIN_LATENCY_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+    def report(self) -> dict:
+        with self._lock:
+            models = set(self._latencies) | set(self._counters)
+            counters = {m: dict(self._counters.get(m, {})) for m in models}
+        return {
+            m: {
+                **counters[m],
+                "p50_seconds": self.percentile(m, 0.5),
+                "p95_seconds": self.percentile(m, 0.95),
+            }
+            for m in models
+        }
+
+
+llm_stats = LatencyStats()
+_hedge_pool = ThreadPoolExecutor(max_workers=LLM_HEDGE_POOL_SIZE, thread_name_prefix="llm-hedge")
+
+
+class _Completions:
+    def __init__(self, client):
+        self._client = client
+
+    def create(self, *, model: str, messages: list, stream: bool = False, timeout: float = None,
+               hedge: bool = None, **kwargs):
+        return self._client.complete(model=model, messages=messages, stream=stream, timeout=timeout,
+                                     hedge=hedge, **kwargs)
+
+
+class _Chat:
+    def __init__(self, client):
+        self.completions = _Completions(client)
+
+
+class LLMClient:
+    def __init__(self, client, timeout: float = LLM_TIMEOUT_SECONDS, max_retries: int = LLM_MAX_RETRIES,
+                 hedge: bool = LLM_HEDGE, fallbacks: dict = None, stats: LatencyStats = llm_stats):
+        self._client = client
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.hedge = hedge
+        self.fallbacks = LLM_FALLBACK_MODELS if fallbacks is None else fallbacks
+        self.stats = stats
+        self.chat = _Chat(self)
+
+    def complete(self, model: str, messages: list, stream: bool = False, timeout: float = None,
+                 hedge: bool = None, **kwargs):
+        timeout = timeout or self.timeout
+        # A stream can't be raced or replayed once chunks are flowing, so streams only retry the request itself
+        hedge = (self.hedge if hedge is None else hedge) and not stream
+
+        last_error = None
+        for candidate in [model] + list(self.fallbacks.get(model, [])):
+            if candidate != model:
+                self.stats.count(model, "fallbacks")
+            try:
+                return self._with_retries(candidate, messages, stream, timeout, hedge, kwargs)
+            except Exception as e:
+                last_error = e
+                model_missing = isinstance(e, openai.NotFoundError)
+                if not (is_retryable(e) or model_missing):
+                    raise
+        raise last_error
+
+    def _with_retries(self, model, messages, stream, timeout, hedge, kwargs):
+        for attempt in range(self.max_retries + 1):
+            try:
+                if hedge:
+                    return self._hedged(model, messages, timeout, kwargs)
+                return self._call(model, messages, stream, timeout, kwargs)
+            except Exception as e:
+                if not is_retryable(e) or attempt == self.max_retries:
+                    self.stats.count(model, "failures")
+                    raise
+                self.stats.count(model, "retries")
+                time.sleep(retry_after(e) or backoff_delay(attempt))
+
+    def _call(self, model, messages, stream, timeout, kwargs):
+        self.stats.count(model, "requests")
+        start = time.perf_counter()
+        response = self._client.chat.completions.create(
+            model=model, messages=messages, stream=stream, timeout=timeout, **kwargs
+        )
+        if not stream:
+            self.stats.observe(model, time.perf_counter() - start)
+        return response
+
+    def _hedged(self, model, messages, timeout, kwargs):
+        delay = self.stats.percentile(model, LLM_HEDGE_PERCENTILE) or LLM_HEDGE_DELAY_SECONDS
+        primary = _hedge_pool.submit(self._call, model, messages, False, timeout, kwargs)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        self.stats.count(model, "hedges")
+        backup = _hedge_pool.submit(self._call, model, messages, False, timeout, kwargs)
+        pending = {primary, backup}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is backup:
+                        self.stats.count(model, "hedge_wins")
+                    # The slower request keeps running in the pool; its result is simply dropped
+                    return future.result()
+                error = future.exception()
+        raise error
@@ -0,0 +1,209 @@
+"""
+Schemas for what the model returns: generated paths, modules, lessons, lesson packages and quizzes.
+
+Validation is lenient first: "before" validators repair near-misses locally (numbers where text
+belongs, a string where a list belongs, a quiz answer given as text or a letter instead of an
+index, missing optional fields). Anything still invalid is reported per sub-tree (one module, one
+resource, one question), so callers regenerate or drop just that piece instead of the document.
+"""
+import os
+import re
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator, model_validator
+
+# Model calls spent on regenerating one invalid sub-tree before giving up on it
+LLM_REPAIR_ATTEMPTS = int(os.getenv("LLM_REPAIR_ATTEMPTS", "2"))
+DEFAULT_ESTIMATED_TIME = "1 hour"
+
+
+class InvalidModelOutput(ValueError):
+    """The model's output could not be repaired into the expected shape."""
+
+
+def _text(value):
+    if value is None:
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    if isinstance(value, list):
+        return "\n".join(str(v) for v in value)
+    return value
+
+
+class _Generated(BaseModel):
+    model_config = ConfigDict(extra="ignore", str_strip_whitespace=True)
+
+
+class GeneratedLesson(_Generated):
+    title: str = Field(min_length=1)
+    content: str = ""
+    estimated_time: str = DEFAULT_ESTIMATED_TIME
+    difficulty: Optional[str] = None
+
+    @field_validator("title", "content", "difficulty", mode="before")
+    @classmethod
+    def coerce_text(cls, v):
+        return _text(v)
+
+    @field_validator("content", mode="before")
+    @classmethod
+    def default_content(cls, v):
+        return "" if v is None else v
+
+    @field_validator("estimated_time", mode="before")
+    @classmethod
+    def coerce_time(cls, v):
+        if v is None or v == "":
+            return DEFAULT_ESTIMATED_TIME
+        if isinstance(v, (int, float)) and not isinstance(v, bool):
+            return f"{v:g} hour" if v == 1 else f"{v:g} hours"
+        return v
+
+
+class GeneratedModule(_Generated):
+    title: str = Field(min_length=1)
+    order: Optional[int] = None
+    lessons: List[GeneratedLesson] = Field(min_length=1)
+
+    @field_validator("title", mode="before")
+    @classmethod
+    def coerce_text(cls, v):
+        return _text(v)
+
+    @field_validator("order", mode="before")
+    @classmethod
+    def coerce_order(cls, v):
+        # "Week 3" -> 3; anything without a number falls back to the module's position
+        if isinstance(v, str):
+            match = re.search(r"\d+", v)
+            return int(match.group()) if match else None
+        return v if isinstance(v, int) else None
+
+
+class GeneratedPathHeader(_Generated):
+    title: str = Field(min_length=1)
+    description: str = ""
+    difficulty: Optional[str] = None
+
+    @field_validator("title", "description", "difficulty", mode="before")
+    @classmethod
+    def coerce_text(cls, v):
+        return _text(v)
+
+    @field_validator("description", mode="before")
+    @classmethod
+    def default_description(cls, v):
+        return "" if v is None else v
+
+
+class GeneratedResource(_Generated):
+    title: str = Field(min_length=1)
+    type: str = "article"
+    url: str = Field(min_length=1)
+    duration: Optional[str] = None
+
+    @field_validator("title", "type", "url", "duration", mode="before")
+    @classmethod
+    def coerce_text(cls, v):
+        return _text(v)
+
+
+class LessonPackage(_Generated):
+    content: str = Field(min_length=1)
+    why_it_matters: str = ""
+    what_you_learn: List[str] = []
+    resources: List[dict] = []
+
+    @field_validator("content", "why_it_matters", mode="before")
+    @classmethod
+    def coerce_text(cls, v):
+        v = _text(v)
+        return "" if v is None else v
+
+    @field_validator("what_you_learn", mode="before")
+    @classmethod
+    def coerce_takeaways(cls, v):
+        if v is None:
+            return []
+        if isinstance(v, str):
+            # A bulleted or numbered block instead of a list
+            v = [re.sub(r"^\s*(?:[-*•]|\d+[.)])\s*", "", line) for line in v.splitlines()]
+        return [str(item).strip() for item in v if str(item).strip()] if isinstance(v, list) else []
+
+    @field_validator("resources", mode="before")
+    @classmethod
+    def keep_valid_resources(cls, v):
+        # Resources are optional extras: drop the broken ones rather than regenerating the package
+        if not isinstance(v, list):
+            return []
+        kept = []
+        for item in v:
+            try:
+                # No null placeholders: readers fall back to their own defaults for missing keys
+                kept.append(GeneratedResource.model_validate(item).model_dump(exclude_none=True))
+            except ValidationError:
+                continue
+        return kept
+
+
+class GeneratedQuestion(_Generated):
+    question: str = Field(min_length=1)
+    options: List[str] = Field(min_length=2)
+    correct_index: int
+    explanation: Optional[str] = None
+
+    @field_validator("question", "explanation", mode="before")
+    @classmethod
+    def coerce_text(cls, v):
+        return _text(v)
+
+    @field_validator("options", mode="before")
+    @classmethod
+    def coerce_options(cls, v):
+        return [_text(o) for o in v] if isinstance(v, list) else v
+
+    @field_validator("correct_index", mode="before")
+    @classmethod
+    def coerce_index(cls, v, info):
+        options = info.data.get("options") or []
+        if isinstance(v, str):
+            s = v.strip()
+            if s.isdigit():
+                return int(s)
+            if len(s) == 1 and s.upper() in "ABCDEFGH":
+                return ord(s.upper()) - ord("A")
+            # The answer text itself
+            lowered = [str(o).strip().lower() for o in options]
+            if s.lower() in lowered:
+                return lowered.index(s.lower())
+        return v
+
+    @model_validator(mode="after")
+    def index_in_range(self):
+        if not 0 <= self.correct_index < len(self.options):
+            raise ValueError(f"correct_index {self.correct_index} out of range")
+        return self
+
+
+def parse(model, data):
+    """`model` instance, or None if `data` can't be repaired into one."""
+    try:
+        return model.model_validate(data)
+    except ValidationError:
+        return None
+
+
+def salvage_module(data) -> Optional[GeneratedModule]:
+    """The module with only its valid lessons, if it still has a title and at least one lesson."""
+    if not isinstance(data, dict) or not isinstance(data.get("lessons"), list):
+        return None
+    lessons = [l for l in (parse(GeneratedLesson, l) for l in data["lessons"]) if l is not None]
+    return parse(GeneratedModule, {**data, "lessons": [l.model_dump() for l in lessons]})
+
+
+def parse_questions(questions) -> List[GeneratedQuestion]:
+    """The valid (or repaired) questions; broken ones are dropped."""
+    if not isinstance(questions, list):
+        return []
+    return [q for q in (parse(GeneratedQuestion, q) for q in questions) if q is not None]
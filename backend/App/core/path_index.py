@@ -0,0 +1,129 @@
+import os
+import re
+import threading
+import zlib
+
+import numpy as np
+
+from .. import models
+
+PATH_REUSE_ENABLED = os.getenv("PATH_REUSE_ENABLED", "true").lower() == "true"
+PATH_REUSE_THRESHOLD = float(os.getenv("PATH_REUSE_THRESHOLD", "0.85"))
+PATH_REUSE_INDEX_SIZE = int(os.getenv("PATH_REUSE_INDEX_SIZE", "10000"))
+VECTOR_DIM = 1024
+
+# Share of the (unit-length) vector each feature gets; cosine = weighted sum of per-feature similarity
+TOPIC_WEIGHT = 0.8
+DIFFICULTY_WEIGHT = 0.1
+WEEKS_WEIGHT = 0.1
+
+
+def _bucket(token: str) -> int:
+    # crc32 rather than hash(): it has to agree across processes and restarts
+    return zlib.crc32(token.encode("utf-8")) % VECTOR_DIM
+
+
+def normalize_topic(topic: str) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", (topic or "").lower()).strip()
+
+
+def vectorize(topic: str, difficulty: str, weeks: int) -> np.ndarray:
+    """Hashed character 3-gram vector of the topic plus difficulty and length features, L2-normalised."""
+    vec = np.zeros(VECTOR_DIM, dtype=np.float32)
+
+    # "full-stack dev" and "Full Stack Developer" share most of their grams once spacing is dropped
+    text = normalize_topic(topic).replace(" ", "")
+    topic_vec = np.zeros(VECTOR_DIM, dtype=np.float32)
+    padded = f"#{text}#"
+    for i in range(len(padded) - 2):
+        topic_vec[_bucket("t:" + padded[i:i + 3])] += 1.0
+    norm = np.linalg.norm(topic_vec)
+    if norm:
+        vec += topic_vec / norm * np.sqrt(TOPIC_WEIGHT)
+
+    vec[_bucket("d:" + normalize_topic(difficulty))] += np.sqrt(DIFFICULTY_WEIGHT)
+
+    # Neighbouring lengths are partially similar
+    weeks_vec = np.zeros(VECTOR_DIM, dtype=np.float32)
+    for offset, weight in ((0, 1.0), (-1, 0.5), (1, 0.5)):
+        weeks_vec[_bucket(f"w:{int(weeks) + offset}")] += weight
+    vec += weeks_vec / np.linalg.norm(weeks_vec) * np.sqrt(WEEKS_WEIGHT)
+
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+class PathSimilarityIndex:
+    """
+    In-memory cosine index over the signatures of generated paths (path_signatures table).
+
+    Each worker loads the table lazily and then only pulls rows newer than the last id it saw,
+    keeping the newest `max_size` signatures. Lookup is one matrix-vector product.
+    """
+
+    def __init__(self, threshold: float = PATH_REUSE_THRESHOLD, max_size: int = PATH_REUSE_INDEX_SIZE):
+        self.threshold = threshold
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._matrix = np.zeros((0, VECTOR_DIM), dtype=np.float32)
+        self._path_ids = []
+        self._last_id = 0
+        self.stats = {"lookups": 0, "reused": 0, "generated": 0}
+
+    def refresh(self, db):
+        with self._refresh_lock:
+            rows = (
+                db.query(models.PathSignature)
+                .filter(models.PathSignature.id > self._last_id)
+                .order_by(models.PathSignature.id)
+                .all()
+            )
+            if not rows:
+                return
+            vectors = np.stack([vectorize(r.topic, r.difficulty, r.weeks) for r in rows])
+            with self._lock:
+                self._matrix = np.vstack([self._matrix, vectors])[-self.max_size:]
+                self._path_ids = (self._path_ids + [r.path_id for r in rows])[-self.max_size:]
+                self._last_id = rows[-1].id
+
+    def find_similar(self, db, topic: str, difficulty: str, weeks: int):
+        """Best (path_id, score) above the threshold, or None."""
+        self.refresh(db)
+        with self._lock:
+            self.stats["lookups"] += 1
+            if not self._path_ids:
+                return None
+            scores = self._matrix @ vectorize(topic, difficulty, weeks)
+            best = int(np.argmax(scores))
+            score = float(scores[best])
+            path_id = self._path_ids[best]
+        if score < self.threshold:
+            return None
+        return path_id, score
+
+    def forget(self, path_id: int):
+        with self._lock:
+            keep = [i for i, p in enumerate(self._path_ids) if p != path_id]
+            self._matrix = self._matrix[keep]
+            self._path_ids = [self._path_ids[i] for i in keep]
+
+    def record(self, outcome: str):
+        with self._lock:
+            self.stats[outcome] += 1
+
+    def report(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            indexed = len(self._path_ids)
+        decided = stats["reused"] + stats["generated"]
+        return {
+            **stats,
+            "hit_rate": round(stats["reused"] / decided, 4) if decided else 0.0,
+            "threshold": self.threshold,
+            "indexed_paths": indexed,
+            "enabled": PATH_REUSE_ENABLED
+        }
+
+
+path_index = PathSimilarityIndex()
@@ -0,0 +1,179 @@
+"""
+JSON Lines export/import of learning path trees.
+
+One record per line, parents before children:
+
+    {"type": "header", "format": "pathora-paths", "version": 1}
+    {"type": "path", "key": "p12", "title": ..., "description": ..., "difficulty": ..., "tags": ...}
+    {"type": "module", "key": "m40", "path": "p12", "title": ..., "order": 1}
+    {"type": "lesson", "module": "m40", "title": ..., "content": ..., "why_it_matters": ..., ...}
+
+Keys only link records within a file; imported rows get new ids.
+"""
+import json
+import os
+
+from sqlalchemy.orm import Load
+
+from .. import models
+from .lesson_bodies import BODY_FIELDS, store_bodies
+from .search import index_lessons
+
+EXPORT_FORMAT = "pathora-paths"
+EXPORT_VERSION = 1
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "500"))
+
+LESSON_FIELDS = ("title", "difficulty", "estimated_time") + BODY_FIELDS
+
+
+class InvalidImportLine(ValueError):
+    """A line that can't be imported; everything before its chunk is already committed."""
+
+
+def export_lines(db, user_id: int, batch_size: int = EXPORT_BATCH_SIZE):
+    """Yield the user's paths as JSONL lines, streaming rows from a server-side cursor."""
+    yield json.dumps({"type": "header", "format": EXPORT_FORMAT, "version": EXPORT_VERSION}) + "\n"
+
+    rows = (
+        db.query(models.LearningPath, models.Module, models.Lesson)
+        .outerjoin(models.Module, models.Module.learning_path_id == models.LearningPath.id)
+        .outerjoin(models.Lesson, models.Lesson.module_id == models.Module.id)
+        .options(Load(models.Lesson).undefer_group("inline_body"))
+        .filter(models.LearningPath.creator_id == user_id)
+        .order_by(models.LearningPath.id, models.Module.order, models.Module.id, models.Lesson.id)
+        .execution_options(stream_results=True)
+        .yield_per(batch_size)
+    )
+
+    path_id = module_id = None
+    for path, module, lesson in rows:
+        if path.id != path_id:
+            path_id = path.id
+            yield json.dumps({
+                "type": "path", "key": f"p{path.id}", "title": path.title,
+                "description": path.description, "difficulty": path.difficulty, "tags": path.tags
+            }, ensure_ascii=False) + "\n"
+        if module is not None and module.id != module_id:
+            module_id = module.id
+            yield json.dumps({
+                "type": "module", "key": f"m{module.id}", "path": f"p{path.id}",
+                "title": module.title, "order": module.order
+            }, ensure_ascii=False) + "\n"
+        if lesson is not None:
+            record = {"type": "lesson", "module": f"m{module.id}"}
+            record.update({f: getattr(lesson, f) for f in LESSON_FIELDS})
+            yield json.dumps(record, ensure_ascii=False) + "\n"
+
+
+class PathImporter:
+    """
+    Applies an import in chunks, one transaction each. The chunk, the job's `lines_done` and the
+    new path/module keys commit together, so a failed import is resumed by re-sending the same
+    file with the job id: lines up to `lines_done` are skipped.
+    """
+
+    def __init__(self, db, job: models.ImportJob):
+        self.db = db
+        self.job = job
+        self.keys = {k.key: k.new_id for k in job.keys}
+
+    def apply(self, chunk: list):
+        """`chunk` is a list of (line_number, raw line) pairs."""
+        try:
+            records = [(n, self._parse(n, raw)) for n, raw in chunk]
+            # Parents precede children in the file, so creating by type keeps every reference resolvable
+            self._create_paths([(n, r) for n, r in records if r["type"] == "path"])
+            self._create_modules([(n, r) for n, r in records if r["type"] == "module"])
+            self._create_lessons([(n, r) for n, r in records if r["type"] == "lesson"])
+            self.job.lines_done = chunk[-1][0]
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            self.fail(e)
+            raise
+
+    def fail(self, error: Exception):
+        if self.job.status != "failed":
+            self.job.status = "failed"
+            self.job.error = str(error)
+            self.db.commit()
+
+    def finish(self) -> models.ImportJob:
+        self.job.status = "done"
+        self.job.error = None
+        self.db.commit()
+        self.db.refresh(self.job)
+        return self.job
+
+    def state(self) -> dict:
+        return {"job_id": self.job.id, "lines_done": self.job.lines_done}
+
+    def _parse(self, line_no: int, raw: bytes) -> dict:
+        try:
+            record = json.loads(raw)
+        except ValueError as e:
+            raise InvalidImportLine(f"line {line_no}: invalid JSON ({e})")
+        if not isinstance(record, dict) or record.get("type") not in ("header", "path", "module", "lesson"):
+            raise InvalidImportLine(f"line {line_no}: expected an object with type header/path/module/lesson")
+        if record["type"] == "header" and (record.get("format") != EXPORT_FORMAT or record.get("version") != EXPORT_VERSION):
+            raise InvalidImportLine(f"line {line_no}: unsupported format {record.get('format')} v{record.get('version')}")
+        if record["type"] in ("path", "module", "lesson") and not record.get("title"):
+            raise InvalidImportLine(f"line {line_no}: {record['type']} without a title")
+        return record
+
+    def _parent(self, line_no: int, record: dict, field: str) -> int:
+        key = record.get(field)
+        if key not in self.keys:
+            raise InvalidImportLine(f"line {line_no}: unknown {field} '{key}'")
+        return self.keys[key]
+
+    def _remember(self, items: list):
+        for (line_no, record), row in items:
+            if record.get("key"):
+                self.keys[record["key"]] = row.id
+                self.db.add(models.ImportJobKey(job_id=self.job.id, key=record["key"], new_id=row.id))
+
+    def _create_paths(self, records: list):
+        if not records:
+            return
+        paths = [
+            models.LearningPath(
+                title=r["title"], description=r.get("description"), difficulty=r.get("difficulty"),
+                tags=r.get("tags"), creator_id=self.job.user_id
+            )
+            for _, r in records
+        ]
+        self.db.add_all(paths)
+        self.db.flush()
+        self._remember(list(zip(records, paths)))
+        self.job.paths += len(paths)
+
+    def _create_modules(self, records: list):
+        if not records:
+            return
+        modules = [
+            models.Module(title=r["title"], order=r.get("order"), learning_path_id=self._parent(n, r, "path"))
+            for n, r in records
+        ]
+        self.db.add_all(modules)
+        self.db.flush()
+        self._remember(list(zip(records, modules)))
+        self.job.modules += len(modules)
+
+    def _create_lessons(self, records: list):
+        if not records:
+            return
+        module_ids = [self._parent(n, r, "module") for n, r in records]
+        hashes = store_bodies(self.db, [{f: r.get(f) for f in BODY_FIELDS} for _, r in records])
+        lessons = [
+            models.Lesson(
+                title=r["title"], difficulty=r.get("difficulty"), estimated_time=r.get("estimated_time"),
+                body_hash=body_hash, module_id=module_id
+            )
+            for (_, r), module_id, body_hash in zip(records, module_ids, hashes)
+        ]
+        self.db.add_all(lessons)
+        self.db.flush()
+        index_lessons(self.db, lessons)
+        self.job.lessons += len(lessons)
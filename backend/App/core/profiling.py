@@ -0,0 +1,203 @@
+"""
+Opt-in per-request profiling.
+
+With PROFILING_ENABLED=true an admin can send `X-Profile: 1` to profile one request, and with
+PROFILE_SAMPLE_RATE > 0 that fraction of all requests is profiled. A profiled request's cProfile
+stats are written to PROFILE_DIR as <time>_<method>_<route>_<request id>.prof (open with
+`python -m pstats` or snakeviz), and the response carries the file name in X-Profile-File and
+the top functions by own time in X-Profile-Summary (omitted for streamed responses, whose
+headers go out before the work is done).
+
+Sync endpoints run in the thread pool, out of sight of a profiler on the event loop, so routers
+declare their routes with ProfiledRoute, which wraps sync endpoints to profile the worker thread
+too. When neither setting is on, nothing is wrapped and install() adds no middleware: no
+per-request cost.
+"""
+import asyncio
+import cProfile
+import contextvars
+import functools
+import io
+import os
+import pstats
+import random
+import re
+import time
+import uuid
+
+from fastapi.routing import APIRoute
+from jose import jwt, JWTError
+
+from .auth import SECRET_KEY, ALGORITHM
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "500"))
+PROFILE_SUMMARY_SIZE = int(os.getenv("PROFILE_SUMMARY_SIZE", "5"))
+
+PROFILE_HEADER = b"x-profile"
+PROFILING_ACTIVE = PROFILING_ENABLED or PROFILE_SAMPLE_RATE > 0
+IDLE_FUNCTION = re.compile(r"'(poll|select|control)' of 'select\.")
+
+_session = contextvars.ContextVar("profile_session", default=None)
+
+
+class ProfileSession:
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.profiles = []
+        self.stats = None
+
+    def run(self, function, *args, **kwargs):
+        profile = cProfile.Profile()
+        self.profiles.append(profile)
+        return profile.runcall(function, *args, **kwargs)
+
+    def finish(self) -> pstats.Stats:
+        if self.stats is None:
+            profiles = [p for p in self.profiles if p.getstats()]
+            if profiles:
+                self.stats = pstats.Stats(profiles[0], stream=io.StringIO())
+                for p in profiles[1:]:
+                    self.stats.add(p)
+        return self.stats
+
+
+def summarize(stats: pstats.Stats, top: int = PROFILE_SUMMARY_SIZE) -> str:
+    """'total=12.3ms; module.py:42(func) self=4.1ms calls=3; ...' for a response header."""
+    if stats is None:
+        return "total=0.0ms"
+    # The event loop blocking in select/epoll is idle time (waiting on the worker thread or I/O), not work
+    busy = [item for item in stats.stats.items() if not IDLE_FUNCTION.search(item[0][2])]
+    rows = sorted(busy, key=lambda item: item[1][2], reverse=True)[:top]
+    parts = [f"total={stats.total_tt * 1000:.1f}ms"]
+    for (filename, line, name), (_, calls, tottime, _, _) in rows:
+        parts.append(f"{os.path.basename(filename)}:{line}({name}) self={tottime * 1000:.1f}ms calls={calls}")
+    # Header values are latin-1; builtins look like "<built-in method ...>"
+    return "; ".join(parts).encode("latin-1", "replace").decode("latin-1")
+
+
+def _is_admin(headers: dict) -> bool:
+    auth = headers.get(b"authorization", b"").decode("latin-1")
+    if not auth.lower().startswith("bearer "):
+        return False
+    try:
+        return jwt.decode(auth[7:], SECRET_KEY, algorithms=[ALGORITHM]).get("role") == "Admin"
+    except JWTError:
+        return False
+
+
+def _wants_profile(headers: dict) -> bool:
+    if PROFILING_ENABLED and headers.get(PROFILE_HEADER) in (b"1", b"true") and _is_admin(headers):
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def _profile_path(scope: dict, request_id: str) -> str:
+    route = scope.get("route")
+    template = getattr(route, "path", None) or scope.get("path", "/")
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", template).strip("-") or "root"
+    name = f"{time.strftime('%Y%m%dT%H%M%S')}_{scope.get('method', 'GET')}_{slug}_{request_id}.prof"
+    return os.path.join(PROFILE_DIR, name)
+
+
+def _prune():
+    files = sorted(f for f in os.listdir(PROFILE_DIR) if f.endswith(".prof"))
+    for name in files[:max(0, len(files) - PROFILE_MAX_FILES)]:
+        try:
+            os.remove(os.path.join(PROFILE_DIR, name))
+        except OSError:
+            pass
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware, so streamed responses pass through untouched."""
+
+    _loop_busy = False  # one cProfile per thread: a concurrent profiled request skips the event-loop part
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = dict(scope["headers"])
+        if not _wants_profile(headers):
+            return await self.app(scope, receive, send)
+
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1")[:64] or uuid.uuid4().hex[:12]
+        request_id = re.sub(r"[^A-Za-z0-9_-]", "", request_id) or uuid.uuid4().hex[:12]
+        session = ProfileSession(request_id)
+        token = _session.set(session)
+        loop_profile = None
+        if not ProfilingMiddleware._loop_busy:
+            ProfilingMiddleware._loop_busy = True
+            loop_profile = cProfile.Profile()
+            session.profiles.append(loop_profile)
+        path = None
+        held_start = None
+
+        def stop():
+            nonlocal loop_profile
+            if loop_profile is not None:
+                loop_profile.disable()
+                ProfilingMiddleware._loop_busy = False
+                loop_profile = None
+
+        async def send_wrapper(message):
+            nonlocal held_start, path
+            if message["type"] == "http.response.start":
+                # Held until the body shows up: a one-shot body means the work is done and can be summarised
+                held_start = message
+                return
+            if message["type"] == "http.response.body" and held_start is not None:
+                start, held_start = held_start, None
+                path = _profile_path(scope, request_id)
+                extra = [(b"x-profile-file", os.path.basename(path).encode()),
+                         (b"x-request-id", request_id.encode())]
+                if not message.get("more_body", False):
+                    stop()
+                    extra.append((b"x-profile-summary", summarize(session.finish()).encode("latin-1")))
+                start = {**start, "headers": list(start.get("headers", [])) + extra}
+                await send(start)
+            await send(message)
+
+        try:
+            if loop_profile is not None:
+                loop_profile.enable()
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            stop()
+            _session.reset(token)
+            stats = session.finish()
+            if stats is not None:
+                os.makedirs(PROFILE_DIR, exist_ok=True)
+                stats.dump_stats(path or _profile_path(scope, request_id))
+                _prune()
+
+
+def _profiled(call):
+    @functools.wraps(call)
+    def wrapper(*args, **kwargs):
+        session = _session.get()
+        if session is None:
+            return call(*args, **kwargs)
+        return session.run(call, *args, **kwargs)
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """Route class for every router: profiles sync endpoints in their worker thread when profiling is on."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        # Still a plain function, so FastAPI keeps running it in the thread pool
+        if PROFILING_ACTIVE and not asyncio.iscoroutinefunction(endpoint):
+            endpoint = _profiled(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+def install(app):
+    """Add the middleware if profiling is switched on at all."""
+    if PROFILING_ACTIVE:
+        app.add_middleware(ProfilingMiddleware)
@@ -0,0 +1,97 @@
+import hashlib
+
+from sqlalchemy.orm import undefer
+
+from .. import models
+
+
+def normalize_path(path: str) -> str:
+    # Sandpack paths are absolute ("/src/App.js"); URLs may arrive without the leading slash
+    return "/" + path.strip().lstrip("/")
+
+
+def file_hash(content: str) -> str:
+    return hashlib.sha256((content or "").encode("utf-8")).hexdigest()
+
+
+def get_file(db, project_id: int, path: str, with_content: bool = False):
+    query = db.query(models.ProjectFile)
+    if with_content:
+        query = query.options(undefer(models.ProjectFile.content))
+    return (
+        query
+        .filter(models.ProjectFile.project_id == project_id, models.ProjectFile.path == normalize_path(path))
+        .first()
+    )
+
+
+def write_file(db, project_id: int, path: str, content: str, row=None):
+    """Create or update one file. Returns (row, changed); an identical hash skips the write entirely."""
+    path = normalize_path(path)
+    if row is None:
+        row = get_file(db, project_id, path)
+    digest = file_hash(content)
+    if row is not None and row.hash == digest:
+        return row, False
+    if row is None:
+        row = models.ProjectFile(project_id=project_id, path=path)
+        db.add(row)
+    row.content = content
+    row.size = len((content or "").encode("utf-8"))
+    row.hash = digest
+    return row, True
+
+
+def sync_files(db, project: models.Project, files: dict) -> dict:
+    """Make the project's files match `files` exactly, touching only rows whose hash differs."""
+    # file_rows loads path/hash only; contents stay deferred
+    existing = {f.path: f for f in project.file_rows}
+    wanted = {normalize_path(p): c for p, c in files.items()}
+    written = 0
+    for path, content in wanted.items():
+        _, changed = write_file(db, project.id, path, content, row=existing.get(path))
+        written += changed
+    removed = [row for path, row in existing.items() if path not in wanted]
+    for row in removed:
+        db.delete(row)
+    return {"written": written, "unchanged": len(wanted) - written, "deleted": len(removed)}
+
+
+def split_legacy_files(db, project_ids: list) -> int:
+    """Move any legacy `projects.files` blobs among these projects into project_files rows."""
+    if not project_ids:
+        return 0
+    projects = (
+        db.query(models.Project)
+        .options(undefer(models.Project._files))
+        .filter(models.Project.id.in_(project_ids), models.Project._files.isnot(None))
+        .all()
+    )
+    for project in projects:
+        sync_files(db, project, project._files or {})
+        project._files = None
+    if projects:
+        db.commit()
+    return len(projects)
+
+
+def file_metadata(db, project_ids: list) -> dict:
+    """{project_id: [metadata, ...]} for the given projects, without reading any file content."""
+    result = {pid: [] for pid in project_ids}
+    if not project_ids:
+        return result
+    rows = (
+        db.query(
+            models.ProjectFile.project_id,
+            models.ProjectFile.path,
+            models.ProjectFile.size,
+            models.ProjectFile.hash,
+            models.ProjectFile.updated_at
+        )
+        .filter(models.ProjectFile.project_id.in_(project_ids))
+        .order_by(models.ProjectFile.project_id, models.ProjectFile.path)
+        .all()
+    )
+    for r in rows:
+        result[r.project_id].append({"path": r.path, "size": r.size, "hash": r.hash, "updated_at": r.updated_at})
+    return result
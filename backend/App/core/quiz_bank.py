@@ -0,0 +1,182 @@
+import hashlib
+import json
+import math
+import os
+import random
+
+from sqlalchemy.exc import IntegrityError
+
+from .. import models
+from ..database import SessionLocal
+from .llm_output import parse_questions
+from .path_index import normalize_topic
+from .single_flight import single_flight
+
+# Banks smaller than QUIZ_BANK_MIN_SIZE get topped up in the background, QUIZ_BATCH_SIZE questions
+# per model call, until they reach QUIZ_BANK_TARGET_SIZE.
+QUIZ_BANK_MIN_SIZE = int(os.getenv("QUIZ_BANK_MIN_SIZE", "20"))
+QUIZ_BANK_TARGET_SIZE = int(os.getenv("QUIZ_BANK_TARGET_SIZE", "40"))
+QUIZ_BATCH_SIZE = int(os.getenv("QUIZ_BATCH_SIZE", "10"))
+# Most questions one quiz may ask for (an undersized bank is filled inline up to this)
+QUIZ_MAX_QUESTIONS = int(os.getenv("QUIZ_MAX_QUESTIONS", "20"))
+QUIZ_MODEL = os.getenv("QUIZ_MODEL", "gpt-3.5-turbo")
+
+
+def bank_key(topic: str = None, lesson_id: int = None) -> str:
+    return f"lesson:{lesson_id}" if lesson_id is not None else f"topic:{normalize_topic(topic)}"
+
+
+def normalize_difficulty(difficulty: str) -> str:
+    return (difficulty or "intermediate").strip().lower()
+
+
+def quiz_prompt(topic: str, difficulty: str, count: int) -> str:
+    return f"""
+    Create a {difficulty} level multiple-choice quiz about '{topic}' with {count} questions.
+
+    Return a VALID JSON object with this exact structure:
+    {{
+        "title": "Quiz Title",
+        "questions": [
+            {{
+                "id": 1,
+                "question": "Question text here?",
+                "options": ["Option A", "Option B", "Option C", "Option D"],
+                "correct_index": 0,  // The index (0-3) of the correct option
+                "explanation": "Brief explanation of why the answer is correct."
+            }}
+        ]
+    }}
+
+    Ensure options are plausible. Return ONLY raw JSON.
+    """
+
+
+def generate_questions(client, topic: str, difficulty: str, count: int) -> list:
+    response = client.chat.completions.create(
+        model=QUIZ_MODEL,
+        messages=[
+            {"role": "system", "content": "You are a quiz generator that outputs strictly structured JSON."},
+            {"role": "user", "content": quiz_prompt(topic, difficulty, count)}
+        ],
+        response_format={"type": "json_object"}
+    )
+    try:
+        data = json.loads(response.choices[0].message.content.strip())
+    except ValueError:
+        # A malformed batch is just an empty one; fill_bank's spare batch makes up for it
+        return []
+    # Answers given as a letter or as the option text are repaired; questions that can't be are dropped
+    return [q.model_dump() for q in parse_questions(data.get("questions") if isinstance(data, dict) else None)]
+
+
+def question_hash(question: dict) -> str:
+    return hashlib.sha256(" ".join(question["question"].lower().split()).encode("utf-8")).hexdigest()
+
+
+def get_bank(db, key: str, difficulty: str):
+    return db.get(models.QuizBank, (key, difficulty))
+
+
+def add_questions(db, key: str, difficulty: str, topic: str, lesson_id: int, questions: list) -> int:
+    """Append questions to the bank at the next free slots, skipping ones it already has. Commits."""
+    for attempt in range(2):
+        try:
+            bank = (
+                db.query(models.QuizBank)
+                .filter(models.QuizBank.key == key, models.QuizBank.difficulty == difficulty)
+                .with_for_update()
+                .first()
+            )
+            if bank is None:
+                bank = models.QuizBank(key=key, difficulty=difficulty, topic=topic, lesson_id=lesson_id, size=0)
+                db.add(bank)
+                db.flush()
+
+            hashes = {question_hash(q): q for q in questions}
+            known = {
+                h for (h,) in db.query(models.BankQuestion.question_hash).filter(
+                    models.BankQuestion.bank_key == key,
+                    models.BankQuestion.difficulty == difficulty,
+                    models.BankQuestion.question_hash.in_(list(hashes))
+                )
+            } if hashes else set()
+            added = 0
+            for h, q in hashes.items():
+                if h in known:
+                    continue
+                db.add(models.BankQuestion(
+                    bank_key=key, difficulty=difficulty, slot=bank.size + added,
+                    question=q["question"], options=q["options"], correct_index=q["correct_index"],
+                    explanation=q.get("explanation"), question_hash=h
+                ))
+                added += 1
+            bank.size += added
+            db.commit()
+            return added
+        except IntegrityError:
+            # A concurrent writer took the same slots or created the bank; redo against its state
+            db.rollback()
+            if attempt:
+                raise
+
+
+def sample_questions(db, bank: models.QuizBank, count: int) -> list:
+    """`count` distinct random questions: random slots, then one indexed IN lookup (no ORDER BY random())."""
+    slots = random.sample(range(bank.size), max(0, min(count, bank.size)))
+    rows = (
+        db.query(models.BankQuestion)
+        .filter(
+            models.BankQuestion.bank_key == bank.key,
+            models.BankQuestion.difficulty == bank.difficulty,
+            models.BankQuestion.slot.in_(slots)
+        )
+        .all()
+    )
+    random.shuffle(rows)
+    return rows
+
+
+def fill_bank(get_client, key: str, difficulty: str, topic: str, lesson_id: int = None, minimum: int = None) -> int:
+    """
+    Generate into the bank until it holds at least `minimum` (default: the target size) questions.
+    `get_client` builds the model client, only once a batch actually has to be generated.
+    Fills of the same bank are collapsed across requests and workers whatever their target, so an
+    inline top-up and a background refill never both call the model; whoever leads re-reads the
+    bank size first and only generates what is still missing. A caller that shared a smaller fill
+    gets its size back, and a bank left below QUIZ_BANK_MIN_SIZE is topped up on a later quiz.
+    """
+    if minimum is None:
+        minimum = QUIZ_BANK_TARGET_SIZE
+
+    def bank_size(db) -> int:
+        db.expire_all()
+        bank = get_bank(db, key, difficulty)
+        return bank.size if bank else 0
+
+    def fill():
+        db = SessionLocal()
+        client = None
+        try:
+            size = bank_size(db)
+            # One spare batch for duplicates; bounded so a model that repeats itself can't loop forever
+            for _ in range(math.ceil(max(0, minimum - size) / QUIZ_BATCH_SIZE) + 1):
+                if size >= minimum:
+                    break
+                client = client or get_client()
+                questions = generate_questions(client, topic, difficulty, QUIZ_BATCH_SIZE)
+                add_questions(db, key, difficulty, topic, lesson_id, questions)
+                size = bank_size(db)
+            return size
+        finally:
+            db.close()
+
+    return single_flight.do(f"quiz-bank:{key}:{difficulty}", fill)
+
+
+def replenish_bank(get_client, key: str, difficulty: str, topic: str, lesson_id: int = None):
+    """Background top-up after a quiz was served from a low bank."""
+    try:
+        fill_bank(get_client, key, difficulty, topic, lesson_id)
+    except Exception as e:
+        print(f"Quiz bank replenishment failed for {key}/{difficulty}: {e}")
@@ -0,0 +1,200 @@
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from jose import jwt, JWTError
+from sqlalchemy.exc import IntegrityError
+
+from .. import models
+from ..database import SessionLocal
+from .auth import SECRET_KEY, ALGORITHM
+
+# memory: per worker (effective limit is workers x rate). db: one bucket per key shared by all workers.
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+# A request that would get a token within this many seconds waits for it instead of getting a 429
+RATE_LIMIT_MAX_WAIT_SECONDS = float(os.getenv("RATE_LIMIT_MAX_WAIT_SECONDS", "2"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
+
+# AI requests allowed to run at once per worker. Sync endpoints share one thread pool (40 threads by
+# default), so keeping AI calls below that leaves threads free for the rest of the API.
+AI_MAX_CONCURRENT = int(os.getenv("AI_MAX_CONCURRENT", "16"))
+AI_ADMISSION_WAIT_SECONDS = float(os.getenv("AI_ADMISSION_WAIT_SECONDS", "5"))
+
+# name -> (requests per minute, burst). Override with RATE_LIMIT_<NAME>="per_minute,burst",
+# e.g. RATE_LIMIT_GENERATE_QUIZ="10,3".
+DEFAULT_LIMITS = {
+    "chat": (20, 5),
+    "generate-quiz": (6, 2),
+    "generate-path": (3, 2),
+    "lesson-content": (30, 5),
+    "lesson-content-bulk": (2, 1),
+}
+
+
+def _configured_limits() -> dict:
+    limits = {}
+    for name, default in DEFAULT_LIMITS.items():
+        raw = os.getenv("RATE_LIMIT_" + name.upper().replace("-", "_"))
+        if raw:
+            per_minute, _, burst = raw.partition(",")
+            limits[name] = (float(per_minute), float(burst or 1))
+        else:
+            limits[name] = default
+    return limits
+
+
+LIMITS = _configured_limits()
+
+
+def _take(tokens: float, updated: float, now: float, rate: float, burst: float, max_wait: float):
+    """
+    Refill and try to take one token. Returns (tokens, updated, wait, allowed).
+
+    A token due within `max_wait` is reserved (the balance goes negative) and the caller sleeps
+    `wait` seconds; otherwise nothing is taken and `wait` is the Retry-After.
+    """
+    tokens = min(burst, tokens + (now - updated) * rate)
+    if tokens >= 1:
+        return tokens - 1, now, 0.0, True
+    wait = (1 - tokens) / rate
+    if wait <= max_wait:
+        return tokens - 1, now, wait, True
+    return tokens, now, wait, False
+
+
+class MemoryBuckets:
+    """Token buckets in this process. Bounded LRU: an evicted (idle) key simply starts full again."""
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: float, max_wait: float):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens, updated, wait, allowed = _take(tokens, updated, now, rate, burst, max_wait)
+            self._buckets[key] = (tokens, updated)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait, allowed
+
+
+class DatabaseBuckets:
+    """Token buckets in the rate_limit_buckets table, shared by every worker and instance."""
+
+    def take(self, key: str, rate: float, burst: float, max_wait: float):
+        db = SessionLocal()
+        try:
+            for attempt in range(2):
+                now = time.time()
+                bucket = (
+                    db.query(models.RateLimitBucket)
+                    .filter(models.RateLimitBucket.key == key)
+                    .with_for_update()
+                    .first()
+                )
+                if bucket is None:
+                    bucket = models.RateLimitBucket(key=key, tokens=burst, updated_at=now)
+                    db.add(bucket)
+                bucket.tokens, bucket.updated_at, wait, allowed = _take(
+                    bucket.tokens, bucket.updated_at, now, rate, burst, max_wait
+                )
+                try:
+                    db.commit()
+                    return wait, allowed
+                except IntegrityError:
+                    # Another worker created the bucket first; retry against its row
+                    db.rollback()
+                    if attempt:
+                        raise
+        finally:
+            db.close()
+
+
+buckets = DatabaseBuckets() if RATE_LIMIT_BACKEND == "db" else MemoryBuckets()
+
+_admission = None
+
+
+def _admission_semaphore() -> asyncio.Semaphore:
+    # Created lazily so it belongs to the worker's own event loop
+    global _admission
+    if _admission is None:
+        _admission = asyncio.Semaphore(AI_MAX_CONCURRENT)
+    return _admission
+
+
+async def request_user_key(request: Request) -> str:
+    """Who to charge: the bearer token's user, else a user_id in the path, query or JSON body, else the client IP."""
+    auth = request.headers.get("authorization", "")
+    if auth.lower().startswith("bearer "):
+        try:
+            sub = jwt.decode(auth[7:], SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+            if sub is not None:
+                return f"user:{sub}"
+        except JWTError:
+            pass
+    user_id = request.path_params.get("user_id") or request.query_params.get("user_id")
+    if user_id is None and request.headers.get("content-type", "").startswith("application/json"):
+        try:
+            body = await request.json()  # cached on the request; FastAPI reuses it for the body model
+            user_id = body.get("user_id") if isinstance(body, dict) else None
+        except ValueError:
+            pass
+    if user_id is not None:
+        return f"user:{user_id}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def ai_rate_limit(name: str):
+    """
+    Dependency for AI endpoints: a per-user token bucket for `name` (LIMITS), then a per-worker cap
+    on concurrent AI requests. Short waits are absorbed without holding a thread; longer ones get
+    429 (rate) or 503 (capacity) with Retry-After.
+    """
+    rate_per_minute, burst = LIMITS[name]
+    rate = rate_per_minute / 60
+
+    async def dependency(request: Request):
+        if not RATE_LIMIT_ENABLED:
+            yield
+            return
+
+        key = f"{name}:{await request_user_key(request)}"
+        if isinstance(buckets, DatabaseBuckets):
+            wait, allowed = await run_in_threadpool(buckets.take, key, rate, burst, RATE_LIMIT_MAX_WAIT_SECONDS)
+        else:
+            wait, allowed = buckets.take(key, rate, burst, RATE_LIMIT_MAX_WAIT_SECONDS)
+        if not allowed:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many AI requests, please slow down",
+                headers={"Retry-After": str(math.ceil(wait))}
+            )
+        if wait:
+            await asyncio.sleep(wait)
+
+        semaphore = _admission_semaphore()
+        try:
+            await asyncio.wait_for(semaphore.acquire(), AI_ADMISSION_WAIT_SECONDS)
+        except asyncio.TimeoutError:
+            raise HTTPException(
+                status_code=503,
+                detail="AI service is busy, please retry shortly",
+                headers={"Retry-After": str(math.ceil(AI_ADMISSION_WAIT_SECONDS))}
+            )
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+    return dependency
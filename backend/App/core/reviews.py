@@ -0,0 +1,102 @@
+"""
+Spaced-repetition reviews of completed lessons (SM-2).
+
+Completing a lesson counts as its first repetition: its lesson_reviews row is first due
+REVIEW_FIRST_INTERVAL_DAYS (1) later. Each review is graded 0-5: a grade of 3 or more
+("recalled") grows the interval (6 days after the first review, then the previous interval times
+the ease factor) and nudges the ease factor by how easy it was; below 3 the lesson starts over
+(1 day, then 6 days, ...) with its ease factor kept. The due list is a range read on the
+(user_id, next_due) index.
+"""
+import os
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func
+
+from .. import models
+
+REVIEW_FIRST_INTERVAL_DAYS = int(os.getenv("REVIEW_FIRST_INTERVAL_DAYS", "1"))
+MIN_EASE_FACTOR = 1.3
+PASSING_QUALITY = 3
+MAX_QUALITY = 5
+
+
+def _insert_ignore(db):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert(models.LessonReview).on_conflict_do_nothing(index_elements=["user_id", "lesson_id"])
+
+
+def _utc(at: datetime) -> datetime:
+    # Client-reported times may carry an offset; due dates are compared against naive utcnow()
+    return at.astimezone(timezone.utc).replace(tzinfo=None) if at.tzinfo else at
+
+
+def schedule_lessons(db, user_id: int, completed_at: dict):
+    """Start the review schedule of newly completed lessons ({lesson_id: completed at}); lessons already scheduled keep theirs. No commit."""
+    if not completed_at:
+        return
+    first_interval = timedelta(days=REVIEW_FIRST_INTERVAL_DAYS)
+    rows = [
+        {"user_id": user_id, "lesson_id": lesson_id, "repetitions": 1, "interval_days": REVIEW_FIRST_INTERVAL_DAYS,
+         "ease_factor": 2.5, "next_due": _utc(at) + first_interval}
+        for lesson_id, at in completed_at.items()
+    ]
+
+    stmt = _insert_ignore(db)
+    if stmt is not None:
+        # A double-submitted completion can't trip the unique constraint
+        db.execute(stmt, rows)
+        return
+    scheduled = {
+        lesson_id for (lesson_id,) in db.query(models.LessonReview.lesson_id).filter(
+            models.LessonReview.user_id == user_id,
+            models.LessonReview.lesson_id.in_(completed_at.keys())
+        )
+    }
+    db.add_all(models.LessonReview(**row) for row in rows if row["lesson_id"] not in scheduled)
+
+
+def apply_review(review: models.LessonReview, quality: int, now: datetime = None):
+    """Update the SM-2 state of `review` for a review graded `quality` (0-5)."""
+    now = now or datetime.utcnow()
+    if quality >= PASSING_QUALITY:
+        if review.repetitions <= 1:
+            review.interval_days = 6
+        else:
+            review.interval_days = round(review.interval_days * review.ease_factor)
+        review.repetitions += 1
+        miss = MAX_QUALITY - quality
+        review.ease_factor = max(MIN_EASE_FACTOR, review.ease_factor + 0.1 - miss * (0.08 + miss * 0.02))
+    else:
+        # The failed review is the restart's first repetition: 1 day, then 6 days again
+        review.repetitions = 1
+        review.interval_days = 1
+    review.last_quality = quality
+    review.last_reviewed_at = now
+    review.next_due = now + timedelta(days=review.interval_days)
+    return review
+
+
+def due_reviews(db, user_id: int, now: datetime = None, limit: int = 20) -> list:
+    """The user's reviews due by `now`, most overdue first, with their lesson titles."""
+    return (
+        db.query(models.LessonReview, models.Lesson.title)
+        .join(models.Lesson, models.Lesson.id == models.LessonReview.lesson_id)
+        .filter(models.LessonReview.user_id == user_id, models.LessonReview.next_due <= (now or datetime.utcnow()))
+        .order_by(models.LessonReview.next_due)
+        .limit(limit)
+        .all()
+    )
+
+
+def due_count(db, user_id: int, now: datetime = None) -> int:
+    return db.query(func.count()).select_from(models.LessonReview).filter(
+        models.LessonReview.user_id == user_id,
+        models.LessonReview.next_due <= (now or datetime.utcnow())
+    ).scalar()
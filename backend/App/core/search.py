@@ -0,0 +1,204 @@
+import re
+
+from sqlalchemy import text
+
+from .. import models
+
+# SQLite: an FTS5 virtual table. Postgres: a plain table with a generated, weighted tsvector + GIN index.
+SQLITE_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+        kind UNINDEXED,
+        ref_id UNINDEXED,
+        title,
+        body,
+        tokenize = 'porter unicode61'
+    )
+    """
+]
+
+POSTGRES_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS search_index (
+        kind VARCHAR(16) NOT NULL,
+        ref_id INTEGER NOT NULL,
+        title TEXT,
+        body TEXT,
+        document tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(body, '')), 'B')
+        ) STORED,
+        PRIMARY KEY (kind, ref_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_search_index_document ON search_index USING GIN (document)"
+]
+
+# Lessons are only visible to the owner of their path; resources are global.
+# Joining ownership at query time also hides documents whose lesson has since been deleted.
+VISIBILITY_JOIN = """
+    LEFT JOIN lessons l ON {s}.kind = 'lesson' AND l.id = {s}.ref_id
+    LEFT JOIN modules m ON m.id = l.module_id
+    LEFT JOIN learning_paths p ON p.id = m.learning_path_id
+"""
+VISIBILITY_FILTER = "({s}.kind = 'resource' OR p.creator_id = :user_id) AND (CAST(:kind AS VARCHAR) IS NULL OR {s}.kind = :kind)"
+
+# FTS5 MATCH and its auxiliary functions need the real table name, not an alias
+SQLITE_SEARCH = f"""
+    SELECT search_index.kind, search_index.ref_id, search_index.title,
+           snippet(search_index, 3, '<mark>', '</mark>', '…', 16) AS snippet,
+           bm25(search_index, 0.0, 0.0, 10.0, 1.0) AS score
+    FROM search_index
+    {VISIBILITY_JOIN.format(s="search_index")}
+    WHERE search_index MATCH :query AND {VISIBILITY_FILTER.format(s="search_index")}
+    ORDER BY score
+    LIMIT :limit OFFSET :offset
+"""
+
+POSTGRES_SEARCH = f"""
+    SELECT s.kind, s.ref_id, s.title,
+           ts_headline('english', coalesce(s.body, ''), q,
+                       'StartSel=<mark>, StopSel=</mark>, MaxFragments=1, MaxWords=24, MinWords=8') AS snippet,
+           ts_rank(s.document, q) AS score
+    FROM search_index s
+    CROSS JOIN websearch_to_tsquery('english', :query) q
+    {VISIBILITY_JOIN.format(s="s")}
+    WHERE s.document @@ q AND {VISIBILITY_FILTER.format(s="s")}
+    ORDER BY score DESC
+    LIMIT :limit OFFSET :offset
+"""
+
+_available = None
+
+
+def _dialect(db_or_engine) -> str:
+    bind = db_or_engine.get_bind() if hasattr(db_or_engine, "get_bind") else db_or_engine
+    return bind.dialect.name
+
+
+def setup_search_index(engine):
+    """Create the index if needed and backfill it when it was just created. Safe to call on every startup."""
+    global _available
+    dialect = engine.dialect.name
+    if dialect not in ("sqlite", "postgresql"):
+        _available = False
+        return
+
+    try:
+        with engine.begin() as conn:
+            existed = _table_exists(conn, dialect)
+            for statement in (SQLITE_SCHEMA if dialect == "sqlite" else POSTGRES_SCHEMA):
+                conn.execute(text(statement))
+        _available = True
+    except Exception as e:
+        # e.g. an SQLite build without FTS5
+        print(f"Full-text search disabled: {e}")
+        _available = False
+        return
+
+    if not existed:
+        from ..database import SessionLocal
+        db = SessionLocal()
+        try:
+            rebuild_search_index(db)
+        finally:
+            db.close()
+
+
+def search_available() -> bool:
+    return bool(_available)
+
+
+def _table_exists(conn, dialect: str) -> bool:
+    if dialect == "sqlite":
+        row = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'search_index'")).first()
+    else:
+        row = conn.execute(text("SELECT to_regclass('search_index')")).scalar()
+    return bool(row)
+
+
+def lesson_document(lesson: models.Lesson) -> dict:
+    body = "\n\n".join(part for part in (lesson.content, lesson.why_it_matters) if part)
+    return {"kind": "lesson", "ref_id": lesson.id, "title": lesson.title, "body": body}
+
+
+def resource_document(resource: models.Resource) -> dict:
+    body = "\n\n".join(part for part in (resource.description, resource.category, resource.type) if part)
+    return {"kind": "resource", "ref_id": resource.id, "title": resource.title, "body": body}
+
+
+def index_documents(db, documents: list):
+    """Upsert documents into the index as part of the caller's transaction."""
+    if not _available or not documents:
+        return
+    if _dialect(db) == "sqlite":
+        # FTS5 has no upsert: delete and re-insert
+        db.execute(text("DELETE FROM search_index WHERE kind = :kind AND ref_id = :ref_id"), documents)
+        db.execute(text("INSERT INTO search_index (kind, ref_id, title, body) VALUES (:kind, :ref_id, :title, :body)"), documents)
+    else:
+        db.execute(text("""
+            INSERT INTO search_index (kind, ref_id, title, body) VALUES (:kind, :ref_id, :title, :body)
+            ON CONFLICT (kind, ref_id) DO UPDATE SET title = EXCLUDED.title, body = EXCLUDED.body
+        """), documents)
+
+
+def index_lessons(db, lessons: list):
+    index_documents(db, [lesson_document(l) for l in lessons])
+
+
+def remove_documents(db, kind: str, ref_ids: list):
+    if not _available or not ref_ids:
+        return
+    db.execute(
+        text("DELETE FROM search_index WHERE kind = :kind AND ref_id = :ref_id"),
+        [{"kind": kind, "ref_id": ref_id} for ref_id in ref_ids]
+    )
+
+
+def rebuild_search_index(db, batch_size: int = 500):
+    """Re-index every lesson and resource from scratch."""
+    if not _available:
+        return
+    db.execute(text("DELETE FROM search_index"))
+    for model, to_document in ((models.Lesson, lesson_document), (models.Resource, resource_document)):
+        batch = []
+        for row in db.query(model).yield_per(batch_size):
+            batch.append(to_document(row))
+            if len(batch) >= batch_size:
+                index_documents(db, batch)
+                batch = []
+        index_documents(db, batch)
+    db.commit()
+
+
+def _fts5_query(query: str) -> str:
+    # Quote every term so user input can't hit FTS5 syntax errors; the last term matches as a prefix
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        return ""
+    quoted = [f'"{t}"' for t in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def search(db, query: str, user_id: int, kind: str = None, limit: int = 20, offset: int = 0) -> list:
+    dialect = _dialect(db)
+    if dialect == "sqlite":
+        query = _fts5_query(query)
+        statement = SQLITE_SEARCH
+    else:
+        statement = POSTGRES_SEARCH
+    if not query.strip():
+        return []
+
+    rows = db.execute(text(statement), {
+        "query": query,
+        "user_id": user_id,
+        "kind": kind,
+        "limit": limit,
+        "offset": offset
+    }).all()
+    return [
+        {"kind": r.kind, "id": r.ref_id, "title": r.title, "snippet": r.snippet, "score": float(r.score)}
+        for r in rows
+    ]
@@ -0,0 +1,162 @@
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+
+from .. import models
+from ..database import SessionLocal
+
+LEASE_SECONDS = int(os.getenv("SINGLE_FLIGHT_LEASE_SECONDS", "180"))
+RESULT_TTL_SECONDS = int(os.getenv("SINGLE_FLIGHT_RESULT_TTL_SECONDS", "15"))
+POLL_INTERVAL = float(os.getenv("SINGLE_FLIGHT_POLL_INTERVAL", "0.5"))
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls for the same logical operation into one execution.
+
+    Callers in the same process wait on the leader's in-memory result. Across workers the
+    leader holds a row in `operation_leases`; other workers poll that row and share the
+    JSON result it stores. A finished result is kept for `result_ttl` seconds so a late
+    duplicate (double click) still shares it, and an expired lease (crashed worker) can be
+    taken over. Results must be JSON-serializable.
+    """
+
+    def __init__(self, lease_seconds: int = LEASE_SECONDS, result_ttl: int = RESULT_TTL_SECONDS,
+                 poll_interval: float = POLL_INTERVAL):
+        self.lease_seconds = lease_seconds
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self._owner = None
+        self._owner_pid = None
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    @property
+    def owner(self) -> str:
+        # Per process: workers forked from a preloaded master must not share the master's identity,
+        # or one worker could release or take over another's running lease
+        pid = os.getpid()
+        if self._owner_pid != pid:
+            self._owner = f"{pid}-{uuid.uuid4().hex}"
+            self._owner_pid = pid
+        return self._owner
+
+    def reset_after_fork(self):
+        """Give a forked child its own owner and drop in-flight calls copied from the parent."""
+        self._owner = self._owner_pid = None
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key: str, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._run_with_lease(key, fn)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+        return call.result
+
+    def _run_with_lease(self, key: str, fn):
+        db = SessionLocal()
+        try:
+            deadline = time.monotonic() + self.lease_seconds
+            while not self._acquire(db, key):
+                lease = self._read(db, key)
+                if lease is not None and lease.status == "done":
+                    return json.loads(lease.result)
+                if lease is not None and lease.status == "failed":
+                    error = json.loads(lease.result)
+                    raise HTTPException(status_code=error["status_code"], detail=error["detail"])
+                if time.monotonic() > deadline:
+                    raise HTTPException(status_code=409, detail="The same operation is already in progress")
+                time.sleep(self.poll_interval)
+
+            try:
+                result = fn()
+            except Exception as e:
+                status_code = e.status_code if isinstance(e, HTTPException) else 500
+                detail = e.detail if isinstance(e, HTTPException) else str(e)
+                # Let current waiters see the failure, but allow the next caller to retry right away
+                self._release(db, key, "failed", {"status_code": status_code, "detail": detail}, 0)
+                raise
+
+            self._release(db, key, "done", result, self.result_ttl)
+            return result
+        finally:
+            db.close()
+
+    def _acquire(self, db, key: str) -> bool:
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.lease_seconds)
+
+        if self._read(db, key) is None:
+            db.add(models.OperationLease(key=key, owner=self.owner, status="running", expires_at=expires_at))
+            try:
+                db.commit()
+                return True
+            except IntegrityError:
+                db.rollback()
+                return False
+
+        # Take over a stale lease; the expiry check in the WHERE makes this a compare-and-set
+        taken = db.query(models.OperationLease).filter(
+            models.OperationLease.key == key,
+            models.OperationLease.expires_at <= now
+        ).update({
+            "owner": self.owner,
+            "status": "running",
+            "result": None,
+            "expires_at": expires_at
+        }, synchronize_session=False)
+        db.commit()
+        return taken == 1
+
+    def _read(self, db, key: str):
+        db.expire_all()
+        return db.query(models.OperationLease).filter(models.OperationLease.key == key).first()
+
+    def _release(self, db, key: str, status: str, result, ttl: int):
+        db.query(models.OperationLease).filter(
+            models.OperationLease.key == key,
+            models.OperationLease.owner == self.owner
+        ).update({
+            "status": status,
+            "result": json.dumps(result, default=str),
+            "expires_at": datetime.utcnow() + timedelta(seconds=ttl)
+        }, synchronize_session=False)
+        db.commit()
+
+
+single_flight = SingleFlight()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=single_flight.reset_after_fork)
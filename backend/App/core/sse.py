@@ -0,0 +1,11 @@
+import json
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # stop nginx/cloudflare from buffering the stream
+}
+
+
+def format_sse(event: str, data) -> str:
+    """Serialize one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
@@ -0,0 +1,72 @@
+import os
+import threading
+import time
+
+from sqlalchemy import update
+
+from .. import models
+from ..database import SessionLocal
+
+CACHE_VERSION_CHECK_SECONDS = float(os.getenv("CACHE_VERSION_CHECK_SECONDS", "5"))
+
+
+def read_version(db, name: str) -> int:
+    version = db.query(models.CacheVersion.version).filter(models.CacheVersion.name == name).scalar()
+    return version or 0
+
+
+def bump_version(db, name: str) -> int:
+    """Increment the version as part of the caller's transaction and return the new value."""
+    updated = db.execute(
+        update(models.CacheVersion)
+        .where(models.CacheVersion.name == name)
+        .values(version=models.CacheVersion.version + 1)
+    ).rowcount
+    if not updated:
+        db.add(models.CacheVersion(name=name, version=1))
+        db.flush()
+    return read_version(db, name)
+
+
+class VersionedCache:
+    """
+    Read-through cache of one rarely-changing dataset, shared by every request in the process.
+
+    Writers bump the dataset's row in cache_versions in the same transaction as their change.
+    Readers compare against it at most every `check_interval` seconds (one primary-key lookup)
+    and reload through `loader(db)` only when it moved, so other workers pick up a change within
+    that interval. The loaded value must not be tied to a session (plain dicts / pydantic models).
+    """
+
+    def __init__(self, name: str, loader, check_interval: float = CACHE_VERSION_CHECK_SECONDS):
+        self.name = name
+        self.loader = loader
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._value = None
+        self._version = None
+        self._checked_at = 0.0
+
+    def get(self, db=None):
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self.check_interval:
+            return self._value
+
+        own_session = db is None
+        if own_session:
+            db = SessionLocal()
+        try:
+            with self._lock:
+                version = read_version(db, self.name)
+                if version != self._version:
+                    self._value = self.loader(db)
+                    self._version = version
+                self._checked_at = time.monotonic()
+                return self._value
+        finally:
+            if own_session:
+                db.close()
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
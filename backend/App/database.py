@@ -11,7 +11,14 @@ DB_URL = os.getenv(
 # ✅ For SQLite we need "check_same_thread"
 connect_args = {"check_same_thread": False} if DB_URL.startswith("sqlite") else {}
 
-engine = create_engine(DB_URL, connect_args=connect_args)
+# ✅ Pool size is per worker process: keep workers x (size + overflow) under the server's max_connections
+pool_args = {} if DB_URL.startswith("sqlite") else {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "5")),
+    "pool_pre_ping": True,
+}
+
+engine = create_engine(DB_URL, connect_args=connect_args, **pool_args)
 
 # ✅ Print which DB is being used (debugging)
 print("📦 Using DB file at:", os.path.abspath(DB_URL.replace("sqlite:///", "")))
@@ -1,12 +1,15 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 
-from .database import engine, Base
-from . import models
+from .database import engine
+from .core.heartbeats import heartbeat_buffer
+from .core import profiling
+from .migrations import prepare_database
 from .routers import (
     login,
     register,
@@ -18,41 +21,69 @@ from .routers import (
     project,
     resource,
     ai,
+    search,
+    quiz,
+    dashboard,
+    leaderboard,
 )
 
-# Create tables
-Base.metadata.create_all(bind=engine)
-
-app = FastAPI(title="Pathora API")
-
-# CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[
-        "http://localhost:3000",
-        "http://localhost:5173",
-        "http://localhost:5174",
-        "http://localhost:3001",
-        "http://127.0.0.1:5173",
-        "http://127.0.0.1:5174",
-    ],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    heartbeat_buffer.start()
+    yield
+    # Write out whatever time-tracking is still buffered
+    heartbeat_buffer.stop()
+
+def create_app() -> FastAPI:
+    """
+    Build the app. Under gunicorn with preload_app this runs once in the master before forking,
+    so schema setup isn't repeated per worker (and is lock-protected when it is, e.g. without preload).
+    """
+    prepare_database(engine)
+    # Connections opened for setup must not be shared across fork(); each worker opens its own
+    engine.dispose()
+
+    app = FastAPI(title="Pathora API", lifespan=lifespan)
+
+    # CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=[
+            "http://localhost:3000",
+            "http://localhost:5173",
+            "http://localhost:5174",
+            "http://localhost:3001",
+            "http://127.0.0.1:5173",
+            "http://127.0.0.1:5174",
+        ],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Routers
+    app.include_router(login.router)
+    app.include_router(register.router)
+    app.include_router(profile.router)
+    app.include_router(learning_path.router)
+    app.include_router(progress.router)
+    app.include_router(module.router)
+    app.include_router(lesson.router)
+    app.include_router(project.router)
+    app.include_router(resource.router)
+    app.include_router(ai.router)
+    app.include_router(search.router)
+    app.include_router(quiz.router)
+    app.include_router(dashboard.router)
+    app.include_router(leaderboard.router)
+
+    @app.get("/")
+    def root():
+        return {"message": "Pathora Backend Running"}
+
+    # No-op unless PROFILING_ENABLED / PROFILE_SAMPLE_RATE is set
+    profiling.install(app)
+
+    return app
 
-# Routers
-app.include_router(login.router)
-app.include_router(register.router)
-app.include_router(profile.router)
-app.include_router(learning_path.router)
-app.include_router(progress.router)
-app.include_router(module.router)
-app.include_router(lesson.router)
-app.include_router(project.router)
-app.include_router(resource.router)
-app.include_router(ai.router)
-
-@app.get("/")
-def root():
-    return {"message": "Pathora Backend Running"}
+app = create_app()
@@ -0,0 +1,281 @@
+"""
+Small idempotent schema patches and data backfills.
+
+create_all() only creates missing tables, so columns added to existing tables are patched in by
+run_migrations() at startup. prepare_database() runs both (plus the search index) under a
+cross-process lock, so several workers or instances starting together don't race on DDL.
+Data backfills are run by hand:
+
+    python -m App.migrations dedupe-lesson-bodies
+    python -m App.migrations compress-lesson-text
+    python -m App.migrations split-project-files
+    python -m App.migrations rebuild-leaderboards
+    python -m App.migrations schedule-reviews
+"""
+import os
+import sys
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+from sqlalchemy import String, func, inspect, text, update
+from sqlalchemy.orm import undefer_group
+
+from .database import engine, SessionLocal
+from . import models
+from .core.compression import compress_text, MARKER_PLAIN, MARKER_ZLIB, MARKER_ZSTD
+from .core.search import setup_search_index
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process dev server only
+    fcntl = None
+
+# Arbitrary constant shared by every process running schema setup against the same Postgres database
+SCHEMA_LOCK_KEY = 0x5041544852
+
+# (table, column, DDL type) added after the table first shipped
+ADDED_COLUMNS = [
+    ("lessons", "body_hash", "VARCHAR(64)"),
+]
+
+ADDED_INDEXES = [
+    ("ix_lessons_body_hash", "lessons", "body_hash"),
+]
+
+# CompressedText columns as (table, primary key, column). On Postgres they must be BYTEA;
+# SQLite keeps the declared TEXT type and simply stores BLOBs in it.
+COMPRESSED_COLUMNS = [
+    ("lessons", "id", "content"),
+    ("lessons", "id", "what_you_learn"),
+    ("lessons", "id", "ai_resources"),
+    ("lesson_bodies", "hash", "content"),
+    ("lesson_bodies", "hash", "what_you_learn"),
+    ("lesson_bodies", "hash", "ai_resources"),
+]
+
+
+@contextmanager
+def _postgres_lock(bind):
+    with bind.connect() as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SCHEMA_LOCK_KEY})
+            conn.commit()
+
+
+@contextmanager
+def _file_lock(path):
+    with open(path, "a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def schema_lock(bind):
+    if bind.dialect.name == "postgresql":
+        return _postgres_lock(bind)
+    database = bind.url.database
+    if bind.dialect.name == "sqlite" and fcntl is not None and database and database != ":memory:":
+        return _file_lock(os.path.abspath(database) + ".lock")
+    return nullcontext()
+
+
+def prepare_database(bind=engine):
+    """Create tables, apply schema patches and set up search. Idempotent and safe to run concurrently."""
+    with schema_lock(bind):
+        models.Base.metadata.create_all(bind=bind)
+        run_migrations(bind)
+        setup_search_index(bind)
+
+
+def run_migrations(bind=engine):
+    inspector = inspect(bind)
+    tables = set(inspector.get_table_names())
+    with bind.begin() as conn:
+        for table, column, ddl in ADDED_COLUMNS:
+            if table not in tables:
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table)}
+            if column not in existing:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+        for name, table, column in ADDED_INDEXES:
+            if table in tables:
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({column})"))
+        if bind.dialect.name == "postgresql":
+            for table, _, column in COMPRESSED_COLUMNS:
+                if table not in tables:
+                    continue
+                types = {c["name"]: c["type"] for c in inspector.get_columns(table)}
+                if isinstance(types.get(column), String):
+                    # Existing text becomes unmarked UTF-8 bytes, which CompressedText reads as legacy rows
+                    conn.execute(text(
+                        f"ALTER TABLE {table} ALTER COLUMN {column} TYPE BYTEA USING convert_to({column}, 'UTF8')"
+                    ))
+
+
+def dedupe_lesson_bodies(db, batch_size: int = 500):
+    """Move inline lesson bodies into the shared lesson_bodies table, one row per distinct body."""
+    from .core.lesson_bodies import BODY_FIELDS, assign_body
+
+    migrated = 0
+    inline_bytes = 0
+    while True:
+        lessons = (
+            db.query(models.Lesson)
+            .options(undefer_group("inline_body"))
+            .filter(
+                models.Lesson.body_hash.is_(None),
+                models.Lesson._content.isnot(None) | models.Lesson._why_it_matters.isnot(None)
+            )
+            .order_by(models.Lesson.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not lessons:
+            break
+        for lesson in lessons:
+            fields = {f: getattr(lesson, "_" + f) for f in BODY_FIELDS}
+            inline_bytes += sum(len(v.encode("utf-8")) for v in fields.values() if v)
+            assign_body(db, lesson, **fields)
+        db.commit()
+        migrated += len(lessons)
+
+    body_rows = db.query(models.LessonBody).count()
+    shared_bytes = db.query(
+        func.coalesce(func.sum(
+            func.length(func.coalesce(models.LessonBody.content, "")) +
+            func.length(func.coalesce(models.LessonBody.why_it_matters, "")) +
+            func.length(func.coalesce(models.LessonBody.what_you_learn, "")) +
+            func.length(func.coalesce(models.LessonBody.ai_resources, ""))
+        ), 0)
+    ).scalar()
+    return {"lessons_migrated": migrated, "inline_bytes_moved": inline_bytes, "distinct_bodies": body_rows, "shared_body_size": int(shared_bytes)}
+
+
+def compress_lesson_text(db, batch_size: int = 500):
+    """Rewrite legacy uncompressed values of the CompressedText columns. Safe to re-run."""
+    markers = (MARKER_PLAIN, MARKER_ZLIB, MARKER_ZSTD)
+    report = {}
+    for table_name, pk, column in COMPRESSED_COLUMNS:
+        table = models.Base.metadata.tables[table_name]
+        rewritten = before = after = 0
+        last = None
+        while True:
+            # Raw SQL so values come back exactly as stored, without CompressedText decoding them
+            rows = db.execute(text(
+                f"SELECT {pk}, {column} FROM {table_name} "
+                f"WHERE {column} IS NOT NULL {'AND ' + pk + ' > :last ' if last is not None else ''}"
+                f"ORDER BY {pk} LIMIT :limit"
+            ), {"last": last, "limit": batch_size}).all()
+            if not rows:
+                break
+            for key, raw in rows:
+                if isinstance(raw, str):
+                    value = raw
+                else:
+                    raw = bytes(raw)
+                    if raw and raw[0] in markers:
+                        continue
+                    value = raw.decode("utf-8")
+                before += len(value.encode("utf-8"))
+                after += len(compress_text(value))
+                db.execute(update(table).where(table.c[pk] == key).values({column: value}))
+                rewritten += 1
+            db.commit()
+            last = rows[-1][0]
+        report[f"{table_name}.{column}"] = {"rows": rewritten, "bytes_before": before, "bytes_after": after}
+    return report
+
+
+def split_project_files(db, batch_size: int = 200):
+    """Move every legacy projects.files blob into project_files rows (otherwise done on first access)."""
+    from .core.project_files import split_legacy_files
+
+    migrated = 0
+    while True:
+        ids = [
+            pid for (pid,) in db.query(models.Project.id)
+            .filter(models.Project._files.isnot(None))
+            .order_by(models.Project.id)
+            .limit(batch_size)
+        ]
+        if not ids:
+            break
+        migrated += split_legacy_files(db, ids)
+    return {"projects_migrated": migrated, "files": db.query(models.ProjectFile).count()}
+
+
+def rebuild_leaderboards(db, batch_size: int = 5000):
+    """Recompute leaderboard_rollups from learning_sessions (backfills sessions logged before the rollups existed)."""
+    from .core.leaderboard import record_sessions
+
+    db.query(models.LeaderboardRollup).delete(synchronize_session=False)
+    sessions = 0
+    batch = []
+    query = db.query(
+        models.LearningSession.user_id, models.LearningSession.time_spent,
+        models.LearningSession.completed, models.LearningSession.created_at
+    ).filter(models.LearningSession.user_id.isnot(None)).yield_per(batch_size)
+    for row in query:
+        batch.append(row._asdict())
+        if len(batch) >= batch_size:
+            record_sessions(db, batch)
+            sessions += len(batch)
+            batch = []
+    record_sessions(db, batch)
+    sessions += len(batch)
+    # One transaction, so the boards never show a half-rebuilt state
+    db.commit()
+    return {"sessions": sessions, "rollups": db.query(models.LeaderboardRollup).count()}
+
+
+def schedule_reviews(db, batch_size: int = 1000):
+    """Give lessons completed before spaced repetition existed a review schedule, as if completed now."""
+    from .core.reviews import schedule_lessons
+
+    now = datetime.utcnow()
+    scheduled = 0
+    last_id = 0
+    while True:
+        rows = (
+            db.query(models.Progress.id, models.Progress.user_id, models.Progress.lesson_id)
+            .filter(models.Progress.completed == True, models.Progress.id > last_id)
+            .order_by(models.Progress.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        by_user = {}
+        for row in rows:
+            by_user.setdefault(row.user_id, {})[row.lesson_id] = now
+        for user_id, completed_at in by_user.items():
+            schedule_lessons(db, user_id, completed_at)
+        db.commit()
+        last_id = rows[-1].id
+        scheduled += len(rows)
+    return {"completed_lessons": scheduled, "reviews": db.query(models.LessonReview).count()}
+
+
+COMMANDS = {
+    "dedupe-lesson-bodies": dedupe_lesson_bodies,
+    "compress-lesson-text": compress_lesson_text,
+    "split-project-files": split_project_files,
+    "rebuild-leaderboards": rebuild_leaderboards,
+    "schedule-reviews": schedule_reviews,
+}
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2 or sys.argv[1] not in COMMANDS:
+        print(f"usage: python -m App.migrations [{'|'.join(COMMANDS)}]")
+        sys.exit(1)
+    prepare_database()
+    session = SessionLocal()
+    try:
+        print(COMMANDS[sys.argv[1]](session))
+    finally:
+        session.close()
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, func, Boolean, Float, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Date, DateTime, func, Boolean, Float, JSON, Index, UniqueConstraint
+from sqlalchemy.orm import relationship, object_session, deferred
 from .database import Base
+from .core.compression import CompressedText
 
 class User(Base):
     __tablename__ = "users"
@@ -23,6 +24,12 @@ class User(Base):
     learning_paths = relationship("LearningPath", back_populates="creator", cascade="all, delete-orphan")
     progress = relationship("Progress", back_populates="user", cascade="all, delete-orphan")
     projects = relationship("Project", back_populates="user", cascade="all, delete-orphan")
+    conversations = relationship("Conversation", cascade="all, delete-orphan")
+    progress_events = relationship("ProgressEvent", cascade="all, delete-orphan")
+    import_jobs = relationship("ImportJob", cascade="all, delete-orphan")
+    quiz_attempts = relationship("QuizAttempt", cascade="all, delete-orphan")
+    leaderboard_rollups = relationship("LeaderboardRollup", cascade="all, delete-orphan")
+    lesson_reviews = relationship("LessonReview", cascade="all, delete-orphan")
 
 class LearningPath(Base):
     __tablename__ = "learning_paths"
@@ -35,6 +42,19 @@ class LearningPath(Base):
     creator_id = Column(Integer, ForeignKey("users.id"))
     creator = relationship("User", back_populates="learning_paths")
     modules = relationship("Module", back_populates="learning_path", cascade="all, delete-orphan")
+    signatures = relationship("PathSignature", cascade="all, delete-orphan")
+
+class PathSignature(Base):
+    __tablename__ = "path_signatures"
+
+    # The request a generated path was built from; feeds the near-duplicate reuse index
+    id = Column(Integer, primary_key=True)
+    path_id = Column(Integer, ForeignKey("learning_paths.id"), index=True, nullable=False)
+    topic = Column(String, nullable=False)
+    difficulty = Column(String)
+    weeks = Column(Integer)
+    hours_per_week = Column(Integer)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 class Module(Base):
     __tablename__ = "modules"
@@ -51,17 +71,69 @@ class Lesson(Base):
 
     id = Column(Integer, primary_key=True)
     title = Column(String, nullable=False)
-    content = Column(Text)
     difficulty = Column(String)
     estimated_time = Column(String)
-    why_it_matters = Column(Text)
-    what_you_learn = Column(Text)  # Stored as JSON string
-    ai_resources = Column(Text)    # Stored as JSON string
+    # Inline body columns; rows moved to a shared LessonBody (body_hash set) keep them NULL
+    # The large ones are compressed and only loaded (one query for the group) when a legacy row needs them
+    _content = deferred(Column("content", CompressedText), group="inline_body")
+    _why_it_matters = Column("why_it_matters", Text)
+    _what_you_learn = deferred(Column("what_you_learn", CompressedText), group="inline_body")  # Stored as JSON string
+    _ai_resources = deferred(Column("ai_resources", CompressedText), group="inline_body")    # Stored as JSON string
+    body_hash = Column(String(64), ForeignKey("lesson_bodies.hash"), index=True)
     module_id = Column(Integer, ForeignKey("modules.id"))
     module = relationship("Module", back_populates="lessons")
     progress = relationship("Progress", back_populates="lesson", cascade="all, delete-orphan")
+    reviews = relationship("LessonReview", back_populates="lesson", cascade="all, delete-orphan")
     prerequisites = relationship("LessonPrerequisite", foreign_keys="LessonPrerequisite.lesson_id", cascade="all, delete-orphan")
 
+    @property
+    def shared_body(self):
+        if not self.body_hash:
+            return None
+        from .core.lesson_bodies import body_cache
+        return body_cache.get(self.body_hash, self._load_shared_body)
+
+    def _load_shared_body(self):
+        from .core.lesson_bodies import load_body
+        db = object_session(self)
+        if db is not None:
+            return load_body(db, self.body_hash)
+        from .database import SessionLocal
+        db = SessionLocal()
+        try:
+            return load_body(db, self.body_hash)
+        finally:
+            db.close()
+
+    def _body_field(self, field):
+        body = self.shared_body
+        return getattr(body, field) if body is not None else getattr(self, "_" + field)
+
+    def _set_body_field(self, field, value):
+        # Writing one field detaches the lesson from its shared body: copy the rest inline first
+        body = self.shared_body
+        if body is not None:
+            for f in body._fields:
+                setattr(self, "_" + f, getattr(body, f))
+            self.body_hash = None
+        setattr(self, "_" + field, value)
+
+    content = property(lambda self: self._body_field("content"), lambda self, v: self._set_body_field("content", v))
+    why_it_matters = property(lambda self: self._body_field("why_it_matters"), lambda self, v: self._set_body_field("why_it_matters", v))
+    what_you_learn = property(lambda self: self._body_field("what_you_learn"), lambda self, v: self._set_body_field("what_you_learn", v))
+    ai_resources = property(lambda self: self._body_field("ai_resources"), lambda self, v: self._set_body_field("ai_resources", v))
+
+class LessonBody(Base):
+    __tablename__ = "lesson_bodies"
+
+    # Content-addressed: sha256 over the body fields, shared by every lesson with identical text
+    hash = Column(String(64), primary_key=True)
+    content = Column(CompressedText)
+    why_it_matters = Column(Text)
+    what_you_learn = Column(CompressedText)
+    ai_resources = Column(CompressedText)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
 class Progress(Base):
     __tablename__ = "progress"
 
@@ -72,6 +144,37 @@ class Progress(Base):
     user = relationship("User", back_populates="progress")
     lesson = relationship("Lesson", back_populates="progress")
 
+class ProgressEvent(Base):
+    __tablename__ = "progress_events"
+    __table_args__ = (UniqueConstraint("user_id", "idempotency_key", name="uq_progress_events_user_key"),)
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    idempotency_key = Column(String, nullable=False)
+    type = Column(String, nullable=False)
+    lesson_id = Column(Integer, ForeignKey("lessons.id"))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class LessonReview(Base):
+    __tablename__ = "lesson_reviews"
+    # "What's due" is a range scan on (user_id, next_due), never a pass over the user's history
+    __table_args__ = (
+        UniqueConstraint("user_id", "lesson_id", name="uq_lesson_reviews_user_lesson"),
+        Index("ix_lesson_reviews_user_due", "user_id", "next_due"),
+    )
+
+    # SM-2 state per completed lesson, see core/reviews.py
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    lesson_id = Column(Integer, ForeignKey("lessons.id"), nullable=False)
+    repetitions = Column(Integer, nullable=False, default=0)
+    interval_days = Column(Integer, nullable=False, default=0)
+    ease_factor = Column(Float, nullable=False, default=2.5)
+    next_due = Column(DateTime(timezone=True), nullable=False)
+    last_quality = Column(Integer)
+    last_reviewed_at = Column(DateTime(timezone=True))
+    lesson = relationship("Lesson", back_populates="reviews")
+
 class LessonPrerequisite(Base):
     __tablename__ = "lesson_prerequisites"
 
@@ -91,6 +194,23 @@ class LearningSession(Base):
     completed = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+class LeaderboardRollup(Base):
+    __tablename__ = "leaderboard_rollups"
+    # Ranks are read straight off these: top-N is a backwards range scan, "my rank" a range count
+    __table_args__ = (
+        Index("ix_leaderboard_rollups_rank", "period", "period_start", "hours", "user_id"),
+        Index("ix_leaderboard_rollups_cohort_rank", "period", "period_start", "cohort", "hours", "user_id"),
+    )
+
+    # Sum of learning_sessions per user and window (week / month / all; "day" rows hold the uncapped
+    # hours claimed per day), see core/leaderboard.py
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    period = Column(String(8), primary_key=True)
+    period_start = Column(Date, primary_key=True)
+    cohort = Column(String, nullable=False, default="")  # normalized career_goal
+    hours = Column(Float, nullable=False, default=0.0)
+    lessons_completed = Column(Integer, nullable=False, default=0)
+
 class Project(Base):
     __tablename__ = "projects"
 
@@ -102,9 +222,33 @@ class Project(Base):
     start_date = Column(DateTime(timezone=True), server_default=func.now())
     estimated_hours = Column(String)
     technologies = Column(String) 
-    files = Column(JSON, nullable=True, default={})
+    # Legacy whole-project JSON blob; split into project_files on first access and then left NULL
+    _files = deferred(Column("files", JSON(none_as_null=True), nullable=True))
     user_id = Column(Integer, ForeignKey("users.id"))
     user = relationship("User", back_populates="projects")
+    file_rows = relationship("ProjectFile", cascade="all, delete-orphan", order_by="ProjectFile.path")
+
+    @property
+    def files(self):
+        # One query for path -> content; file_rows itself never loads contents
+        rows = (
+            object_session(self).query(ProjectFile.path, ProjectFile.content)
+            .filter(ProjectFile.project_id == self.id)
+            .order_by(ProjectFile.path)
+        )
+        return dict(rows.all())
+
+class ProjectFile(Base):
+    __tablename__ = "project_files"
+    __table_args__ = (UniqueConstraint("project_id", "path", name="uq_project_files_project_path"),)
+
+    id = Column(Integer, primary_key=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), index=True, nullable=False)
+    path = Column(String, nullable=False)
+    content = deferred(Column(CompressedText))
+    size = Column(Integer, nullable=False, default=0)  # bytes of UTF-8 content, before compression
+    hash = Column(String(64), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 class Resource(Base):
     __tablename__ = "resources"
@@ -116,3 +260,116 @@ class Resource(Base):
     category = Column(String)
     url = Column(String)
     icon_name = Column(String)
+
+class OperationLease(Base):
+    __tablename__ = "operation_leases"
+
+    key = Column(String, primary_key=True)
+    owner = Column(String, nullable=False)
+    status = Column(String, default="running")  # running / done / failed
+    result = Column(Text)  # JSON payload shared with duplicate callers
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+class QuizBank(Base):
+    __tablename__ = "quiz_banks"
+
+    # One pool of questions per (lesson or topic, difficulty); size doubles as the next free slot
+    key = Column(String, primary_key=True)  # "lesson:<id>" or "topic:<normalized topic>"
+    difficulty = Column(String, primary_key=True)
+    topic = Column(String, nullable=False)
+    lesson_id = Column(Integer, index=True, nullable=True)  # no FK: banks and attempts outlive a deleted lesson
+    size = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class BankQuestion(Base):
+    __tablename__ = "bank_questions"
+    __table_args__ = (
+        # slot is dense per bank (0..size-1), so sampling is k primary-index lookups
+        UniqueConstraint("bank_key", "difficulty", "slot", name="uq_bank_questions_slot"),
+        UniqueConstraint("bank_key", "difficulty", "question_hash", name="uq_bank_questions_hash"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    bank_key = Column(String, nullable=False)
+    difficulty = Column(String, nullable=False)
+    slot = Column(Integer, nullable=False)
+    question = Column(Text, nullable=False)
+    options = Column(JSON, nullable=False)
+    correct_index = Column(Integer, nullable=False)
+    explanation = Column(Text)
+    question_hash = Column(String(64), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class QuizAttempt(Base):
+    __tablename__ = "quiz_attempts"
+    __table_args__ = (Index("ix_quiz_attempts_user_created", "user_id", "created_at"),)
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    lesson_id = Column(Integer, nullable=True)
+    bank_key = Column(String)
+    difficulty = Column(String)
+    score = Column(Integer, nullable=False)
+    total = Column(Integer, nullable=False)
+    answers = Column(JSON)  # [{question_id, selected_index, correct}]
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+
+    # A JSONL path import; lines_done only advances with a committed chunk, so a failed import resumes there
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    status = Column(String, default="running")  # running / failed / done
+    lines_done = Column(Integer, nullable=False, default=0)
+    paths = Column(Integer, nullable=False, default=0)
+    modules = Column(Integer, nullable=False, default=0)
+    lessons = Column(Integer, nullable=False, default=0)
+    error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    keys = relationship("ImportJobKey", cascade="all, delete-orphan")
+
+class ImportJobKey(Base):
+    __tablename__ = "import_job_keys"
+
+    # Export key -> new row id for paths and modules, so later chunks (or a resume) can attach children
+    job_id = Column(Integer, ForeignKey("import_jobs.id"), primary_key=True)
+    key = Column(String, primary_key=True)
+    new_id = Column(Integer, nullable=False)
+
+class CacheVersion(Base):
+    __tablename__ = "cache_versions"
+
+    # Bumped in the same transaction as a change to the cached data; workers reload when it moves
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+class RateLimitBucket(Base):
+    __tablename__ = "rate_limit_buckets"
+
+    # Token bucket per "<endpoint>:<user>" for RATE_LIMIT_BACKEND=db
+    key = Column(String, primary_key=True)
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)  # epoch seconds of the last refill
+
+class Conversation(Base):
+    __tablename__ = "conversations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=True)
+    title = Column(String)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    messages = relationship("ConversationMessage", back_populates="conversation", cascade="all, delete-orphan")
+
+class ConversationMessage(Base):
+    __tablename__ = "conversation_messages"
+    __table_args__ = (Index("ix_conversation_messages_conversation_id_id", "conversation_id", "id"),)
+
+    id = Column(Integer, primary_key=True)
+    conversation_id = Column(Integer, ForeignKey("conversations.id"), nullable=False)
+    role = Column(String, nullable=False)  # user / assistant
+    content = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    conversation = relationship("Conversation", back_populates="messages")
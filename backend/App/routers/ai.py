@@ -1,15 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from ..database import get_db
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, selectinload
+from ..database import get_db, SessionLocal
 from .. import models, schemas
+from ..core.json_stream import StreamingPathParser
+from ..core.sse import format_sse, SSE_HEADERS
+from ..core.single_flight import single_flight
+from ..core.chat_memory import build_chat_messages, summarize_job
+from ..core.conversations import conversation_store
+from ..core.search import index_lessons
+from ..core.path_index import path_index, PATH_REUSE_ENABLED
+from ..core.lesson_bodies import assign_body, BODY_FIELDS
+from ..core.rate_limit import ai_rate_limit
+from ..core.auth import get_current_user
+from ..core.profiling import ProfiledRoute
+from ..core.llm import LLMClient, llm_stats, upstream_status
+from ..core.llm_output import (
+    GeneratedModule, GeneratedPathHeader, LessonPackage, InvalidModelOutput, LLM_REPAIR_ATTEMPTS,
+    parse, salvage_module
+)
+from ..core.quiz_bank import (
+    bank_key, normalize_difficulty, get_bank, fill_bank, sample_questions, replenish_bank, QUIZ_BANK_MIN_SIZE
+)
 import os
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Optional
 from openai import OpenAI
 from dotenv import load_dotenv
 
 load_dotenv()
 
-router = APIRouter(prefix="/ai", tags=["AI Generator"])
+router = APIRouter(prefix="/ai", tags=["AI Generator"], route_class=ProfiledRoute)
 
 def get_openai_client():
     api_key = os.getenv("OPENAI_API_KEY", "").strip()
@@ -28,17 +50,11 @@ def get_openai_client():
     print(f"DEBUG: Key length: {len(api_key)}")
     print(f"DEBUG: Key prefix/suffix: {api_key[:12]}...{api_key[-4:]}")
     
-    return OpenAI(api_key=api_key)
+    # Retries are done by LLMClient (backoff with jitter, fallback models), not by the SDK
+    return LLMClient(OpenAI(api_key=api_key, max_retries=0))
 
-@router.post("/generate-path")
-async def generate_learning_path(
-    req: schemas.PathGenerationRequest,
-    db: Session = Depends(get_db)
-):
-    client = get_openai_client()
-
-    try:
-        prompt = f"""
+def build_path_prompt(req: schemas.PathGenerationRequest) -> str:
+    return f"""
         You are a world-class educational path designer. 
         Create a comprehensive, professional learning path for '{req.topic}' at a '{req.difficulty}' level.
         The path should be designed for {req.weeks} weeks, with approximately {req.hours_per_week} hours of study per week.
@@ -67,74 +83,346 @@ async def generate_learning_path(
         Return ONLY the raw JSON string. No markdown, no triple backticks.
         """
 
+def path_messages(req: schemas.PathGenerationRequest):
+    return [
+        {"role": "system", "content": "You are a helpful assistant that outputs only JSON."},
+        {"role": "user", "content": build_path_prompt(req)}
+    ]
+
+def json_completion(client, model: str, messages: list) -> Optional[dict]:
+    """One JSON-mode completion parsed to a dict, or None if the model didn't return a JSON object."""
+    response = client.chat.completions.create(
+        model=model,
+        messages=messages,
+        response_format={"type": "json_object"}
+    )
+    try:
+        data = json.loads(response.choices[0].message.content.strip())
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+def path_header(data: dict, req: schemas.PathGenerationRequest) -> GeneratedPathHeader:
+    # The header is always repairable: a missing title becomes the requested topic
+    title = data.get("title")
+    if not isinstance(title, (str, int, float)) or not str(title).strip():
+        title = req.topic
+    return parse(GeneratedPathHeader, {**data, "title": title}) or GeneratedPathHeader(title=str(title))
+
+def build_module_prompt(req: schemas.PathGenerationRequest, path_title: str, index: int, total: int, hint: str) -> str:
+    return f"""
+        You are a world-class educational path designer working on the learning path '{path_title}'
+        for '{req.topic}' at a '{req.difficulty}' level, {req.hours_per_week} hours of study per week.
+        Write module {index + 1} of {total}{f" ('{hint}')" if hint else ""}.
+
+        Return a strictly valid JSON object with this exact structure:
+        {{
+            "title": "Module Name (e.g., Week {index + 1}: Topic)",
+            "order": {index + 1},
+            "lessons": [
+                {{
+                    "title": "Lesson Name",
+                    "content": "Specific learning objectives and topics covered",
+                    "estimated_time": "Estimated hours (e.g., 2 hours)",
+                    "difficulty": "{req.difficulty}"
+                }}
+            ]
+        }}
+        Return ONLY the raw JSON string.
+        """
+
+def validated_module(client, req: schemas.PathGenerationRequest, path_title: str, index: int, total: int,
+                     data) -> GeneratedModule:
+    """
+    The generated module after local repairs. A module that is still invalid is regenerated on its
+    own (a fraction of the full path call); if that keeps failing, its valid lessons are kept.
+    """
+    module = parse(GeneratedModule, data)
+    if module is not None:
+        return module
+
+    hint = data.get("title") if isinstance(data, dict) and isinstance(data.get("title"), str) else ""
+    messages = [
+        {"role": "system", "content": "You are a helpful assistant that outputs only JSON."},
+        {"role": "user", "content": build_module_prompt(req, path_title, index, total, hint)}
+    ]
+    for _ in range(LLM_REPAIR_ATTEMPTS):
+        module = parse(GeneratedModule, json_completion(client, "gpt-3.5-turbo", messages))
+        if module is not None:
+            return module
+
+    module = salvage_module(data)
+    if module is None:
+        raise InvalidModelOutput(f"module {index + 1} could not be generated")
+    return module
+
+def save_module(db: Session, path_id: int, module: GeneratedModule, m_idx: int, difficulty: str) -> models.Module:
+    new_module = models.Module(
+        title=module.title,
+        order=module.order if module.order is not None else m_idx + 1,
+        learning_path_id=path_id
+    )
+    db.add(new_module)
+    db.flush()
+
+    lessons = []
+    for lesson in module.lessons:
+        new_lesson = models.Lesson(
+            title=lesson.title,
+            difficulty=lesson.difficulty or difficulty,
+            estimated_time=lesson.estimated_time,
+            module_id=new_module.id
+        )
+        assign_body(db, new_lesson, content=lesson.content)
+        db.add(new_lesson)
+        lessons.append(new_lesson)
+
+    db.flush()
+    index_lessons(db, lessons)
+    return new_module
+
+def module_event(path_id: int, module: models.Module) -> dict:
+    return {
+        "path_id": path_id,
+        "module_id": module.id,
+        "title": module.title,
+        "order": module.order,
+        "lessons": [{"id": l.id, "title": l.title, "estimated_time": l.estimated_time} for l in module.lessons]
+    }
+
+def find_reusable_path(db: Session, req: schemas.PathGenerationRequest):
+    """An existing generated path close enough to this request to clone, as (path, score), or None."""
+    if not PATH_REUSE_ENABLED or not req.allow_reuse:
+        return None
+    match = path_index.find_similar(db, req.topic, req.difficulty, req.weeks)
+    if match is None:
+        return None
+    path_id, score = match
+    source = (
+        db.query(models.LearningPath)
+        .options(selectinload(models.LearningPath.modules).selectinload(models.Module.lessons))
+        .filter(models.LearningPath.id == path_id)
+        .first()
+    )
+    if source is None:
+        path_index.forget(path_id)
+        return None
+    return source, score
+
+def clone_learning_path(db: Session, source: models.LearningPath, user_id: int) -> models.LearningPath:
+    new_path = models.LearningPath(
+        title=source.title,
+        description=source.description,
+        difficulty=source.difficulty,
+        tags=source.tags,
+        creator_id=user_id
+    )
+    db.add(new_path)
+    db.flush()
+
+    lessons = []
+    for module in sorted(source.modules, key=lambda m: m.order or 0):
+        new_module = models.Module(title=module.title, order=module.order, learning_path_id=new_path.id)
+        db.add(new_module)
+        db.flush()
+        for lesson in module.lessons:
+            new_lesson = models.Lesson(
+                title=lesson.title,
+                difficulty=lesson.difficulty,
+                estimated_time=lesson.estimated_time,
+                module_id=new_module.id
+            )
+            if lesson.body_hash:
+                # Shared bodies are immutable, so the clone just points at the same one
+                new_lesson.body_hash = lesson.body_hash
+            else:
+                for field in BODY_FIELDS:
+                    setattr(new_lesson, "_" + field, getattr(lesson, "_" + field))
+            db.add(new_lesson)
+            lessons.append(new_lesson)
+
+    db.flush()
+    index_lessons(db, lessons)
+    return new_path
+
+def record_path_signature(db: Session, path_id: int, req: schemas.PathGenerationRequest):
+    db.add(models.PathSignature(
+        path_id=path_id,
+        topic=req.topic,
+        difficulty=req.difficulty,
+        weeks=req.weeks,
+        hours_per_week=req.hours_per_week
+    ))
+
+@router.post("/generate-path", dependencies=[Depends(ai_rate_limit("generate-path"))])
+def generate_learning_path(
+    req: schemas.PathGenerationRequest,
+    db: Session = Depends(get_db)
+):
+    # Near-identical requests (same goal phrased differently) clone an existing path instead of a new LLM call
+    reusable = find_reusable_path(db, req)
+    if reusable:
+        source, score = reusable
+        new_path = clone_learning_path(db, source, req.user_id)
+        db.commit()
+        path_index.record("reused")
+        return {"message": "Learning path ready! 🚀", "path_id": new_path.id, "title": new_path.title, "reused_from": source.id, "similarity": round(score, 3)}
+
+    client = get_openai_client()
+
+    try:
         response = client.chat.completions.create(
             model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that outputs only JSON."},
-                {"role": "user", "content": prompt}
-            ],
+            messages=path_messages(req),
             response_format={"type": "json_object"}
         )
         
         text = response.choices[0].message.content.strip()
         path_data = json.loads(text)
-        
+        if not isinstance(path_data, dict) or not isinstance(path_data.get("modules"), list) or not path_data["modules"]:
+            raise InvalidModelOutput("generated path has no modules")
+
+        # Validate every module before writing anything; only broken modules cost another call
+        header = path_header(path_data, req)
+        raw_modules = path_data["modules"]
+        modules = [
+            validated_module(client, req, header.title, m_idx, len(raw_modules), m_data)
+            for m_idx, m_data in enumerate(raw_modules)
+        ]
+
         # Save to database
         new_path = models.LearningPath(
-            title=path_data["title"],
-            description=path_data["description"],
-            difficulty=path_data.get("difficulty", req.difficulty),
+            title=header.title,
+            description=header.description,
+            difficulty=header.difficulty or req.difficulty,
             creator_id=req.user_id
         )
         db.add(new_path)
         db.commit()
         db.refresh(new_path)
         
-        for m_idx, m_data in enumerate(path_data["modules"]):
-            new_module = models.Module(
-                title=m_data["title"],
-                order=m_data.get("order", m_idx + 1),
-                learning_path_id=new_path.id
-            )
-            db.add(new_module)
-            db.commit()
-            db.refresh(new_module)
-            
-            for l_data in m_data["lessons"]:
-                new_lesson = models.Lesson(
-                    title=l_data["title"],
-                    content=l_data["content"],
-                    difficulty=l_data.get("difficulty", req.difficulty),
-                    estimated_time=l_data["estimated_time"],
-                    module_id=new_module.id
-                )
-                db.add(new_lesson)
+        for m_idx, module in enumerate(modules):
+            save_module(db, new_path.id, module, m_idx, req.difficulty)
         
+        record_path_signature(db, new_path.id, req)
         db.commit()
+        path_index.record("generated")
         return {"message": "Learning path generated via GPT-4! 🚀", "path_id": new_path.id, "title": new_path.title}
         
     except Exception as e:
         db.rollback()
-        raise HTTPException(status_code=500, detail=f"Generation failed: {str(e)}")
+        raise HTTPException(status_code=upstream_status(e), detail=f"Generation failed: {str(e)}")
 
-@router.post("/generate-lesson-content")
-async def generate_lesson_content(
-    req: schemas.LessonContentRequest,
-    db: Session = Depends(get_db)
-):
-    client = get_openai_client()
+@router.post("/generate-path/stream", dependencies=[Depends(ai_rate_limit("generate-path"))])
+def generate_learning_path_stream(req: schemas.PathGenerationRequest):
+    """
+    Same as /generate-path, but streams the model output and persists every module
+    (with its lessons) as soon as it is complete. Progress is pushed as server-sent events:
+    `path` once the path row exists, `module` per saved module, then `done` or `error`.
+    """
+    def event_stream():
+        # The request-scoped session may be closed before the body is streamed, so use our own
+        db = SessionLocal()
+        parser = StreamingPathParser()
+        new_path = None
+        saved_modules = 0
 
-    lesson = db.query(models.Lesson).filter(models.Lesson.id == req.lesson_id).first()
-    if not lesson:
-        raise HTTPException(status_code=404, detail="Lesson not found")
+        def ensure_path(data: dict):
+            nonlocal new_path
+            if new_path is None:
+                header = path_header(data, req)
+                new_path = models.LearningPath(
+                    title=header.title,
+                    description=header.description,
+                    difficulty=header.difficulty or req.difficulty,
+                    creator_id=req.user_id
+                )
+                db.add(new_path)
+                db.commit()
+                db.refresh(new_path)
+            return new_path
 
-    try:
-        prompt = f"""
+        try:
+            reusable = find_reusable_path(db, req)
+            if reusable:
+                source, score = reusable
+                path = clone_learning_path(db, source, req.user_id)
+                db.commit()
+                path_index.record("reused")
+                yield format_sse("path", {"path_id": path.id, "title": path.title, "description": path.description, "reused_from": source.id})
+                for module in sorted(path.modules, key=lambda m: m.order or 0):
+                    yield format_sse("module", module_event(path.id, module))
+                yield format_sse("done", {"path_id": path.id, "title": path.title, "modules": len(path.modules), "reused_from": source.id, "similarity": round(score, 3)})
+                return
+
+            client = get_openai_client()
+            stream = client.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=path_messages(req),
+                response_format={"type": "json_object"},
+                stream=True
+            )
+
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+
+                for kind, data in parser.feed(delta):
+                    if kind == "header":
+                        path = ensure_path(data)
+                        yield format_sse("path", {"path_id": path.id, "title": path.title, "description": path.description})
+                    elif kind == "module":
+                        path = ensure_path({})
+                        module = validated_module(client, req, path.title, saved_modules, req.weeks, data)
+                        module = save_module(db, path.id, module, saved_modules, req.difficulty)
+                        db.commit()
+                        saved_modules += 1
+                        yield format_sse("module", module_event(path.id, module))
+
+            # The header may have come after the modules; reconcile title/description from the full document
+            path_data = parser.finish()
+            path = ensure_path(path_data)
+            header = path_header(path_data, req)
+            if path_data.get("title"):
+                path.title = header.title
+            if header.description:
+                path.description = header.description
+            record_path_signature(db, path.id, req)
+            db.commit()
+            path_index.record("generated")
+
+            yield format_sse("done", {"path_id": path.id, "title": path.title, "modules": saved_modules})
+
+        except Exception as e:
+            db.rollback()
+            yield format_sse("error", {"detail": f"Generation failed: {str(e)}", "path_id": new_path.id if new_path else None})
+        finally:
+            db.close()
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.get("/llm/stats")
+def get_llm_stats():
+    """Per-model request/retry/hedge/fallback counters and rolling latency percentiles for this worker."""
+    return llm_stats.report()
+
+@router.get("/path-reuse/stats")
+def get_path_reuse_stats():
+    """Clone-vs-generate counters of this worker's path similarity index."""
+    return path_index.report()
+
+LESSON_CONTENT_CONCURRENCY = int(os.getenv("LESSON_CONTENT_CONCURRENCY", "4"))
+
+def lesson_content_prompt(title: str, difficulty: str, path_title: str) -> str:
+    return f"""
         You are a technical expert and educator. 
         Create a comprehensive learning package for the following topic:
-        Title: {lesson.title}
-        Context: Part of a {lesson.module.learning_path.title} curriculum.
-        Difficulty: {lesson.difficulty}
+        Title: {title}
+        Context: Part of a {path_title} curriculum.
+        Difficulty: {difficulty}
         
         Return a valid JSON object with the following fields:
         {{
@@ -163,144 +451,387 @@ async def generate_lesson_content(
         Return ONLY the raw JSON string.
         """
 
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a technical expert that outputs only JSON."},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"}
-        )
-        
-        data = json.loads(response.choices[0].message.content.strip())
-        detailed_content = data.get("content", "")
-        why_it_matters = data.get("why_it_matters", "")
-        what_you_learn = json.dumps(data.get("what_you_learn", []))
-        resources_data = data.get("resources", [])
-        
-        # --- SERVER-SIDE URL RESOLUTION ---
-        from youtubesearchpython import VideosSearch
-        from googlesearch import search as gsearch
-        
-        for res in resources_data:
-            url_val = res.get("url", "").strip()
-            if url_val.startswith("SEARCH:"):
-                query = url_val.replace("SEARCH:", "").strip()
-                resolved_url = None
-                
-                try:
-                    if "video" in res.get("type", "").lower():
-                        # Search YouTube
-                        videosSearch = VideosSearch(query, limit = 1)
-                        results = videosSearch.result()
-                        if results and results['result']:
-                            resolved_url = results['result'][0]['link']
-                    else:
-                        # Search Google (Articles/Docs/Practice)
-                        # num_results/advanced might vary by version, using simple iterator
-                        search_results = list(gsearch(query, num_results=1, advanced=True))
-                        if search_results:
-                            resolved_url = search_results[0].url
-                except Exception as e:
-                    print(f"Search resolution failed for '{query}': {e}")
-                
-                # Assign resolved URL or fallback to search page
-                if resolved_url:
-                    res["url"] = resolved_url
+def resolve_resource_urls(resources_data: list):
+    # --- SERVER-SIDE URL RESOLUTION ---
+    from youtubesearchpython import VideosSearch
+    from googlesearch import search as gsearch
+    
+    for res in resources_data:
+        url_val = res.get("url", "").strip()
+        if url_val.startswith("SEARCH:"):
+            query = url_val.replace("SEARCH:", "").strip()
+            resolved_url = None
+            
+            try:
+                if "video" in res.get("type", "").lower():
+                    # Search YouTube
+                    videosSearch = VideosSearch(query, limit = 1)
+                    results = videosSearch.result()
+                    if results and results['result']:
+                        resolved_url = results['result'][0]['link']
                 else:
-                     # Fallback to search result page if resolution fails
-                    if "video" in res.get("type", "").lower():
-                        res["url"] = f"https://www.youtube.com/results?search_query={query.replace(' ', '+')}"
-                    else:
-                        res["url"] = f"https://www.google.com/search?q={query.replace(' ', '+')}"
-        # ----------------------------------
+                    # Search Google (Articles/Docs/Practice)
+                    # num_results/advanced might vary by version, using simple iterator
+                    search_results = list(gsearch(query, num_results=1, advanced=True))
+                    if search_results:
+                        resolved_url = search_results[0].url
+            except Exception as e:
+                print(f"Search resolution failed for '{query}': {e}")
+            
+            # Assign resolved URL or fallback to search page
+            if resolved_url:
+                res["url"] = resolved_url
+            else:
+                 # Fallback to search result page if resolution fails
+                if "video" in res.get("type", "").lower():
+                    res["url"] = f"https://www.youtube.com/results?search_query={query.replace(' ', '+')}"
+                else:
+                    res["url"] = f"https://www.google.com/search?q={query.replace(' ', '+')}"
+    # ----------------------------------
+    return resources_data
+
+# Short fields of a lesson package that can be asked for on their own when the model leaves them out
+LESSON_EXTRA_FIELDS = {
+    "why_it_matters": "A 2-3 sentence explanation of why this skill is valuable in the industry.",
+    "what_you_learn": ["Key takeaway 1", "Key takeaway 2", "Key takeaway 3"],
+}
+
+def fill_lesson_fields(client, package: LessonPackage, title: str, difficulty: str, path_title: str) -> LessonPackage:
+    """Ask for just the missing short fields instead of regenerating the whole study guide."""
+    missing = {f: example for f, example in LESSON_EXTRA_FIELDS.items() if not getattr(package, f)}
+    if not missing:
+        return package
+    prompt = (
+        f"For the lesson '{title}' ({difficulty}, part of a {path_title} curriculum), "
+        f"return a valid JSON object with exactly these fields: {json.dumps(missing)}. Return ONLY the raw JSON string."
+    )
+    data = json_completion(client, "gpt-4o-mini", [
+        {"role": "system", "content": "You are a technical expert that outputs only JSON."},
+        {"role": "user", "content": prompt}
+    ]) or {}
+    repaired = parse(LessonPackage, {**package.model_dump(), **{f: data.get(f) for f in missing if data.get(f)}})
+    return repaired or package
+
+def fetch_lesson_package(client, title: str, difficulty: str, path_title: str) -> dict:
+    """Ask the model for a lesson's study guide and resolve its resource links. No DB access."""
+    messages = [
+        {"role": "system", "content": "You are a technical expert that outputs only JSON."},
+        {"role": "user", "content": lesson_content_prompt(title, difficulty, path_title)}
+    ]
+    # The study guide is the bulk of the package, so without one the whole package is asked for again
+    package = None
+    for _ in range(1 + LLM_REPAIR_ATTEMPTS):
+        package = parse(LessonPackage, json_completion(client, "gpt-4o-mini", messages))
+        if package is not None:
+            break
+    if package is None:
+        raise InvalidModelOutput("lesson package without content")
+
+    package = fill_lesson_fields(client, package, title, difficulty, path_title)
+    return {
+        "content": package.content,
+        "why_it_matters": package.why_it_matters,
+        "what_you_learn": package.what_you_learn,
+        "resources": resolve_resource_urls(package.resources)
+    }
+
+def apply_lesson_package(db: Session, lesson: models.Lesson, package: dict):
+    # Identical packages (same template, same regeneration) share one stored body
+    assign_body(
+        db, lesson,
+        content=package["content"],
+        why_it_matters=package["why_it_matters"],
+        what_you_learn=json.dumps(package["what_you_learn"]),
+        ai_resources=json.dumps(package["resources"])
+    )
+    # Keep the full-text index in step with the new content
+    index_lessons(db, [lesson])
+
+def has_generated_content(lesson: models.Lesson) -> bool:
+    # Lessons created with a path only carry a one-line summary; the full package sets why_it_matters
+    return bool(lesson.why_it_matters)
+
+def generate_and_store_lesson_content(client, lesson_id: int) -> dict:
+    """Generate and persist one lesson's package in its own session. Shared by the single and bulk endpoints."""
+    db = SessionLocal()
+    try:
+        lesson = db.query(models.Lesson).filter(models.Lesson.id == lesson_id).first()
+        if not lesson:
+            raise HTTPException(status_code=404, detail="Lesson not found")
+
+        package = fetch_lesson_package(client, lesson.title, lesson.difficulty, lesson.module.learning_path.title)
         
         # Update lesson in database
-        lesson.content = detailed_content
-        lesson.why_it_matters = why_it_matters
-        lesson.what_you_learn = what_you_learn
-        lesson.ai_resources = json.dumps(resources_data)
+        apply_lesson_package(db, lesson, package)
         
         db.commit()
         
         return {
             "message": "Content generated successfully via GPT-4 with Real-Time Validation", 
-            "content": detailed_content,
-            "why_it_matters": why_it_matters,
-            "what_you_learn": data.get("what_you_learn", []),
-            "resources": resources_data
+            "content": package["content"],
+            "why_it_matters": package["why_it_matters"],
+            "what_you_learn": package["what_you_learn"],
+            "resources": package["resources"]
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
-        raise HTTPException(status_code=500, detail=f"Failed to generate content: {str(e)}")
+        raise HTTPException(status_code=upstream_status(e), detail=f"Failed to generate content: {str(e)}")
+    finally:
+        db.close()
 
-@router.post("/chat", response_model=schemas.ChatResponse)
-async def chat_with_ai(req: schemas.ChatRequest):
+@router.post("/generate-lesson-content", dependencies=[Depends(ai_rate_limit("lesson-content"))])
+def generate_lesson_content(
+    req: schemas.LessonContentRequest,
+    db: Session = Depends(get_db)
+):
     client = get_openai_client()
 
-    messages = [
-        {
-            "role": "system",
-            "content": "You are an AI learning assistant helping students with programming, planning, and career guidance."
-        }
-    ]
+    lesson = db.query(models.Lesson.id).filter(models.Lesson.id == req.lesson_id).first()
+    if not lesson:
+        raise HTTPException(status_code=404, detail="Lesson not found")
+
+    # Double clicks / other tabs asking for the same lesson share one model call and one write
+    return single_flight.do(
+        f"lesson-content:{req.lesson_id}",
+        lambda: generate_and_store_lesson_content(client, req.lesson_id)
+    )
 
-    for msg in req.history:
-        messages.append({
-            "role": "user" if msg.isUser else "assistant",
-            "content": msg.text
-        })
+@router.post("/generate-lesson-content/bulk", dependencies=[Depends(ai_rate_limit("lesson-content-bulk"))])
+def generate_lesson_content_bulk(
+    req: schemas.BulkLessonContentRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Generate content for every lesson of a module or path that doesn't have it yet.
+    Model calls run concurrently (at most `concurrency`, default LESSON_CONTENT_CONCURRENCY),
+    each lesson is committed as soon as it finishes and progress is streamed as server-sent events.
+    """
+    if req.module_id is None and req.path_id is None:
+        raise HTTPException(status_code=400, detail="Provide either module_id or path_id")
 
-    messages.append({
-        "role": "user",
-        "content": req.message
-    })
+    client = get_openai_client()
 
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=messages
+    query = (
+        db.query(models.Lesson)
+        .join(models.Module, models.Lesson.module_id == models.Module.id)
     )
+    if req.module_id is not None:
+        query = query.filter(models.Module.id == req.module_id)
+    else:
+        query = query.filter(models.Module.learning_path_id == req.path_id)
+    rows = query.order_by(models.Module.order, models.Lesson.id).all()
 
-    return {
-        "reply": response.choices[0].message.content.strip()
-    }
+    if not rows:
+        raise HTTPException(status_code=404, detail="No lessons found")
+
+    # Snapshot what the workers need so they never touch the request session
+    pending = [
+        {"lesson_id": lesson.id, "title": lesson.title}
+        for lesson in rows if not has_generated_content(lesson)
+    ]
+    skipped = len(rows) - len(pending)
+    workers = max(1, min(req.concurrency or LESSON_CONTENT_CONCURRENCY, LESSON_CONTENT_CONCURRENCY))
+
+    def generate_one(item: dict):
+        return single_flight.do(
+            f"lesson-content:{item['lesson_id']}",
+            lambda: generate_and_store_lesson_content(client, item["lesson_id"])
+        )
+
+    def event_stream():
+        yield format_sse("start", {"total": len(rows), "pending": len(pending), "skipped": skipped, "concurrency": workers})
+
+        generated = failed = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(generate_one, item): item for item in pending}
+            for future in as_completed(futures):
+                item = futures[future]
+                try:
+                    future.result()
+                    generated += 1
+                    yield format_sse("lesson", {"lesson_id": item["lesson_id"], "title": item["title"], "status": "generated"})
+                except Exception as e:
+                    failed += 1
+                    detail = e.detail if isinstance(e, HTTPException) else str(e)
+                    yield format_sse("lesson", {"lesson_id": item["lesson_id"], "title": item["title"], "status": "failed", "detail": detail})
+
+        yield format_sse("done", {"generated": generated, "failed": failed, "skipped": skipped})
 
-@router.post("/generate-quiz", response_model=schemas.QuizResponse)
-async def generate_quiz(req: schemas.QuizRequest):
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+CHAT_SYSTEM_PROMPT = "You are an AI learning assistant helping students with programming, planning, and career guidance."
+
+@router.post("/chat", response_model=schemas.ChatResponse, dependencies=[Depends(ai_rate_limit("chat"))])
+def chat_with_ai(
+    req: schemas.ChatRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
     client = get_openai_client()
-    
-    prompt = f"""
-    Create a {req.difficulty} level multiple-choice quiz about '{req.topic}' with {req.question_count} questions.
-    
-    Return a VALID JSON object with this exact structure:
-    {{
-        "title": "Quiz Title",
-        "questions": [
-            {{
-                "id": 1,
-                "question": "Question text here?",
-                "options": ["Option A", "Option B", "Option C", "Option D"],
-                "correct_index": 0,  // The index (0-3) of the correct option
-                "explanation": "Brief explanation of why the answer is correct."
-            }}
+
+    if req.conversation_id is not None:
+        conversation = db.query(models.Conversation).filter(
+            models.Conversation.id == req.conversation_id,
+            models.Conversation.user_id == current_user.id
+        ).first()
+        if not conversation:
+            raise HTTPException(status_code=404, detail="Conversation not found")
+        history = conversation_store.history(db, conversation.id)
+    else:
+        # New conversation; a client-side history (older clients) only seeds it once
+        history = [
+            {"role": "user" if msg.isUser else "assistant", "content": msg.text}
+            for msg in req.history
         ]
-    }}
-    
-    Ensure options are plausible. Return ONLY raw JSON.
-    """
+        conversation = conversation_store.create(db, user_id=current_user.id, title=req.message[:80], history=history)
+
+    # Recent turns verbatim, older ones folded into a cached rolling summary
+    messages, summary_job = build_chat_messages(CHAT_SYSTEM_PROMPT, history, req.message)
+    if summary_job:
+        background_tasks.add_task(summarize_job, client, summary_job)
 
     try:
         response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a quiz generator that outputs strictly structured JSON."},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"}
+            model="gpt-4o-mini",
+            messages=messages,
+            timeout=30  # interactive: fail over to a retry sooner
         )
-        
-        return json.loads(response.choices[0].message.content.strip())
-        
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Quiz generation failed: {str(e)}")
+        raise HTTPException(status_code=upstream_status(e), detail=f"Chat failed: {str(e)}")
+    reply = response.choices[0].message.content.strip()
+
+    conversation_store.append(db, conversation.id, [
+        {"role": "user", "content": req.message},
+        {"role": "assistant", "content": reply}
+    ])
+    db.commit()
+
+    return {
+        "reply": reply,
+        "conversation_id": conversation.id
+    }
+
+@router.get("/conversations", response_model=List[schemas.ConversationOut])
+def list_conversations(
+    limit: int = 20,
+    offset: int = 0,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    return (
+        db.query(models.Conversation)
+        .filter(models.Conversation.user_id == current_user.id)
+        .order_by(models.Conversation.updated_at.desc(), models.Conversation.id.desc())
+        .offset(offset)
+        .limit(min(limit, 100))
+        .all()
+    )
+
+@router.get("/conversations/{conversation_id}/messages", response_model=schemas.ConversationMessagesPage)
+def get_conversation_messages(
+    conversation_id: int,
+    before: Optional[int] = None,
+    limit: int = 30,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Newest page first; pass `next_before` back as `before` to load older messages."""
+    if not db.query(models.Conversation.id).filter(
+        models.Conversation.id == conversation_id,
+        models.Conversation.user_id == current_user.id
+    ).first():
+        raise HTTPException(status_code=404, detail="Conversation not found")
+
+    limit = max(1, min(limit, 100))
+    query = db.query(models.ConversationMessage).filter(models.ConversationMessage.conversation_id == conversation_id)
+    if before is not None:
+        query = query.filter(models.ConversationMessage.id < before)
+    rows = query.order_by(models.ConversationMessage.id.desc()).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = list(reversed(rows[:limit]))
+
+    return {
+        "conversation_id": conversation_id,
+        "messages": [
+            {"id": m.id, "text": m.content, "isUser": m.role == "user", "created_at": m.created_at}
+            for m in rows
+        ],
+        "next_before": rows[0].id if has_more else None
+    }
+
+@router.delete("/conversations/{conversation_id}")
+def delete_conversation(
+    conversation_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    conversation = db.query(models.Conversation).filter(
+        models.Conversation.id == conversation_id,
+        models.Conversation.user_id == current_user.id
+    ).first()
+    if not conversation:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    db.delete(conversation)
+    db.commit()
+    conversation_store.forget(conversation_id)
+    return {"message": "Deleted"}
+
+@router.post("/generate-quiz", response_model=schemas.QuizResponse, dependencies=[Depends(ai_rate_limit("generate-quiz"))])
+def generate_quiz(
+    req: schemas.QuizRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
+    """
+    Serve a quiz sampled from the question bank of the lesson (or topic) and difficulty.
+    Only a bank too small for the request calls the model inline; a low bank is topped up
+    in the background after responding.
+    """
+    topic = req.topic
+    if req.lesson_id is not None:
+        lesson = db.query(models.Lesson.title).filter(models.Lesson.id == req.lesson_id).first()
+        if not lesson:
+            raise HTTPException(status_code=404, detail="Lesson not found")
+        topic = topic or lesson.title
+    if not topic:
+        raise HTTPException(status_code=400, detail="Provide either topic or lesson_id")
+
+    key = bank_key(topic, req.lesson_id)
+    difficulty = normalize_difficulty(req.difficulty)
+    bank = get_bank(db, key, difficulty)
+
+    try:
+        if bank is None or bank.size < req.question_count:
+            # The client (and its API key check) is only built if the bank really needs questions
+            fill_bank(get_openai_client, key, difficulty, topic, req.lesson_id, minimum=req.question_count)
+            db.expire_all()
+            bank = get_bank(db, key, difficulty)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=upstream_status(e), detail=f"Quiz generation failed: {str(e)}")
+    if bank is None or bank.size == 0:
+        raise HTTPException(status_code=500, detail="Quiz generation failed: no usable questions")
+
+    questions = sample_questions(db, bank, req.question_count)
+    if bank.size < QUIZ_BANK_MIN_SIZE:
+        background_tasks.add_task(replenish_bank, get_openai_client, key, difficulty, topic, req.lesson_id)
+
+    return {
+        "title": f"{topic} Quiz",
+        "questions": [
+            {
+                "id": q.id,
+                "question": q.question,
+                "options": q.options,
+                "correct_index": q.correct_index,
+                "explanation": q.explanation or ""
+            }
+            for q in questions
+        ]
+    }
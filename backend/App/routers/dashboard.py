@@ -0,0 +1,80 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from ..database import SessionLocal
+from .. import models, schemas
+from ..core.auth import get_current_user
+from ..core.profiling import ProfiledRoute
+from .learning_path import get_all_learning_paths
+from .progress import get_progress_overview, get_paths_progress
+from .resource import get_resource_stats
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+import os
+
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"], route_class=ProfiledRoute)
+
+# Sections of all dashboard requests in this worker share these threads, and each holds its own
+# DB connection while it runs, so keep this below the pool size (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+DASHBOARD_WORKERS = int(os.getenv("DASHBOARD_WORKERS", "6"))
+_pool = ThreadPoolExecutor(max_workers=DASHBOARD_WORKERS, thread_name_prefix="dashboard")
+
+def _paths(db: Session, user: models.User):
+    # Serialize while the session is open: lessons lazy-load and carry the per-user status
+    return [schemas.LearningPathOut.model_validate(p) for p in get_all_learning_paths(user_id=user.id, db=db)]
+
+def _overview(db: Session, user: models.User):
+    return get_progress_overview(user_id=user.id, db=db)
+
+def _path_progress(db: Session, user: models.User):
+    return get_paths_progress(user_id=user.id, path_ids=None, db=db)
+
+def _resource_stats(db: Session, user: models.User):
+    return get_resource_stats(db=db, current_user=user)
+
+# The profile needs no query of its own: it is the user that authenticated the request
+SECTIONS = {
+    "profile": None,
+    "paths": _paths,
+    "overview": _overview,
+    "path_progress": _path_progress,
+    "resource_stats": _resource_stats,
+}
+
+def _run_section(section, user: models.User):
+    db = SessionLocal()
+    try:
+        return section(db, user)
+    finally:
+        db.close()
+
+@router.get("", response_model=schemas.DashboardOut)
+def get_dashboard(
+    sections: Optional[List[str]] = Query(None, description="Sections to include, e.g. sections=paths,overview (default: all)"),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Everything the dashboard loads, behind one auth check. The independent sections run
+    concurrently, each on its own session; a section that fails is reported in `errors`
+    instead of failing the whole dashboard.
+    """
+    wanted = [s.strip() for value in (sections or SECTIONS) for s in value.split(",") if s.strip()]
+    unknown = sorted(set(wanted) - set(SECTIONS))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown sections: {', '.join(unknown)}. Available: {', '.join(SECTIONS)}")
+
+    result = {"errors": {}}
+    if "profile" in wanted:
+        result["profile"] = schemas.UserProfile.model_validate(current_user)
+
+    futures = {
+        name: _pool.submit(_run_section, SECTIONS[name], current_user)
+        for name in dict.fromkeys(wanted) if SECTIONS[name] is not None
+    }
+    for name, future in futures.items():
+        try:
+            result[name] = future.result()
+        except Exception as e:
+            status = e.status_code if isinstance(e, HTTPException) else 500
+            result["errors"][name] = f"{status}: {getattr(e, 'detail', None) or e}"
+
+    return result
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from .. import models, schemas
+from ..database import get_db
+from ..core.auth import get_current_user
+from ..core.profiling import ProfiledRoute
+from ..core import leaderboard
+from datetime import datetime
+from typing import Optional
+
+router = APIRouter(prefix="/leaderboards", tags=["Leaderboards"], route_class=ProfiledRoute)
+
+@router.get("/{window}", response_model=schemas.LeaderboardOut)
+def get_leaderboard(
+    window: str,
+    cohort: Optional[str] = Query(None, description="'mine' for the user's career-goal cohort, or a career goal; global if omitted"),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Top learners by hours this week, this month or of all time, plus the current user's own rank."""
+    if window not in leaderboard.WINDOWS:
+        raise HTTPException(status_code=400, detail=f"Unknown window. Available: {', '.join(leaderboard.WINDOWS)}")
+
+    if cohort is not None:
+        cohort = leaderboard.normalize_cohort(current_user.career_goal if cohort == "mine" else cohort)
+        if not cohort:
+            raise HTTPException(status_code=400, detail="Set a career goal to see your cohort's leaderboard")
+
+    start = leaderboard.period_start(window, datetime.utcnow().date())
+    entries = leaderboard.top(db, window, start, cohort, limit)
+    me = leaderboard.rank_of(db, current_user.id, window, start, cohort)
+    if me:
+        me["full_name"] = current_user.full_name
+
+    return {"window": window, "period_start": start, "cohort": cohort, "entries": entries, "me": me}
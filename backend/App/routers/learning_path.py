@@ -1,11 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from ..database import get_db
-from ..models import LearningPath, Progress, Lesson
-from ..schemas import LearningPathOut, LearningPathCreate, ModuleOut, LessonOut
-from typing import List
+from ..database import get_db, SessionLocal
+from ..models import LearningPath, Progress, Lesson, Module, ImportJob
+from ..core.search import remove_documents
+from ..core.path_transfer import export_lines, PathImporter, InvalidImportLine, IMPORT_CHUNK_SIZE
+from ..schemas import LearningPathOut, LearningPathCreate, ModuleOut, LessonOut, ImportJobOut
+from ..core.profiling import ProfiledRoute
+from typing import List, Optional
 
-router = APIRouter(prefix="/learning-paths", tags=["Learning Paths"])
+router = APIRouter(prefix="/learning-paths", tags=["Learning Paths"], route_class=ProfiledRoute)
 
 # CREATE
 @router.post("/", response_model=LearningPathOut)
@@ -44,6 +49,100 @@ def get_all_learning_paths(user_id: int = None, db: Session = Depends(get_db)):
                 ]
     return paths
 
+# EXPORT (declared before /{path_id} so the literal paths win)
+@router.get("/export")
+def export_learning_paths(user_id: int):
+    """Every path of the user as JSON Lines (see core.path_transfer), streamed row by row."""
+    def stream():
+        # The request-scoped session may be closed before the body is streamed, so use our own
+        db = SessionLocal()
+        try:
+            yield from export_lines(db, user_id)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        stream(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="pathora-paths-{user_id}.jsonl"'}
+    )
+
+# IMPORT
+def _open_import(db: Session, user_id: int, job_id: Optional[int]) -> ImportJob:
+    if job_id is None:
+        job = ImportJob(user_id=user_id)
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+    job = db.query(ImportJob).filter(ImportJob.id == job_id, ImportJob.user_id == user_id).first()
+    if not job:
+        raise HTTPException(404, "Import job not found")
+    if job.status == "done":
+        raise HTTPException(409, "Import job already finished")
+    job.status = "running"
+    db.commit()
+    db.refresh(job)
+    return job
+
+@router.get("/import/{job_id}", response_model=ImportJobOut)
+def get_import_job(job_id: int, db: Session = Depends(get_db)):
+    job = db.query(ImportJob).filter(ImportJob.id == job_id).first()
+    if not job:
+        raise HTTPException(404, "Import job not found")
+    return job
+
+@router.post("/import", response_model=ImportJobOut)
+async def import_learning_paths(request: Request, user_id: int, job_id: Optional[int] = None):
+    """
+    Import a JSONL export for `user_id`, reading the body line by line and committing every
+    IMPORT_CHUNK_SIZE lines. If it fails, the error carries the job id: POST the same file again
+    with ?job_id= to resume after the last committed line.
+    """
+    db = SessionLocal()
+    try:
+        job = await run_in_threadpool(_open_import, db, user_id, job_id)
+        importer = await run_in_threadpool(PathImporter, db, job)
+        skip = job.lines_done
+        line_no = 0
+        chunk = []
+        buffer = b""
+
+        async def lines():
+            nonlocal buffer
+            async for piece in request.stream():
+                buffer += piece
+                *complete, buffer = buffer.split(b"\n")
+                for raw in complete:
+                    yield raw
+            if buffer:
+                yield buffer
+
+        try:
+            async for raw in lines():
+                line_no += 1
+                if line_no <= skip or not raw.strip():
+                    continue
+                chunk.append((line_no, raw))
+                if len(chunk) >= IMPORT_CHUNK_SIZE:
+                    await run_in_threadpool(importer.apply, chunk)
+                    chunk = []
+            if chunk:
+                await run_in_threadpool(importer.apply, chunk)
+        except InvalidImportLine as e:
+            state = await run_in_threadpool(importer.state)
+            raise HTTPException(422, {"message": str(e), **state})
+        except Exception as e:
+            # Either a chunk failed (already recorded) or the upload broke off between chunks
+            await run_in_threadpool(importer.fail, e)
+            state = await run_in_threadpool(importer.state)
+            raise HTTPException(500, {"message": f"Import failed: {e}", **state})
+
+        job = await run_in_threadpool(importer.finish)
+        return ImportJobOut.model_validate(job)
+    finally:
+        db.close()
+
 # GET
 @router.get("/{path_id}", response_model=LearningPathOut)
 def get_learning_path(
@@ -94,6 +193,8 @@ def delete_learning_path(path_id: int, db: Session = Depends(get_db)):
     path = db.query(LearningPath).filter(LearningPath.id == path_id).first()
     if not path:
         raise HTTPException(404, "Learning path not found")
+    lesson_ids = [l.id for l in db.query(Lesson.id).join(Module).filter(Module.learning_path_id == path_id)]
     db.delete(path)
+    remove_documents(db, "lesson", lesson_ids)
     db.commit()
     return {"message": "Deleted"}
\ No newline at end of file
@@ -3,12 +3,20 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from ..database import get_db
 from ..models import Lesson
+from ..core.search import index_lessons
+from ..core.lesson_bodies import assign_body
+from ..core.profiling import ProfiledRoute
 
-router = APIRouter(prefix="/lessons", tags=["Lessons"])
+router = APIRouter(prefix="/lessons", tags=["Lessons"], route_class=ProfiledRoute)
 
 @router.post("/")
 def create_lesson(data: LessonCreate, db: Session = Depends(get_db)):
-    lesson = Lesson(**data.dict())
+    fields = data.dict()
+    content = fields.pop("content")
+    lesson = Lesson(**fields)
+    assign_body(db, lesson, content=content)
     db.add(lesson)
+    db.flush()
+    index_lessons(db, [lesson])
     db.commit()
     return lesson
@@ -5,8 +5,9 @@ from .. import models, schemas
 from ..database import get_db
 from ..core.security import verify_password
 from ..core.auth import generate_token
+from ..core.profiling import ProfiledRoute
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 @router.post("/login")
 def login(request: schemas.UserLogin, db: Session = Depends(get_db)):
@@ -3,8 +3,9 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from ..database import get_db
 from ..models import Module
+from ..core.profiling import ProfiledRoute
 
-router = APIRouter(prefix="/modules", tags=["Modules"])
+router = APIRouter(prefix="/modules", tags=["Modules"], route_class=ProfiledRoute)
 
 @router.post("/")
 def create_module(data: ModuleCreate, db: Session = Depends(get_db)):
@@ -3,11 +3,15 @@ from sqlalchemy.orm import Session
 from .. import models, schemas
 from ..database import get_db
 from ..core.auth import get_current_user
+from ..core.single_flight import single_flight
+from ..core.rate_limit import ai_rate_limit
 from ..schemas import UserResponse,UserProfileUpdate,UserProfile
 from sqlalchemy import func
 from ..models import User
+from ..core.profiling import ProfiledRoute
+from ..core import leaderboard
 
-router = APIRouter(prefix="/users", tags=["Users"])
+router = APIRouter(prefix="/users", tags=["Users"], route_class=ProfiledRoute)
 
 @router.get("/profile", response_model=UserProfile)
 def get_profile(current_user: models.User = Depends(get_current_user)):
@@ -49,6 +53,10 @@ def update_profile(update: schemas.UserProfileUpdate, db: Session = Depends(get_
     # Update user fields
     for key, value in update_data.items():
         setattr(user, key, value)
+
+    # Cohort boards group by career goal, so the user's rollups follow it
+    if 'career_goal' in update_data:
+        leaderboard.set_cohort(db, user.id, user.career_goal)
     
     try:
         db.commit()
@@ -99,21 +107,23 @@ def get_user_by_id(
 
     return user
 
-@router.patch("/{user_id}/complete-onboarding")
-async def complete_onboarding(user_id: int, db: Session = Depends(get_db)):
+@router.patch("/{user_id}/complete-onboarding", dependencies=[Depends(ai_rate_limit("generate-path"))])
+def complete_onboarding(user_id: int, db: Session = Depends(get_db)):
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    # 🚫 Prevent duplicate generation
-    existing_path = db.query(models.LearningPath).filter(
-        models.LearningPath.creator_id == user_id
-    ).first()
+    def generate_path_once():
+        # 🚫 Prevent duplicate generation
+        existing_path = db.query(models.LearningPath).filter(
+            models.LearningPath.creator_id == user_id
+        ).first()
+        if existing_path:
+            return {"path_id": existing_path.id}
 
-    if not existing_path:
         # Generate learning path ONCE
         from .ai import generate_learning_path
-        await generate_learning_path(
+        result = generate_learning_path(
             schemas.PathGenerationRequest(
                 topic=user.career_goal,
                 difficulty=user.experience_level,
@@ -123,6 +133,10 @@ async def complete_onboarding(user_id: int, db: Session = Depends(get_db)):
             ),
             db
         )
+        return {"path_id": result["path_id"]}
+
+    # Concurrent onboarding calls (other tab, other worker) wait for the same generation
+    single_flight.do(f"onboarding:{user_id}", generate_path_once)
 
     user.is_onboarded = True
     db.commit()
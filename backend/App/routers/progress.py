@@ -1,12 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from ..database import get_db
-from ..models import Progress, Lesson, Module, LearningSession, LearningPath
-from sqlalchemy import func
-from datetime import datetime, timedelta
-from typing import List
+from ..models import Progress, Lesson, Module, LearningSession, LearningPath, ProgressEvent, LessonReview
+from ..core.heartbeats import heartbeat_buffer, HEARTBEAT_INTERVAL_SECONDS
+from ..core import leaderboard, reviews
+from ..core.leaderboard import MAX_SESSION_HOURS
+from ..schemas import ProgressSyncRequest, ProgressSyncResponse, ProgressEventIn, ProgressEventType, ReviewResult, LessonReviewOut, DueReviewsOut
+from ..core.profiling import ProfiledRoute
+from sqlalchemy import func, insert
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
 
-router = APIRouter(prefix="/progress", tags=["Progress"])
+router = APIRouter(prefix="/progress", tags=["Progress"], route_class=ProfiledRoute)
 
 @router.post("/start/{lesson_id}")
 def start_lesson(
@@ -34,7 +40,7 @@ def start_lesson(
 def complete_lesson(
     lesson_id: int,
     user_id: int,
-    time_spent: float = 0.0,
+    time_spent: float = Query(0.0, ge=0, le=MAX_SESSION_HOURS, description="Hours spent on the lesson"),
     db: Session = Depends(get_db)
 ):
     session = LearningSession(
@@ -44,6 +50,7 @@ def complete_lesson(
         completed=True
     )
     db.add(session)
+    leaderboard.record_sessions(db, [{"user_id": user_id, "time_spent": time_spent, "completed": True}])
 
     progress = db.query(Progress).filter_by(
         user_id=user_id,
@@ -56,10 +63,183 @@ def complete_lesson(
     else:
         progress.completed = True
 
+    reviews.schedule_lessons(db, user_id, {lesson_id: datetime.utcnow()})
+
     db.commit()
     return {"status": "completed"}
 
 
+@router.post("/heartbeat/{lesson_id}", status_code=202)
+def heartbeat(
+    lesson_id: int,
+    user_id: int,
+    seconds: float = HEARTBEAT_INTERVAL_SECONDS
+):
+    """Called by the lesson view every HEARTBEAT_INTERVAL_SECONDS; buffered, no DB write on the request path."""
+    # A client can't claim more than a couple of intervals per beat
+    seconds = max(0.0, min(seconds, HEARTBEAT_INTERVAL_SECONDS * 2))
+    heartbeat_buffer.add(user_id, lesson_id, seconds)
+    return {"status": "buffered", "next_in": HEARTBEAT_INTERVAL_SECONDS}
+
+MAX_SYNC_EVENTS = 500
+
+@router.post("/sync", response_model=ProgressSyncResponse)
+def sync_progress(
+    user_id: int,
+    req: ProgressSyncRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Apply a batch of start / complete / time_spent events recorded offline.
+    Every event carries a client-generated idempotency key; keys already seen for this user are
+    reported as duplicates and not applied again, so replaying a batch is safe. Everything is
+    written in one transaction with set-based inserts/updates.
+    """
+    if len(req.events) > MAX_SYNC_EVENTS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_SYNC_EVENTS} events per sync")
+
+    # A concurrent replay of the same keys loses the unique-constraint race; the retry then sees them as duplicates
+    for attempt in range(2):
+        try:
+            return _apply_progress_events(db, user_id, req.events)
+        except IntegrityError:
+            db.rollback()
+            if attempt:
+                raise HTTPException(status_code=409, detail="Concurrent sync conflict, please retry")
+
+def _event_time(event: ProgressEventIn, now: datetime) -> datetime:
+    at = event.occurred_at
+    if at is None:
+        return now
+    if at.tzinfo:
+        at = at.astimezone(timezone.utc).replace(tzinfo=None)
+    # A client clock can't log time into a period that hasn't started (e.g. next week's leaderboard)
+    return min(at, now)
+
+def _apply_progress_events(db: Session, user_id: int, events: List[ProgressEventIn]):
+    keys = [e.idempotency_key for e in events]
+    seen = {
+        row.idempotency_key for row in db.query(ProgressEvent.idempotency_key).filter(
+            ProgressEvent.user_id == user_id,
+            ProgressEvent.idempotency_key.in_(keys)
+        )
+    }
+    lesson_ids = {e.lesson_id for e in events}
+    known_lessons = {row.id for row in db.query(Lesson.id).filter(Lesson.id.in_(lesson_ids))}
+
+    results = []
+    accepted = []
+    for event in events:
+        if event.idempotency_key in seen:
+            results.append({"idempotency_key": event.idempotency_key, "status": "duplicate"})
+            continue
+        if event.lesson_id not in known_lessons:
+            results.append({"idempotency_key": event.idempotency_key, "status": "rejected", "detail": "Lesson not found"})
+            continue
+        seen.add(event.idempotency_key)
+        accepted.append(event)
+        results.append({"idempotency_key": event.idempotency_key, "status": "applied"})
+
+    if accepted:
+        now = datetime.utcnow()
+
+        # Final completed flag per lesson, folding events in the order the client sent them
+        final_state = {}
+        completed_at = {}
+        sessions = []
+        for event in accepted:
+            if event.type == ProgressEventType.start:
+                final_state[event.lesson_id] = False
+            elif event.type == ProgressEventType.complete:
+                final_state[event.lesson_id] = True
+                completed_at.setdefault(event.lesson_id, _event_time(event, now))
+            if event.type != ProgressEventType.start:
+                sessions.append({
+                    "user_id": user_id,
+                    "lesson_id": event.lesson_id,
+                    "time_spent": event.time_spent,
+                    "completed": event.type == ProgressEventType.complete,
+                    "created_at": _event_time(event, now)
+                })
+
+        db.execute(insert(ProgressEvent), [
+            {"user_id": user_id, "idempotency_key": e.idempotency_key, "type": e.type.value, "lesson_id": e.lesson_id, "created_at": now}
+            for e in accepted
+        ])
+
+        if sessions:
+            db.execute(insert(LearningSession), sessions)
+            leaderboard.record_sessions(db, sessions)
+
+        if final_state:
+            existing = {
+                row.lesson_id for row in db.query(Progress.lesson_id).filter(
+                    Progress.user_id == user_id,
+                    Progress.lesson_id.in_(final_state.keys())
+                )
+            }
+            new_rows = [
+                {"user_id": user_id, "lesson_id": lesson_id, "completed": completed}
+                for lesson_id, completed in final_state.items() if lesson_id not in existing
+            ]
+            if new_rows:
+                db.execute(insert(Progress), new_rows)
+            for completed in (True, False):
+                to_update = [l for l, c in final_state.items() if c == completed and l in existing]
+                if to_update:
+                    db.query(Progress).filter(
+                        Progress.user_id == user_id,
+                        Progress.lesson_id.in_(to_update)
+                    ).update({"completed": completed}, synchronize_session=False)
+
+        # Reviews count from when the lesson was first completed offline, not from the sync
+        reviews.schedule_lessons(db, user_id, {l: at for l, at in completed_at.items() if final_state.get(l)})
+
+    db.commit()
+
+    return {
+        "applied": len(accepted),
+        "duplicates": sum(1 for r in results if r["status"] == "duplicate"),
+        "rejected": sum(1 for r in results if r["status"] == "rejected"),
+        "results": results
+    }
+
+MAX_DUE_REVIEWS = 100
+
+@router.get("/reviews/due", response_model=DueReviewsOut)
+def get_due_reviews(
+    user_id: int,
+    limit: int = 20,
+    db: Session = Depends(get_db)
+):
+    """Completed lessons due for review now, most overdue first."""
+    now = datetime.utcnow()
+    due = reviews.due_reviews(db, user_id, now, max(1, min(limit, MAX_DUE_REVIEWS)))
+    return {
+        "total_due": reviews.due_count(db, user_id, now),
+        "reviews": [
+            LessonReviewOut.model_validate(review).model_copy(update={"lesson_title": title})
+            for review, title in due
+        ]
+    }
+
+@router.post("/reviews/{lesson_id}", response_model=LessonReviewOut)
+def review_lesson(
+    lesson_id: int,
+    user_id: int,
+    result: ReviewResult,
+    db: Session = Depends(get_db)
+):
+    """Record how well a lesson was recalled (0-5) and reschedule its next review."""
+    review = db.query(LessonReview).filter_by(user_id=user_id, lesson_id=lesson_id).first()
+    if not review:
+        raise HTTPException(status_code=404, detail="Lesson has no review schedule; complete it first")
+
+    reviews.apply_review(review, result.quality)
+    db.commit()
+    db.refresh(review)
+    return LessonReviewOut.model_validate(review).model_copy(update={"lesson_title": review.lesson.title})
+
 @router.get("/overview/{user_id}")
 def get_progress_overview(user_id: int, db: Session = Depends(get_db)):
     # All progress records for this user
@@ -143,6 +323,15 @@ def get_progress_overview(user_id: int, db: Session = Depends(get_db)):
         "currentPath": "Active Goal"
     }
 
+EMPTY_PATH_PROGRESS = {
+    "completedLessons": 0,
+    "totalLessons": 0,
+    "progressPercent": 0,
+    "weeklyStreak": 0,
+    "totalHoursSpent": 0,
+    "milestones": []
+}
+
 @router.get("/path/{path_id}/{user_id}")
 def get_path_progress(
     path_id: int,
@@ -167,15 +356,7 @@ def get_path_progress(
     total_lessons = len(lesson_ids)
 
     if total_lessons == 0:
-        return {
-            "pathId": path_id,
-            "completedLessons": 0,
-            "totalLessons": 0,
-            "progressPercent": 0,
-            "weeklyStreak": 0,
-            "totalHoursSpent": 0,
-            "milestones": []
-        }
+        return {"pathId": path_id, **EMPTY_PATH_PROGRESS}
 
     # Completed lessons
     completed = db.query(Progress).filter(
@@ -201,6 +382,9 @@ def get_path_progress(
 
     weekly_days = len(set(s.created_at.date() for s in weekly_sessions))
 
+    return path_progress_payload(path_id, completed, total_lessons, total_hours, weekly_days)
+
+def path_progress_payload(path_id: int, completed: int, total_lessons: int, total_hours: float, weekly_days: int):
     # Milestones
     milestones = []
     if completed >= 1:
@@ -219,3 +403,85 @@ def get_path_progress(
         "totalHoursSpent": round(total_hours, 2),
         "milestones": milestones
     }
+
+@router.get("/paths/{user_id}")
+def get_paths_progress(
+    user_id: int,
+    path_ids: Optional[List[int]] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Same payload as /path/{path_id}/{user_id} for every path of the user (or the given path_ids),
+    computed with one grouped query per metric regardless of the number of paths.
+    """
+    paths_query = db.query(LearningPath.id)
+    if path_ids:
+        paths_query = paths_query.filter(LearningPath.id.in_(path_ids))
+    else:
+        paths_query = paths_query.filter(LearningPath.creator_id == user_id)
+    ids = [p.id for p in paths_query.order_by(LearningPath.id).all()]
+
+    if not ids:
+        return []
+
+    lessons_per_path = dict(
+        db.query(Module.learning_path_id, func.count(Lesson.id))
+        .join(Lesson, Lesson.module_id == Module.id)
+        .filter(Module.learning_path_id.in_(ids))
+        .group_by(Module.learning_path_id)
+        .all()
+    )
+
+    completed_per_path = dict(
+        db.query(Module.learning_path_id, func.count(Progress.id))
+        .join(Lesson, Lesson.module_id == Module.id)
+        .join(Progress, Progress.lesson_id == Lesson.id)
+        .filter(
+            Module.learning_path_id.in_(ids),
+            Progress.user_id == user_id,
+            Progress.completed == True
+        )
+        .group_by(Module.learning_path_id)
+        .all()
+    )
+
+    hours_per_path = dict(
+        db.query(Module.learning_path_id, func.sum(LearningSession.time_spent))
+        .join(Lesson, Lesson.module_id == Module.id)
+        .join(LearningSession, LearningSession.lesson_id == Lesson.id)
+        .filter(
+            Module.learning_path_id.in_(ids),
+            LearningSession.user_id == user_id
+        )
+        .group_by(Module.learning_path_id)
+        .all()
+    )
+
+    seven_days_ago = datetime.utcnow() - timedelta(days=7)
+    active_days_per_path = dict(
+        db.query(Module.learning_path_id, func.count(func.distinct(func.date(LearningSession.created_at))))
+        .join(Lesson, Lesson.module_id == Module.id)
+        .join(LearningSession, LearningSession.lesson_id == Lesson.id)
+        .filter(
+            Module.learning_path_id.in_(ids),
+            LearningSession.user_id == user_id,
+            LearningSession.created_at >= seven_days_ago
+        )
+        .group_by(Module.learning_path_id)
+        .all()
+    )
+
+    results = []
+    for path_id in ids:
+        total_lessons = lessons_per_path.get(path_id, 0)
+        if total_lessons == 0:
+            results.append({"pathId": path_id, **EMPTY_PATH_PROGRESS})
+            continue
+        results.append(path_progress_payload(
+            path_id,
+            completed_per_path.get(path_id, 0),
+            total_lessons,
+            hours_per_path.get(path_id) or 0,
+            active_days_per_path.get(path_id, 0)
+        ))
+    return results
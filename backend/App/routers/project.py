@@ -2,29 +2,57 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from ..database import get_db
 from ..models import Project, User
-from ..schemas import ProjectCreate, ProjectOut
+from ..schemas import ProjectCreate, ProjectOut, ProjectSummaryOut, ProjectFileOut, ProjectFileWrite, ProjectFileWriteResult
+from ..core.project_files import get_file, write_file, sync_files, split_legacy_files, file_metadata
+from ..core.profiling import ProfiledRoute
 from typing import List
 
-router = APIRouter(prefix="/projects", tags=["Projects"])
+router = APIRouter(prefix="/projects", tags=["Projects"], route_class=ProfiledRoute)
+
+def get_project_or_404(db: Session, project_id: int) -> Project:
+    split_legacy_files(db, [project_id])
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return project
 
 @router.post("/", response_model=ProjectOut)
 def create_project(data: ProjectCreate, user_id: int, db: Session = Depends(get_db)):
-    project = Project(**data.dict(), user_id=user_id)
+    project = Project(**data.dict(exclude={"files"}), user_id=user_id)
     db.add(project)
+    db.flush()
+    sync_files(db, project, data.files or {})
     db.commit()
     db.refresh(project)
     return project
 
-@router.get("/user/{user_id}", response_model=List[ProjectOut])
+@router.get("/user/{user_id}", response_model=List[ProjectSummaryOut])
 def get_user_projects(user_id: int, db: Session = Depends(get_db)):
-    return db.query(Project).filter(Project.user_id == user_id).all()
+    # File list only (path, size, hash); contents are fetched per file or with the single project
+    projects = db.query(Project).filter(Project.user_id == user_id).all()
+    ids = [p.id for p in projects]
+    if split_legacy_files(db, ids):
+        projects = db.query(Project).filter(Project.user_id == user_id).all()
+    files = file_metadata(db, ids)
+    return [
+        ProjectSummaryOut(
+            id=p.id,
+            title=p.title,
+            description=p.description,
+            status=p.status,
+            difficulty=p.difficulty,
+            start_date=p.start_date,
+            estimated_hours=p.estimated_hours,
+            technologies=p.technologies,
+            files=files[p.id],
+            user_id=p.user_id
+        )
+        for p in projects
+    ]
 
 @router.get("/{project_id}", response_model=ProjectOut)
 def get_project(project_id: int, db: Session = Depends(get_db)):
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    return project
+    return get_project_or_404(db, project_id)
 
 @router.put("/{project_id}/status")
 def update_project_status(project_id: int, status: str, db: Session = Depends(get_db)):
@@ -46,14 +74,42 @@ def delete_project(project_id: int, db: Session = Depends(get_db)):
 
 @router.put("/{project_id}", response_model=ProjectOut)
 def update_project(project_id: int, data: ProjectCreate, db: Session = Depends(get_db)):
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    
+    project = get_project_or_404(db, project_id)
+
     # Update all fields provided in the request
-    for key, value in data.dict().items():
+    for key, value in data.dict(exclude={"files"}).items():
         setattr(project, key, value)
-    
+    # Files whose hash is unchanged are not rewritten; omitting `files` leaves them alone
+    if data.files is not None:
+        sync_files(db, project, data.files)
+
     db.commit()
     db.refresh(project)
     return project
+
+@router.get("/{project_id}/files/{path:path}", response_model=ProjectFileOut)
+def get_project_file(project_id: int, path: str, db: Session = Depends(get_db)):
+    split_legacy_files(db, [project_id])
+    file = get_file(db, project_id, path, with_content=True)
+    if not file:
+        raise HTTPException(status_code=404, detail="File not found")
+    return file
+
+@router.put("/{project_id}/files/{path:path}", response_model=ProjectFileWriteResult)
+def put_project_file(project_id: int, path: str, data: ProjectFileWrite, db: Session = Depends(get_db)):
+    project = get_project_or_404(db, project_id)
+    file, changed = write_file(db, project.id, path, data.content)
+    if changed:
+        db.commit()
+        db.refresh(file)
+    return ProjectFileWriteResult(path=file.path, size=file.size, hash=file.hash, updated_at=file.updated_at, changed=changed)
+
+@router.delete("/{project_id}/files/{path:path}")
+def delete_project_file(project_id: int, path: str, db: Session = Depends(get_db)):
+    split_legacy_files(db, [project_id])
+    file = get_file(db, project_id, path)
+    if not file:
+        raise HTTPException(status_code=404, detail="File not found")
+    db.delete(file)
+    db.commit()
+    return {"message": "Deleted"}
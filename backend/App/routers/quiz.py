@@ -0,0 +1,61 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from ..database import get_db
+from .. import models, schemas
+from ..core.profiling import ProfiledRoute
+from typing import List
+
+router = APIRouter(prefix="/quizzes", tags=["Quizzes"], route_class=ProfiledRoute)
+
+@router.post("/attempts", response_model=schemas.QuizAttemptResult)
+def submit_quiz_attempt(req: schemas.QuizAttemptCreate, db: Session = Depends(get_db)):
+    """Score answers against the question bank and record the attempt."""
+    if not req.answers:
+        raise HTTPException(status_code=400, detail="No answers submitted")
+
+    ids = {a.question_id for a in req.answers}
+    if len(ids) != len(req.answers):
+        raise HTTPException(status_code=400, detail="Each question can only be answered once")
+    questions = {q.id: q for q in db.query(models.BankQuestion).filter(models.BankQuestion.id.in_(ids))}
+    missing = ids - questions.keys()
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Unknown questions: {sorted(missing)}")
+
+    # An attempt is one quiz: every question from the same bank and difficulty
+    first = questions[req.answers[0].question_id]
+    if any((q.bank_key, q.difficulty) != (first.bank_key, first.difficulty) for q in questions.values()):
+        raise HTTPException(status_code=400, detail="All answers must be to questions from the same quiz")
+    bank = db.get(models.QuizBank, (first.bank_key, first.difficulty))
+
+    results = []
+    for answer in req.answers:
+        question = questions[answer.question_id]
+        results.append({
+            "question_id": question.id,
+            "selected_index": answer.selected_index,
+            "correct_index": question.correct_index,
+            "correct": answer.selected_index == question.correct_index,
+            "explanation": question.explanation
+        })
+
+    attempt = models.QuizAttempt(
+        user_id=req.user_id,
+        # Lesson quizzes come from the lesson's bank; only topic quizzes rely on what the client says
+        lesson_id=bank.lesson_id if bank is not None and bank.lesson_id is not None else req.lesson_id,
+        bank_key=first.bank_key,
+        difficulty=first.difficulty,
+        score=sum(r["correct"] for r in results),
+        total=len(results),
+        answers=[{k: r[k] for k in ("question_id", "selected_index", "correct")} for r in results]
+    )
+    db.add(attempt)
+    db.commit()
+    db.refresh(attempt)
+    return {**schemas.QuizAttemptOut.model_validate(attempt).model_dump(), "results": results}
+
+@router.get("/attempts", response_model=List[schemas.QuizAttemptOut])
+def list_quiz_attempts(user_id: int, lesson_id: int = None, limit: int = 20, offset: int = 0, db: Session = Depends(get_db)):
+    query = db.query(models.QuizAttempt).filter(models.QuizAttempt.user_id == user_id)
+    if lesson_id is not None:
+        query = query.filter(models.QuizAttempt.lesson_id == lesson_id)
+    return query.order_by(models.QuizAttempt.created_at.desc(), models.QuizAttempt.id.desc()).offset(offset).limit(limit).all()
@@ -5,8 +5,9 @@ from sqlalchemy.exc import IntegrityError
 from ..models import User
 from .. import schemas
 from ..core.security import hash_password
+from ..core.profiling import ProfiledRoute
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 @router.post("/register")
 def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
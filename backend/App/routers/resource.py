@@ -2,14 +2,25 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from ..database import get_db
 from ..models import Resource, Lesson, Module, LearningPath # Import hierarchy
-from ..schemas import ResourceCreate, ResourceOut
-from ..core.auth import get_current_user # Import auth dependency
+from ..schemas import ResourceCreate, ResourceOut, ResourceImportRequest, ResourceImportResult
+from ..core.auth import get_current_user, require_admin # Import auth dependency
+from ..core.search import index_documents, resource_document
+from ..core.versioned_cache import VersionedCache, bump_version
 from .. import models
+from ..core.profiling import ProfiledRoute
 from typing import List
-from sqlalchemy import func
 import json
+import os
 
-router = APIRouter(prefix="/resources", tags=["Resources"])
+router = APIRouter(prefix="/resources", tags=["Resources"], route_class=ProfiledRoute)
+
+MAX_RESOURCE_IMPORT = int(os.getenv("MAX_RESOURCE_IMPORT", "5000"))
+
+# The manual library is global and rarely changes: keep it in memory until an import bumps its version
+library_cache = VersionedCache(
+    "resource-library",
+    lambda db: tuple(ResourceOut.model_validate(r) for r in db.query(Resource).order_by(Resource.id))
+)
 
 @router.get("/", response_model=List[ResourceOut])
 def get_all_resources(
@@ -17,7 +28,7 @@ def get_all_resources(
     current_user: models.User = Depends(get_current_user) # Add Auth here
 ):
     # 1. Get manual resources (Global library for everyone)
-    manual_resources = db.query(Resource).all()
+    manual_resources = list(library_cache.get(db))
     
     # 2. Get AI resources ONLY from Lessons belonging to this user's paths
     lessons = (
@@ -26,7 +37,7 @@ def get_all_resources(
         .join(LearningPath, Module.learning_path_id == LearningPath.id)
         .filter(
             LearningPath.creator_id == current_user.id, # Filter by current user
-            Lesson.ai_resources.isnot(None)
+            Lesson.body_hash.isnot(None) | Lesson._ai_resources.isnot(None)
         )
         .all()
     )
@@ -66,7 +77,8 @@ def get_all_resources(
                 ai_res = ResourceOut(
                     id=current_id,
                     title=title,
-                    description=f"{res.get('duration', '')} • From Lesson: {lesson.title}",
+                    # Packages stored before nulls were dropped carry "duration": null
+                    description=f"{res.get('duration') or ''} • From Lesson: {lesson.title}",
                     type=res.get("type", "AI Generated"),
                     category=category,
                     url=final_url,
@@ -88,12 +100,9 @@ def get_resource_stats(
     """Returns counts of resources per category specific to the user"""
     
     # Global counts
-    stats = db.query(
-        Resource.category, 
-        func.count(Resource.id).label('count')
-    ).group_by(Resource.category).all()
-    
-    stats_dict = {category: count for category, count in stats}
+    stats_dict = {}
+    for resource in library_cache.get(db):
+        stats_dict[resource.category] = stats_dict.get(resource.category, 0) + 1
     
     # User-specific AI counts
     lessons = (
@@ -102,7 +111,7 @@ def get_resource_stats(
         .join(LearningPath, Module.learning_path_id == LearningPath.id)
         .filter(
             LearningPath.creator_id == current_user.id,
-            Lesson.ai_resources.isnot(None)
+            Lesson.body_hash.isnot(None) | Lesson._ai_resources.isnot(None)
         )
         .all()
     )
@@ -120,4 +129,39 @@ def get_resource_stats(
         except:
             continue
             
-    return stats_dict
\ No newline at end of file
+    return stats_dict
+
+@router.post("/bulk", response_model=ResourceImportResult)
+def import_resources(
+    req: ResourceImportRequest,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_admin)
+):
+    """Add many resources to the global library in one transaction. URLs already in the library are skipped."""
+    if len(req.resources) > MAX_RESOURCE_IMPORT:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_RESOURCE_IMPORT} resources per import")
+
+    urls = {r.url for r in req.resources}
+    seen = {url for (url,) in db.query(Resource.url).filter(Resource.url.in_(urls))} if urls else set()
+    new_resources = []
+    for item in req.resources:
+        if item.url in seen:
+            continue
+        seen.add(item.url)
+        new_resources.append(Resource(**item.dict()))
+
+    if new_resources:
+        db.add_all(new_resources)
+        db.flush()  # one batched INSERT; assigns ids for the search index
+        index_documents(db, [resource_document(r) for r in new_resources])
+        version = bump_version(db, library_cache.name)
+        db.commit()
+        library_cache.invalidate()
+    else:
+        version = None
+
+    return ResourceImportResult(
+        imported=len(new_resources),
+        skipped=len(req.resources) - len(new_resources),
+        version=version
+    )
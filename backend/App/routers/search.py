@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from ..database import get_db
+from ..core.search import search, search_available
+from ..core.profiling import ProfiledRoute
+from typing import Optional
+
+router = APIRouter(prefix="/search", tags=["Search"], route_class=ProfiledRoute)
+
+@router.get("/")
+def search_content(
+    q: str,
+    user_id: int,
+    kind: Optional[str] = Query(None, pattern="^(lesson|resource)$"),
+    limit: int = Query(20, ge=1, le=50),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """Ranked full-text search over the user's lessons and the global resource library."""
+    if not search_available():
+        raise HTTPException(status_code=503, detail="Search is not available on this database")
+
+    # Fetch one extra row to know whether there is a next page
+    results = search(db, q, user_id, kind=kind, limit=limit + 1, offset=offset)
+    has_more = len(results) > limit
+
+    return {
+        "query": q,
+        "results": results[:limit],
+        "next_offset": offset + limit if has_more else None
+    }
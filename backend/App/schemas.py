@@ -1,7 +1,9 @@
-from pydantic import BaseModel, EmailStr, ConfigDict
+from pydantic import BaseModel, EmailStr, ConfigDict, Field
 from enum import Enum
-from typing import Optional, List, Dict
-from datetime import datetime
+from typing import Any, Optional, List, Dict
+from datetime import date, datetime
+from .core.leaderboard import MAX_SESSION_HOURS
+from .core.quiz_bank import QUIZ_MAX_QUESTIONS
 
 class RoleEnum(str, Enum):
     student = "Student"
@@ -131,6 +133,35 @@ class ProjectOut(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+class ProjectFileMeta(BaseModel):
+    path: str
+    size: int
+    hash: str
+    updated_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class ProjectFileOut(ProjectFileMeta):
+    content: Optional[str] = None
+
+class ProjectFileWrite(BaseModel):
+    content: str
+
+class ProjectFileWriteResult(ProjectFileMeta):
+    changed: bool
+
+class ProjectSummaryOut(BaseModel):
+    id: int
+    title: str
+    description: str
+    status: str
+    difficulty: str
+    start_date: datetime
+    estimated_hours: str
+    technologies: str
+    files: List[ProjectFileMeta] = []
+    user_id: int
+
 class ResourceCreate(BaseModel):
     title: str
     description: str
@@ -150,35 +181,128 @@ class ResourceOut(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+class ImportJobOut(BaseModel):
+    id: int
+    status: str
+    lines_done: int
+    paths: int
+    modules: int
+    lessons: int
+    error: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class ResourceImportRequest(BaseModel):
+    resources: List[ResourceCreate]
+
+class ResourceImportResult(BaseModel):
+    imported: int
+    skipped: int
+    version: Optional[int] = None  # library cache version after the import; None when nothing changed
+
 class ProgressCreate(BaseModel):
     lesson_id: int
     completed: bool
 
+class ProgressEventType(str, Enum):
+    start = "start"
+    complete = "complete"
+    time_spent = "time_spent"
+
+class ProgressEventIn(BaseModel):
+    idempotency_key: str
+    type: ProgressEventType
+    lesson_id: int
+    time_spent: float = Field(0.0, ge=0, le=MAX_SESSION_HOURS)  # hours
+    occurred_at: Optional[datetime] = None  # clamped to the sync time
+
+class ProgressSyncRequest(BaseModel):
+    events: List[ProgressEventIn]
+
+class ProgressEventResult(BaseModel):
+    idempotency_key: str
+    status: str  # applied / duplicate / rejected
+    detail: Optional[str] = None
+
+class ProgressSyncResponse(BaseModel):
+    applied: int
+    duplicates: int
+    rejected: int
+    results: List[ProgressEventResult]
+
+class ReviewResult(BaseModel):
+    quality: int = Field(ge=0, le=5)  # 0 (blackout) .. 5 (perfect recall)
+
+class LessonReviewOut(BaseModel):
+    lesson_id: int
+    lesson_title: Optional[str] = None
+    repetitions: int
+    interval_days: int
+    ease_factor: float
+    next_due: datetime
+    last_quality: Optional[int] = None
+    last_reviewed_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class DueReviewsOut(BaseModel):
+    total_due: int
+    reviews: List[LessonReviewOut]
+
 class PathGenerationRequest(BaseModel):
     topic: str
     difficulty: str
     weeks: int
     hours_per_week: int
     user_id: int
+    allow_reuse: bool = True  # False forces a fresh generation instead of cloning a similar path
 
 class LessonContentRequest(BaseModel):
     lesson_id: int
 
+class BulkLessonContentRequest(BaseModel):
+    path_id: Optional[int] = None
+    module_id: Optional[int] = None
+    concurrency: Optional[int] = None
+
 class ChatMessage(BaseModel):
     text: str
     isUser: bool
 
 class ChatRequest(BaseModel):
     message: str
-    history: List[ChatMessage] = []
+    conversation_id: Optional[int] = None
+    history: List[ChatMessage] = []  # Only used to seed a new conversation
 
 class ChatResponse(BaseModel):
     reply: str
+    conversation_id: Optional[int] = None
+
+class ConversationOut(BaseModel):
+    id: int
+    user_id: Optional[int] = None
+    title: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class ConversationMessageOut(BaseModel):
+    id: int
+    text: str
+    isUser: bool
+    created_at: Optional[datetime] = None
+
+class ConversationMessagesPage(BaseModel):
+    conversation_id: int
+    messages: List[ConversationMessageOut]
+    next_before: Optional[int] = None
 
 class QuizRequest(BaseModel):
-    topic: str
+    topic: Optional[str] = None
     difficulty: str
-    question_count: int = 5
+    question_count: int = Field(5, ge=1, le=QUIZ_MAX_QUESTIONS)
+    lesson_id: Optional[int] = None  # quiz on a lesson; topic defaults to its title
 
 class QuizQuestion(BaseModel):
     id: int
@@ -190,3 +314,55 @@ class QuizQuestion(BaseModel):
 class QuizResponse(BaseModel):
     title: str
     questions: List[QuizQuestion]
+
+class QuizAnswer(BaseModel):
+    question_id: int
+    selected_index: int
+
+class QuizAttemptCreate(BaseModel):
+    user_id: int
+    lesson_id: Optional[int] = None
+    answers: List[QuizAnswer]
+
+class QuizAnswerResult(BaseModel):
+    question_id: int
+    selected_index: int
+    correct_index: int
+    correct: bool
+    explanation: Optional[str] = None
+
+class QuizAttemptOut(BaseModel):
+    id: int
+    lesson_id: Optional[int] = None
+    difficulty: Optional[str] = None
+    score: int
+    total: int
+    created_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class QuizAttemptResult(QuizAttemptOut):
+    results: List[QuizAnswerResult]
+
+class DashboardOut(BaseModel):
+    # Sections that weren't requested are null
+    profile: Optional[UserProfile] = None
+    paths: Optional[List[LearningPathOut]] = None
+    overview: Optional[Dict[str, Any]] = None
+    path_progress: Optional[List[Dict[str, Any]]] = None
+    resource_stats: Optional[Dict[str, int]] = None
+    errors: Dict[str, str] = {}
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: int
+    full_name: Optional[str] = None
+    hours: float
+    lessons_completed: int
+
+class LeaderboardOut(BaseModel):
+    window: str
+    period_start: date
+    cohort: Optional[str] = None  # null for the global board
+    entries: List[LeaderboardEntry]
+    me: Optional[LeaderboardEntry] = None  # null when the user has no time in this window
@@ -0,0 +1,113 @@
+"""
+Leaderboard reads from the leaderboard_rollups indexes vs aggregating learning_sessions on the fly.
+
+    cd backend && python -m benchmarks.bench_leaderboard --users 20000 --sessions 200000
+
+Fills a scratch SQLite database with random users and sessions from the last few weeks, writing
+the rollups through core/leaderboard.py as the app does, then times the global and cohort top-10
+and one user's rank both ways.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func, insert
+from sqlalchemy.orm import Session
+
+from App import models
+from App.core import leaderboard
+from App.database import Base
+
+GOALS = ["Frontend Developer", "Data Scientist", "Backend Developer", "ML Engineer", "DevOps Engineer"]
+
+
+def populate(db, users: int, sessions: int, rng: random.Random):
+    db.execute(insert(models.User), [
+        {"id": i, "full_name": f"User {i}", "email": f"user{i}@example.com", "phone": str(i),
+         "role": "Student", "hashed_password": "x", "career_goal": rng.choice(GOALS)}
+        for i in range(1, users + 1)
+    ])
+    now = datetime.utcnow()
+    batch = []
+    for n in range(sessions):
+        batch.append({"user_id": rng.randint(1, users), "lesson_id": None, "time_spent": rng.uniform(0.1, 3),
+                      "completed": rng.random() < 0.5, "created_at": now - timedelta(hours=rng.uniform(0, 24 * 60))})
+        if len(batch) == 5000 or n == sessions - 1:
+            db.execute(insert(models.LearningSession), batch)
+            leaderboard.record_sessions(db, batch)
+            batch = []
+    db.commit()
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def scan_top(db, since, cohort=None, limit=10):
+    query = db.query(models.LearningSession.user_id, func.sum(models.LearningSession.time_spent).label("hours")) \
+        .filter(models.LearningSession.created_at >= since)
+    if cohort:
+        query = query.join(models.User, models.User.id == models.LearningSession.user_id) \
+            .filter(func.lower(models.User.career_goal) == cohort)
+    return query.group_by(models.LearningSession.user_id).order_by(func.sum(models.LearningSession.time_spent).desc()) \
+        .limit(limit).all()
+
+
+def scan_rank(db, user_id, since):
+    totals = db.query(func.sum(models.LearningSession.time_spent).label("hours")) \
+        .filter(models.LearningSession.created_at >= since).group_by(models.LearningSession.user_id).subquery()
+    mine = db.query(func.sum(models.LearningSession.time_spent)) \
+        .filter(models.LearningSession.user_id == user_id, models.LearningSession.created_at >= since).scalar() or 0
+    return 1 + db.query(func.count()).select_from(totals).filter(totals.c.hours > mine).scalar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--sessions", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    rng = random.Random(1)
+    try:
+        with Session(engine) as db:
+            start = time.perf_counter()
+            populate(db, args.users, args.sessions, rng)
+            print(f"{args.users} users, {args.sessions} sessions written with rollups in "
+                  f"{time.perf_counter() - start:.1f}s ({db.query(models.LeaderboardRollup).count()} rollup rows)")
+
+            today = datetime.utcnow().date()
+            week = leaderboard.period_start("week", today)
+            since = datetime.combine(week, datetime.min.time())
+            cohort = leaderboard.normalize_cohort(GOALS[0])
+            user_id = rng.randint(1, args.users)
+            cases = [
+                ("week top-10", lambda: leaderboard.top(db, "week", week), lambda: scan_top(db, since)),
+                ("cohort top-10", lambda: leaderboard.top(db, "week", week, cohort),
+                 lambda: scan_top(db, since, cohort)),
+                ("my rank", lambda: leaderboard.rank_of(db, user_id, "week", week),
+                 lambda: scan_rank(db, user_id, since)),
+            ]
+            print(f"{'':>14} {'rollups ms':>11} {'scan ms':>9}")
+            for name, rollup, scan in cases:
+                print(f"{name:>14} {timed(rollup, args.repeat):>11.3f} {timed(scan, args.repeat):>9.1f}")
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
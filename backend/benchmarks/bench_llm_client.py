@@ -0,0 +1,76 @@
+"""
+Tail latency and failure rate of model calls, raw SDK vs LLMClient (App/core/llm.py).
+
+    cd backend && python -m benchmarks.bench_llm_client --calls 200 --concurrency 8 --slow-rate 0.02 --error-rate 0.1
+
+Runs the same load against benchmarks.fake_openai three ways: the bare SDK with its retries off,
+LLMClient with retries, and LLMClient with retries plus hedging. Retries should take the failure
+rate towards zero; hedging should cut p99 when a few percent of calls hit the slow tail.
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from openai import OpenAI
+
+from App.core.llm import LLMClient, LatencyStats
+from benchmarks.fake_openai import serve
+
+MESSAGES = [{"role": "user", "content": "ping"}]
+
+
+def one_call(client, model: str):
+    start = time.perf_counter()
+    try:
+        client.chat.completions.create(model=model, messages=MESSAGES)
+        return time.perf_counter() - start, True
+    except Exception:
+        return time.perf_counter() - start, False
+
+
+def run(client, calls: int, concurrency: int, model: str = "gpt-4o-mini") -> dict:
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(lambda _: one_call(client, model), range(calls)))
+    latencies = sorted(t for t, ok in results if ok)
+
+    def pct(q):
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000) if latencies else None
+
+    return {
+        "failure_rate": round(sum(not ok for _, ok in results) / calls, 3),
+        "p50_ms": pct(0.5), "p95_ms": pct(0.95), "p99_ms": pct(0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--slow-rate", type=float, default=0.02)
+    parser.add_argument("--slow-seconds", type=float, default=2.0)
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    parser.add_argument("--timeout", type=float, default=10)
+    args = parser.parse_args()
+
+    server = serve(latency=args.latency, slow_rate=args.slow_rate, slow_seconds=args.slow_seconds,
+                   error_rate=args.error_rate, seed=1)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    sdk = OpenAI(api_key="fake", base_url=base_url, max_retries=0, timeout=args.timeout)
+
+    print(f"{args.calls} calls x{args.concurrency}, latency {args.latency}s, "
+          f"{args.slow_rate:.0%} slow ({args.slow_seconds}s), {args.error_rate:.0%} errors")
+    variants = [
+        ("raw SDK", sdk),
+        ("retries", LLMClient(sdk, timeout=args.timeout, hedge=False, stats=LatencyStats())),
+        ("retries+hedge", LLMClient(sdk, timeout=args.timeout, hedge=True, stats=LatencyStats())),
+    ]
+    for name, client in variants:
+        r = run(client, args.calls, args.concurrency)
+        print(f"{name:>14}: failures {r['failure_rate']:.1%} | p50 {r['p50_ms']} ms "
+              f"p95 {r['p95_ms']} ms p99 {r['p99_ms']} ms")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
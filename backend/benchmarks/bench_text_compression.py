@@ -0,0 +1,107 @@
+"""
+DB size and read latency of lesson text stored as plain Text vs CompressedText.
+
+    cd backend && python -m benchmarks.bench_text_compression --lessons 2000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import Column, Integer, Text, create_engine, select
+from sqlalchemy.orm import declarative_base, Session
+
+from App.core.compression import CompressedText, TEXT_COMPRESSION
+
+WORDS = (
+    "function component state props hook render effect dependency array callback promise async await "
+    "request response database query index transaction schema migration module import export class "
+    "object method variable closure scope runtime compiler type interface generic error exception test"
+).split()
+
+
+def lesson_markdown(rng: random.Random, words: int = 1000) -> str:
+    """Roughly the shape of a generated lesson: headings, prose and code blocks."""
+    parts = []
+    written = 0
+    section = 1
+    while written < words:
+        parts.append(f"## {section}. {' '.join(rng.choices(WORDS, k=3)).title()}\n")
+        sentence_count = rng.randint(4, 8)
+        for _ in range(sentence_count):
+            n = rng.randint(8, 20)
+            parts.append(" ".join(rng.choices(WORDS, k=n)).capitalize() + ".")
+            written += n
+        parts.append("\n```js\nconst " + rng.choice(WORDS) + " = (" + rng.choice(WORDS) + ") => {\n  return "
+                     + rng.choice(WORDS) + ";\n};\n```\n")
+        section += 1
+    return "\n".join(parts)
+
+
+def run(column_type, rows, reads):
+    Base = declarative_base()
+
+    class Lesson(Base):
+        __tablename__ = "lessons"
+        id = Column(Integer, primary_key=True)
+        content = Column(column_type)
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+
+    with Session(engine) as db:
+        db.add_all(Lesson(id=i + 1, content=text) for i, text in enumerate(rows))
+        db.commit()
+    engine.dispose()
+    size = os.path.getsize(path)
+
+    engine = create_engine(f"sqlite:///{path}")
+    rng = random.Random(1)
+    single = []
+    with Session(engine) as db:
+        for _ in range(reads):
+            lesson_id = rng.randint(1, len(rows))
+            start = time.perf_counter()
+            db.execute(select(Lesson.content).where(Lesson.id == lesson_id)).scalar()
+            single.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        db.execute(select(Lesson.content)).scalars().all()
+        scan_ms = (time.perf_counter() - start) * 1000
+    engine.dispose()
+    os.remove(path)
+
+    single.sort()
+    return {
+        "db_bytes": size,
+        "read_p50_ms": round(statistics.median(single), 4),
+        "read_p95_ms": round(single[int(len(single) * 0.95) - 1], 4),
+        "full_scan_ms": round(scan_ms, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lessons", type=int, default=2000)
+    parser.add_argument("--reads", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    rows = [lesson_markdown(rng) for _ in range(args.lessons)]
+    raw = sum(len(r.encode("utf-8")) for r in rows)
+    print(f"{args.lessons} lessons, {raw / 1e6:.1f} MB of markdown, codec={TEXT_COMPRESSION}")
+
+    results = {"plain Text": run(Text, rows, args.reads), "CompressedText": run(CompressedText, rows, args.reads)}
+    for name, r in results.items():
+        print(f"{name:>15}: db {r['db_bytes'] / 1e6:7.2f} MB | point read p50 {r['read_p50_ms']} ms "
+              f"p95 {r['read_p95_ms']} ms | full scan {r['full_scan_ms']} ms")
+    ratio = results["plain Text"]["db_bytes"] / results["CompressedText"]["db_bytes"]
+    print(f"size reduction: {ratio:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Throughput of the gunicorn deployment (gunicorn.conf.py) by worker count.
+
+    cd backend && python -m benchmarks.bench_workers --workers 1 2 4 --clients 16 --seconds 10
+
+Serves a seeded SQLite database and hammers GET /learning-paths/{id} (DB reads plus nested
+response serialisation, i.e. mostly CPU in the worker) from separate client processes.
+Scaling tops out at the number of cores on the machine.
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def seed(db_path: str, modules: int = 8, lessons: int = 6):
+    code = f"""
+import os
+os.environ["DATABASE_URL"] = "sqlite:///{db_path}"
+from App.database import SessionLocal, engine
+from App.migrations import prepare_database
+from App import models
+prepare_database(engine)
+db = SessionLocal()
+user = models.User(full_name="Bench", email="bench@example.com", hashed_password="x")
+db.add(user); db.flush()
+path = models.LearningPath(title="Bench path", description="d", difficulty="Beginner", creator_id=user.id)
+db.add(path); db.flush()
+for m in range({modules}):
+    module = models.Module(title=f"Week {{m}}", order=m, learning_path_id=path.id)
+    db.add(module); db.flush()
+    for l in range({lessons}):
+        db.add(models.Lesson(title=f"Lesson {{m}}.{{l}}", difficulty="Beginner", estimated_time="1 hour", content="## Notes\\n" * 40, module_id=module.id))
+db.commit()
+print(user.id, path.id)
+"""
+    out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND, capture_output=True, text=True, check=True)
+    user_id, path_id = out.stdout.strip().splitlines()[-1].split()
+    return int(user_id), int(path_id)
+
+
+def wait_until_up(port: int, timeout: float = 30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def client(args):
+    port, url, seconds = args
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    done = errors = 0
+    latencies = []
+    end = time.time() + seconds
+    while time.time() < end:
+        start = time.perf_counter()
+        try:
+            conn.request("GET", url)
+            response = conn.getresponse()
+            response.read()
+            if response.status == 200:
+                done += 1
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+        except OSError:
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    return done, errors, latencies
+
+
+def run(workers: int, clients: int, seconds: float, db_path: str, url: str, port: int) -> dict:
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "WEB_CONCURRENCY": str(workers),
+        "GUNICORN_BIND": f"127.0.0.1:{port}",
+        "GUNICORN_ACCESS_LOG": "",
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "App.main:app"],
+        cwd=BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_up(port)
+        with multiprocessing.Pool(clients) as pool:
+            results = pool.map(client, [(port, url, seconds)] * clients)
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+    done = sum(r[0] for r in results)
+    latencies = sorted(l for r in results for l in r[2])
+    return {
+        "rps": round(done / seconds, 1),
+        "errors": sum(r[1] for r in results),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    os.remove(db_path)
+    try:
+        user_id, path_id = seed(db_path)
+        url = f"/learning-paths/{path_id}?user_id={user_id}"
+        print(f"{os.cpu_count()} CPUs, {args.clients} clients, {args.seconds}s per run, GET {url}")
+        baseline = None
+        for workers in args.workers:
+            r = run(workers, args.clients, args.seconds, db_path, url, args.port)
+            baseline = baseline or r["rps"]
+            print(f"{workers:>2} workers: {r['rps']:8.1f} req/s ({r['rps'] / baseline if baseline else 0:.2f}x) | "
+                  f"p50 {r['p50_ms']} ms p95 {r['p95_ms']} ms | errors {r['errors']}")
+    finally:
+        for suffix in ("", ".lock"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+
+if __name__ == "__main__":
+    main()
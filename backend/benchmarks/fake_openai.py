@@ -0,0 +1,150 @@
+"""
+Local stand-in for the OpenAI chat completions API with injectable latency and errors.
+
+    cd backend && python -m benchmarks.fake_openai --port 8099 --slow-rate 0.05 --slow-seconds 3 --error-rate 0.1
+
+Point the SDK at it with OPENAI_BASE_URL=http://127.0.0.1:8099/v1 (any OPENAI_API_KEY works).
+Every request takes --latency seconds; a --slow-rate fraction takes --slow-seconds instead (the
+tail), and an --error-rate fraction fails with one of --error-codes (429s carry Retry-After: 0).
+Replies are shaped after the prompt (path, module, lesson package, quiz, or plain chat text), so
+the app's output validation passes; streaming requests get the same reply as SSE chunks.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FAKE_WEEKS = 4
+FAKE_LESSONS_PER_WEEK = 3
+
+
+def _lesson(week: int, n: int) -> dict:
+    return {"title": f"Lesson {week}.{n}", "content": "Objectives and topics", "estimated_time": "2 hours",
+            "difficulty": "Beginner"}
+
+
+def _module(week: int) -> dict:
+    return {"title": f"Week {week}: Topic", "order": week,
+            "lessons": [_lesson(week, n) for n in range(1, FAKE_LESSONS_PER_WEEK + 1)]}
+
+
+def reply_for(messages: list) -> str:
+    prompt = messages[-1].get("content", "") if messages else ""
+    if "Write module" in prompt:
+        return json.dumps(_module(1))
+    if "learning path" in prompt:
+        return json.dumps({"title": "Fake path", "description": "Generated by the fake server",
+                           "difficulty": "Beginner", "modules": [_module(w) for w in range(1, FAKE_WEEKS + 1)]})
+    if "learning package" in prompt or "exactly these fields" in prompt:
+        return json.dumps({"content": "# Study guide\n\n" + "Some notes. " * 200,
+                           "why_it_matters": "It is used everywhere.", "what_you_learn": ["One", "Two", "Three"],
+                           "resources": [{"title": "Docs", "type": "article", "url": "https://example.com"}]})
+    if "quiz" in prompt.lower():
+        return json.dumps({"title": "Fake quiz", "questions": [
+            {"question": f"Question {random.random()}?", "options": ["A", "B", "C", "D"], "correct_index": 1,
+             "explanation": "Because."} for _ in range(10)]})
+    return "This is a reply from the fake model."
+
+
+class FakeOpenAI(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.05, slow_rate=0.0, slow_seconds=2.0, error_rate=0.0,
+                 error_codes=(429, 500, 503), seed=None):
+        super().__init__(address, Handler)
+        self.latency = latency
+        self.slow_rate = slow_rate
+        self.slow_seconds = slow_seconds
+        self.error_rate = error_rate
+        self.error_codes = tuple(error_codes)
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {"requests": 0, "errors": 0, "slow": 0}
+
+    def plan(self):
+        """(delay, error status or None) for the next request."""
+        with self.lock:
+            self.counts["requests"] += 1
+            slow = self.random.random() < self.slow_rate
+            error = self.random.choice(self.error_codes) if self.random.random() < self.error_rate else None
+            self.counts["slow"] += slow
+            self.counts["errors"] += error is not None
+        return (self.slow_seconds if slow else self.latency), error
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("content-length", 0))) or b"{}")
+        delay, error = self.server.plan()
+        time.sleep(delay)
+        if error:
+            return self._json(error, {"error": {"message": f"injected {error}", "type": "fake", "code": None}},
+                              {"retry-after": "0"} if error == 429 else {})
+        model = body.get("model", "fake")
+        content = reply_for(body.get("messages", []))
+        if body.get("stream"):
+            return self._stream(model, content)
+        self._json(200, {
+            "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()), "model": model,
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        })
+
+    def _json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, model, content):
+        self.send_response(200)
+        self.send_header("content-type", "text/event-stream")
+        self.send_header("connection", "close")
+        self.end_headers()
+        for piece in [content[i:i + 16] for i in range(0, len(content), 16)]:
+            chunk = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": model, "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+
+def serve(port=0, **options) -> FakeOpenAI:
+    """Start a server on a background thread; `server.server_address[1]` is the port."""
+    server = FakeOpenAI(("127.0.0.1", port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--slow-seconds", type=float, default=2.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-codes", type=int, nargs="+", default=[429, 500, 503])
+    args = parser.parse_args()
+    server = FakeOpenAI(("127.0.0.1", args.port), latency=args.latency, slow_rate=args.slow_rate,
+                        slow_seconds=args.slow_seconds, error_rate=args.error_rate, error_codes=args.error_codes)
+    print(f"Fake OpenAI on http://127.0.0.1:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Concurrent end-to-end user journeys against the whole app, with a JSON report to compare across commits.
+
+    cd backend && python -m benchmarks.load_journeys --users 50 --concurrency 10 --think-time 0.5 \\
+        --report load-report.json --compare load-report-main.json
+
+Each simulated user registers, logs in, sets up their profile and completes onboarding (which
+generates a learning path), loads their paths and one path, starts and completes a few lessons,
+then fetches the progress overview and the resource library and sends a chat message. Users
+think for a random 0..2x --think-time seconds between steps. A failed step ends that journey.
+
+By default the app is started under gunicorn (gunicorn.conf.py) on a fresh SQLite database with
+benchmarks.fake_openai standing in for the model API (tune it with the --llm-* options). Pass
+--url to drive an already running server instead; it then needs its own OPENAI_BASE_URL.
+
+The report has per-step request counts, throughput, p50/p95/p99 latency and error rates, plus
+error counts by step and status; --compare prints the p95 and error-rate deltas against an
+earlier report.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from benchmarks.bench_workers import BACKEND, wait_until_up
+from benchmarks.fake_openai import serve
+
+STEPS = (
+    "register", "login", "profile", "onboarding", "paths", "path",
+    "start_lesson", "complete_lesson", "overview", "resources", "chat",
+)
+
+
+class StepFailed(Exception):
+    pass
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {step: [] for step in STEPS}
+        self.errors = {}
+        self.journeys = {"completed": 0, "failed": 0}
+
+    def record(self, step: str, seconds: float, status):
+        with self._lock:
+            if status is not None and 200 <= status < 300:
+                self.latencies[step].append(seconds)
+            else:
+                key = f"{step}:{status or 'connection'}"
+                self.errors[key] = self.errors.get(key, 0) + 1
+
+    def journey(self, ok: bool):
+        with self._lock:
+            self.journeys["completed" if ok else "failed"] += 1
+
+
+class Session:
+    """One user's keep-alive connection; every call is timed and recorded under its step name."""
+
+    def __init__(self, host: str, port: int, recorder: Recorder, timeout: float):
+        self.host, self.port, self.timeout = host, port, timeout
+        self.recorder = recorder
+        self.headers = {}
+        self.conn = http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def call(self, step: str, method: str, url: str, body=None):
+        headers = dict(self.headers)
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        start = time.perf_counter()
+        try:
+            self.conn.request(method, url, body=payload, headers=headers)
+            response = self.conn.getresponse()
+            data = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            status, data = None, b""
+        self.recorder.record(step, time.perf_counter() - start, status)
+        if status is None or status >= 300:
+            raise StepFailed(f"{step}: {status}")
+        return json.loads(data) if data else None
+
+    def close(self):
+        self.conn.close()
+
+
+def think(seconds: float):
+    if seconds:
+        time.sleep(random.uniform(0, 2 * seconds))
+
+
+def journey(n: int, args, host: str, port: int, run_id: str, recorder: Recorder):
+    s = Session(host, port, recorder, args.timeout)
+    email = f"load-{run_id}-{n}@example.com"
+    try:
+        s.call("register", "POST", "/register", {
+            "full_name": f"Load User {n}", "email": email, "phone": f"{run_id}-{n}",
+            "role": "Student", "password": "load-test-password"
+        })
+        think(args.think_time)
+        login = s.call("login", "POST", "/login", {"identifier": email, "password": "load-test-password"})
+        s.headers["Authorization"] = f"Bearer {login['access_token']}"
+        user_id = login["user"]["id"]
+        think(args.think_time)
+        s.call("profile", "PUT", "/users/profile/update", {
+            "career_goal": random.choice(["Frontend Developer", "Data Scientist", "Backend Developer"]),
+            "experience_level": "Beginner", "weekly_hours": "10"
+        })
+        s.call("onboarding", "PATCH", f"/users/{user_id}/complete-onboarding")
+        think(args.think_time)
+        paths = s.call("paths", "GET", f"/learning-paths/?user_id={user_id}")
+        if not paths:
+            raise StepFailed("paths: no path after onboarding")
+        path = s.call("path", "GET", f"/learning-paths/{paths[0]['id']}?user_id={user_id}")
+        lessons = [l["id"] for m in path["modules"] for l in m["lessons"]][:args.lessons]
+        for lesson_id in lessons:
+            think(args.think_time)
+            s.call("start_lesson", "POST", f"/progress/start/{lesson_id}?user_id={user_id}")
+            think(args.think_time)
+            s.call("complete_lesson", "POST", f"/progress/complete/{lesson_id}?user_id={user_id}&time_spent=0.5")
+        think(args.think_time)
+        s.call("overview", "GET", f"/progress/overview/{user_id}")
+        s.call("resources", "GET", "/resources/")
+        think(args.think_time)
+        s.call("chat", "POST", "/ai/chat", {"message": "What should I focus on this week?"})
+        recorder.journey(True)
+    except (StepFailed, KeyError, TypeError, ValueError):
+        recorder.journey(False)
+    finally:
+        s.close()
+
+
+def percentile(samples: list, q: float):
+    if not samples:
+        return None
+    return round(samples[min(len(samples) - 1, int(len(samples) * q))] * 1000, 1)
+
+
+def build_report(recorder: Recorder, elapsed: float, args, target: str) -> dict:
+    steps = {}
+    for step in STEPS:
+        ok = sorted(recorder.latencies[step])
+        failed = sum(v for k, v in recorder.errors.items() if k.split(":")[0] == step)
+        total = len(ok) + failed
+        steps[step] = {
+            "requests": total,
+            "rps": round(total / elapsed, 2),
+            "error_rate": round(failed / total, 4) if total else 0.0,
+            "p50_ms": percentile(ok, 0.5), "p95_ms": percentile(ok, 0.95), "p99_ms": percentile(ok, 0.99),
+        }
+    requests = sum(s["requests"] for s in steps.values())
+    errors = sum(recorder.errors.values())
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND, capture_output=True,
+                                text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(time.time() - elapsed)),
+        "target": target,
+        "config": {k: v for k, v in vars(args).items() if k not in ("report", "compare")},
+        "elapsed_seconds": round(elapsed, 2),
+        "journeys": dict(recorder.journeys, per_second=round(sum(recorder.journeys.values()) / elapsed, 3)),
+        "requests": requests,
+        "rps": round(requests / elapsed, 2),
+        "error_rate": round(errors / requests, 4) if requests else 0.0,
+        "steps": steps,
+        "errors": dict(sorted(recorder.errors.items())),
+    }
+
+
+def print_report(report: dict, baseline: dict = None):
+    j = report["journeys"]
+    print(f"{j['completed']} journeys completed, {j['failed']} failed in {report['elapsed_seconds']}s | "
+          f"{report['rps']} req/s | error rate {report['error_rate']:.2%}")
+    print(f"{'step':>16} {'reqs':>6} {'err%':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+          + (f" {'Δp95 ms':>9} {'Δerr%':>7}" if baseline else ""))
+    for step, s in report["steps"].items():
+        line = (f"{step:>16} {s['requests']:>6} {s['error_rate']:>7.2%} {s['p50_ms'] or '-':>8} "
+                f"{s['p95_ms'] or '-':>8} {s['p99_ms'] or '-':>8}")
+        old = (baseline or {}).get("steps", {}).get(step)
+        if old:
+            dp95 = (s["p95_ms"] - old["p95_ms"]) if s["p95_ms"] is not None and old["p95_ms"] is not None else None
+            line += f" {'-' if dp95 is None else f'{dp95:+.1f}':>9} {s['error_rate'] - old['error_rate']:>+7.2%}"
+        print(line)
+    for key, count in report["errors"].items():
+        print(f"  error {key}: {count}")
+
+
+def start_stack(args, db_path: str):
+    fake = serve(latency=args.llm_latency, slow_rate=args.llm_slow_rate, slow_seconds=args.llm_slow_seconds,
+                 error_rate=args.llm_error_rate)
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "WEB_CONCURRENCY": str(args.workers),
+        "GUNICORN_BIND": f"127.0.0.1:{args.port}",
+        "GUNICORN_ACCESS_LOG": "",
+        "OPENAI_API_KEY": "fake-key",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{fake.server_address[1]}/v1",
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "App.main:app"],
+        cwd=BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    wait_until_up(args.port)
+    return fake, server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=50, help="journeys to run in total")
+    parser.add_argument("--concurrency", type=int, default=10, help="journeys in flight at once")
+    parser.add_argument("--think-time", type=float, default=0.5, help="mean pause between steps, seconds")
+    parser.add_argument("--lessons", type=int, default=3, help="lessons each user starts and completes")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--url", help="drive an already running server instead of starting one")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--llm-slow-rate", type=float, default=0.0)
+    parser.add_argument("--llm-slow-seconds", type=float, default=3.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--report", help="write the JSON report here")
+    parser.add_argument("--compare", help="earlier JSON report to diff against")
+    args = parser.parse_args()
+
+    fake = server = db_path = None
+    if args.url:
+        target = urlsplit(args.url)
+        host, port = target.hostname, target.port or 80
+    else:
+        fd, db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        os.remove(db_path)
+        host, port = "127.0.0.1", args.port
+        fake, server = start_stack(args, db_path)
+
+    recorder = Recorder()
+    run_id = uuid.uuid4().hex[:8]
+    print(f"{args.users} journeys, {args.concurrency} concurrent, think time {args.think_time}s -> {host}:{port}")
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            list(pool.map(lambda n: journey(n, args, host, port, run_id, recorder), range(args.users)))
+    finally:
+        elapsed = time.perf_counter() - start
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=60)
+        if fake is not None:
+            fake.shutdown()
+        if db_path:
+            for suffix in ("", ".lock"):
+                if os.path.exists(db_path + suffix):
+                    os.remove(db_path + suffix)
+
+    report = build_report(recorder, elapsed, args, args.url or f"local gunicorn x{args.workers}")
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Multi-worker serving: gunicorn managing uvicorn workers.
+
+    gunicorn -c gunicorn.conf.py App.main:app
+
+Every setting can be overridden from the environment (WEB_CONCURRENCY, GUNICORN_TIMEOUT, ...).
+Caches (lesson bodies, conversations, chat summaries, the path-reuse index) are per worker and
+bounded by their own *_CACHE_SIZE / *_INDEX_SIZE settings, so memory grows with the worker count;
+max_requests recycles workers to cap slow leaks on top of that.
+"""
+import multiprocessing
+import os
+import sys
+
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+worker_class = "uvicorn.workers.UvicornWorker"
+# Request handling is mostly I/O (DB, OpenAI) but JSON and template work is CPU: one worker per core
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+
+# Import the app once in the master: schema setup runs a single time and workers share its memory pages
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+# AI endpoints can legitimately take a minute or more
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+# Time for in-flight requests and the lifespan shutdown (heartbeat flush) on SIGTERM / reload
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "5000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "500"))
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-") or None  # empty disables it
+
+
+def post_fork(server, worker):
+    # With preload the master imported the app (and its engine) before forking. Drop the inherited
+    # pool without closing the master's sockets, so the worker opens its own connections.
+    database = sys.modules.get("App.database")
+    if database is not None:
+        database.engine.dispose(close=False)
+    # Each worker must hold leases under its own identity (single_flight also resets this in an
+    # at-fork hook; done here too so it doesn't depend on how the worker was started). The other
+    # in-process caches and locks are still empty and unheld at this point: the master only
+    # imports the app and never serves requests, so they fill up per worker from here on.
+    single_flight = sys.modules.get("App.core.single_flight")
+    if single_flight is not None:
+        single_flight.single_flight.reset_after_fork()
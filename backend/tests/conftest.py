@@ -0,0 +1,56 @@
+"""
+Shared fixtures: the app on a throwaway SQLite database, with rate limiting off.
+
+    cd backend && python -m pytest -q
+"""
+import itertools
+import os
+import sys
+import tempfile
+
+_db_dir = tempfile.mkdtemp(prefix="pathora-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+
+from App.main import app
+from App.database import SessionLocal
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+_user_numbers = itertools.count(1)
+
+
+@pytest.fixture
+def make_user(client):
+    """Register and log in a fresh user; returns (user id, auth headers)."""
+
+    def make(**profile):
+        n = str(next(_user_numbers))
+        email = f"user{n}@example.com"
+        client.post("/register", json={"full_name": f"User {n}", "email": email, "phone": n,
+                                       "role": "Student", "password": "pw"})
+        login = client.post("/login", json={"identifier": email, "password": "pw"}).json()
+        headers = {"Authorization": f"Bearer {login['access_token']}"}
+        if profile:
+            client.put("/users/profile/update", json=profile, headers=headers)
+        return login["user"]["id"], headers
+
+    return make
@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+
+import pytest
+
+import App.routers.ai as ai
+
+
+class FakeCompletions:
+    def create(self, model=None, messages=None, **kwargs):
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="A reply"))], usage=None)
+
+
+@pytest.fixture(autouse=True)
+def fake_llm(monkeypatch):
+    monkeypatch.setattr(ai, "get_openai_client", lambda: SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions())))
+
+
+def test_chat_saves_conversation_for_authenticated_user(client, make_user):
+    _, headers = make_user()
+
+    first = client.post("/ai/chat", json={"message": "Hello"}, headers=headers)
+    assert first.status_code == 200
+    conversation_id = first.json()["conversation_id"]
+    assert client.post("/ai/chat", json={"message": "Again", "conversation_id": conversation_id},
+                       headers=headers).json()["conversation_id"] == conversation_id
+
+    listed = client.get("/ai/conversations", headers=headers).json()
+    assert [c["id"] for c in listed] == [conversation_id]
+
+
+def test_chat_requires_login_and_own_conversation(client, make_user):
+    assert client.post("/ai/chat", json={"message": "Hello"}).status_code == 401
+
+    _, owner = make_user()
+    _, other = make_user()
+    conversation_id = client.post("/ai/chat", json={"message": "Hello"}, headers=owner).json()["conversation_id"]
+    response = client.post("/ai/chat", json={"message": "Hi", "conversation_id": conversation_id}, headers=other)
+    assert response.status_code == 404
+
+
+def test_conversations_are_private_to_their_owner(client, make_user):
+    _, owner = make_user()
+    _, other = make_user()
+    conversation_id = client.post("/ai/chat", json={"message": "Hello"}, headers=owner).json()["conversation_id"]
+
+    assert client.get("/ai/conversations").status_code == 401
+    assert client.get("/ai/conversations", headers=other).json() == []
+    assert client.get(f"/ai/conversations/{conversation_id}/messages", headers=other).status_code == 404
+    assert client.delete(f"/ai/conversations/{conversation_id}", headers=other).status_code == 404
+
+    assert len(client.get(f"/ai/conversations/{conversation_id}/messages", headers=owner).json()["messages"]) == 2
+    assert client.delete(f"/ai/conversations/{conversation_id}", headers=owner).status_code == 200
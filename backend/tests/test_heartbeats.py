@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from App import models
+from App.core import heartbeats
+from App.core.heartbeats import HeartbeatBuffer
+
+
+@pytest.fixture
+def lesson_id(db):
+    path = models.LearningPath(title="Heartbeat path")
+    module = models.Module(title="Week 1", order=1, learning_path=path)
+    lesson = models.Lesson(title="Lesson", module=module)
+    db.add_all([path, module, lesson])
+    db.commit()
+    return lesson.id
+
+
+def logged_hours(db, user_id):
+    db.expire_all()
+    return [s.time_spent for s in db.query(models.LearningSession).filter_by(user_id=user_id)]
+
+
+def test_unknown_lesson_does_not_block_valid_beats(db, make_user, lesson_id):
+    user_id, _ = make_user()
+    buffer = HeartbeatBuffer()
+    buffer.add(user_id, lesson_id, 1800)
+    buffer.add(user_id, 10 ** 9, 1800)  # missing lesson
+    buffer.add(10 ** 9, lesson_id, 1800)  # missing user
+
+    assert buffer.flush() == 1
+    assert logged_hours(db, user_id) == [0.5]
+    assert buffer._pending == {}
+
+
+def test_rejected_row_is_dropped_alone(db, make_user, lesson_id, monkeypatch):
+    good, _ = make_user()
+    bad, _ = make_user()
+    record_sessions = heartbeats.leaderboard.record_sessions
+
+    def reject_bad_user(session, rows):
+        if any(row["user_id"] == bad for row in rows):
+            raise IntegrityError("insert", {}, Exception("rejected"))
+        record_sessions(session, rows)
+
+    monkeypatch.setattr(heartbeats.leaderboard, "record_sessions", reject_bad_user)
+    buffer = HeartbeatBuffer()
+    buffer.add(good, lesson_id, 3600)
+    buffer.add(bad, lesson_id, 3600)
+
+    assert buffer.flush() == 1
+    assert logged_hours(db, good) == [1.0]
+    assert logged_hours(db, bad) == []
+    assert buffer._pending == {}
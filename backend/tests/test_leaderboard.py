@@ -0,0 +1,52 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from App import models
+from App.core.leaderboard import MAX_DAILY_HOURS, MAX_SESSION_HOURS
+
+
+@pytest.fixture
+def lesson_id(db):
+    path = models.LearningPath(title="Board path")
+    module = models.Module(title="Week 1", order=1, learning_path=path)
+    lesson = models.Lesson(title="Lesson", module=module)
+    db.add_all([path, module, lesson])
+    db.commit()
+    return lesson.id
+
+
+def sync(client, user_id, lesson_id, **event):
+    return client.post(f"/progress/sync?user_id={user_id}", json={"events": [
+        {"idempotency_key": str(uuid.uuid4()), "type": "complete", "lesson_id": lesson_id, **event}
+    ]})
+
+
+@pytest.mark.parametrize("hours", [1e12, MAX_SESSION_HOURS + 1, -5])
+def test_out_of_range_time_is_rejected(client, make_user, lesson_id, hours):
+    user_id, headers = make_user()
+    assert client.post(f"/progress/complete/{lesson_id}?user_id={user_id}&time_spent={hours}").status_code == 422
+    assert sync(client, user_id, lesson_id, time_spent=hours).status_code == 422
+    assert client.get("/leaderboards/all", headers=headers).json()["me"] is None
+
+
+def test_future_events_count_now(client, make_user, lesson_id):
+    user_id, headers = make_user()
+    future = (datetime.utcnow() + timedelta(days=40)).isoformat()
+    assert sync(client, user_id, lesson_id, time_spent=2, occurred_at=future).status_code == 200
+
+    me = client.get("/leaderboards/week", headers=headers).json()["me"]
+    assert (me["hours"], me["lessons_completed"]) == (2, 1)
+
+
+def test_repeated_completions_are_capped_per_day(client, make_user, lesson_id):
+    user_id, headers = make_user()
+    for _ in range(3):
+        assert client.post(f"/progress/complete/{lesson_id}?user_id={user_id}&time_spent={MAX_SESSION_HOURS}").status_code == 200
+    assert sync(client, user_id, lesson_id, time_spent=MAX_SESSION_HOURS).status_code == 200
+
+    for window in ("week", "month", "all"):
+        me = client.get(f"/leaderboards/{window}", headers=headers).json()["me"]
+        assert (me["hours"], me["lessons_completed"]) == (MAX_DAILY_HOURS, 4)
+    assert client.get("/leaderboards/day", headers=headers).status_code == 400
@@ -0,0 +1,43 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import App.routers.ai as ai
+from App import models
+from App.core.llm_output import LessonPackage, parse
+
+PACKAGE = {
+    "content": "# Notes", "why_it_matters": "Because", "what_you_learn": ["One"],
+    "resources": [{"title": "Official docs", "type": "article", "url": "https://example.com/docs"}],
+}
+
+
+class FakeCompletions:
+    def create(self, model=None, messages=None, **kwargs):
+        content = json.dumps(PACKAGE)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+
+@pytest.fixture(autouse=True)
+def fake_llm(monkeypatch):
+    monkeypatch.setattr(ai, "get_openai_client", lambda: SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions())))
+
+
+def test_resource_without_duration_has_no_null_key():
+    package = parse(LessonPackage, PACKAGE)
+    assert package.resources == [{"title": "Official docs", "type": "article", "url": "https://example.com/docs"}]
+
+
+def test_generated_resource_without_duration_renders_in_library(client, db, make_user):
+    user_id, headers = make_user()
+    path = models.LearningPath(title="Generated path", creator_id=user_id)
+    module = models.Module(title="Week 1", order=1, learning_path=path)
+    lesson = models.Lesson(title="Intro", module=module)
+    db.add_all([path, module, lesson])
+    db.commit()
+
+    assert client.post("/ai/generate-lesson-content", json={"lesson_id": lesson.id}).status_code == 200
+
+    generated = [r for r in client.get("/resources/", headers=headers).json() if r["title"] == "Official docs"]
+    assert [r["description"] for r in generated] == [" • From Lesson: Intro"]
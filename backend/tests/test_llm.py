@@ -0,0 +1,22 @@
+from types import SimpleNamespace
+
+import pytest
+
+from App.core.llm import retry_after, LLM_BACKOFF_MAX_SECONDS
+
+
+def error_with(retry_after_header):
+    headers = {} if retry_after_header is None else {"retry-after": retry_after_header}
+    return SimpleNamespace(response=SimpleNamespace(headers=headers))
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("2", 2.0),
+    ("3600", LLM_BACKOFF_MAX_SECONDS),
+    ("inf", None),
+    ("-5", 0.0),
+    ("soon", None),
+    (None, None),
+])
+def test_retry_after_is_capped(header, expected):
+    assert retry_after(error_with(header)) == expected
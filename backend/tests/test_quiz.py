@@ -0,0 +1,66 @@
+import pytest
+
+import App.routers.ai as ai
+from App import models
+from App.core.quiz_bank import add_questions
+
+
+def question(n: int) -> dict:
+    return {"question": f"Question {n}?", "options": ["a", "b", "c", "d"], "correct_index": 1, "explanation": "b"}
+
+
+@pytest.fixture
+def lesson_bank(db):
+    add_questions(db, "lesson:901", "beginner", "Topic", 901, [question(n) for n in range(3)])
+    add_questions(db, "topic:other", "beginner", "Other", None, [question(n) for n in range(1)])
+    ids = [q.id for q in db.query(models.BankQuestion).filter_by(bank_key="lesson:901").order_by(models.BankQuestion.slot)]
+    other = db.query(models.BankQuestion).filter_by(bank_key="topic:other").one().id
+    return ids, other
+
+
+def test_attempt_takes_lesson_from_bank(client, make_user, lesson_bank):
+    user_id, _ = make_user()
+    ids, _ = lesson_bank
+    response = client.post("/quizzes/attempts", json={
+        "user_id": user_id, "answers": [{"question_id": i, "selected_index": 1} for i in ids]
+    })
+    assert response.status_code == 200
+    assert (response.json()["score"], response.json()["lesson_id"]) == (3, 901)
+    assert [a["lesson_id"] for a in client.get(f"/quizzes/attempts?user_id={user_id}&lesson_id=901").json()] == [901]
+
+
+def test_duplicate_answers_are_rejected(client, make_user, lesson_bank):
+    user_id, _ = make_user()
+    ids, _ = lesson_bank
+    response = client.post("/quizzes/attempts", json={
+        "user_id": user_id, "answers": [{"question_id": ids[0], "selected_index": 1}] * 3
+    })
+    assert response.status_code == 400
+
+
+def test_answers_from_other_banks_are_rejected(client, make_user, lesson_bank):
+    user_id, _ = make_user()
+    ids, other = lesson_bank
+    response = client.post("/quizzes/attempts", json={
+        "user_id": user_id, "answers": [{"question_id": ids[0], "selected_index": 1}, {"question_id": other, "selected_index": 1}]
+    })
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("count", [-1, 0, 10 ** 6])
+def test_question_count_out_of_range_is_rejected(client, count):
+    assert client.post("/ai/generate-quiz", json={"topic": "Bounds", "difficulty": "beginner",
+                                                  "question_count": count}).status_code == 422
+
+
+def test_full_bank_is_served_without_a_model_client(client, db, monkeypatch):
+    add_questions(db, "topic:served offline", "beginner", "Served offline", None, [question(n) for n in range(40)])
+
+    def no_client():
+        raise AssertionError("the model client should not be built")
+
+    monkeypatch.setattr(ai, "get_openai_client", no_client)
+    response = client.post("/ai/generate-quiz", json={"topic": "Served offline", "difficulty": "beginner",
+                                                      "question_count": 5})
+    assert response.status_code == 200
+    assert len(response.json()["questions"]) == 5
@@ -0,0 +1,49 @@
+from datetime import datetime
+
+import pytest
+
+from App import models
+from App.core.reviews import apply_review, REVIEW_FIRST_INTERVAL_DAYS
+
+
+@pytest.fixture
+def lesson_id(db):
+    path = models.LearningPath(title="Review path")
+    module = models.Module(title="Week 1", order=1, learning_path=path)
+    lesson = models.Lesson(title="Lesson", module=module)
+    db.add_all([path, module, lesson])
+    db.commit()
+    return lesson.id
+
+
+def schedule_after(review, grades):
+    now = datetime(2026, 1, 1)
+    intervals = []
+    for quality in grades:
+        apply_review(review, quality, now)
+        intervals.append(review.interval_days)
+        now = review.next_due
+    return intervals
+
+
+def test_interval_sequence(client, db, lesson_id):
+    user_id = 1
+    assert client.post(f"/progress/complete/{lesson_id}?user_id={user_id}").status_code == 200
+    review = db.query(models.LessonReview).filter_by(user_id=user_id, lesson_id=lesson_id).one()
+    assert (review.repetitions, review.interval_days) == (1, REVIEW_FIRST_INTERVAL_DAYS)
+    assert (review.next_due - datetime.utcnow()).days == REVIEW_FIRST_INTERVAL_DAYS - 1
+
+    # Quality 4 keeps the ease factor at 2.5: 6 days, then interval * 2.5
+    assert schedule_after(review, [4, 4, 4]) == [6, 15, 38]
+
+
+def test_lapse_restarts_at_one_then_six_days():
+    review = models.LessonReview(repetitions=3, interval_days=15, ease_factor=2.5)
+    assert schedule_after(review, [1, 4, 4]) == [1, 6, 15]
+    assert review.ease_factor == 2.5
+
+
+def test_quality_out_of_range_is_rejected(client, lesson_id):
+    assert client.post(f"/progress/complete/{lesson_id}?user_id=1").status_code == 200
+    assert client.post(f"/progress/reviews/{lesson_id}?user_id=1", json={"quality": 6}).status_code == 422
+    assert client.post(f"/progress/reviews/{lesson_id}?user_id=1", json={"quality": 5}).status_code == 200
@@ -0,0 +1,55 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from App import models
+from App.core.single_flight import SingleFlight, single_flight
+
+
+def test_owner_is_per_instance():
+    assert SingleFlight().owner != SingleFlight().owner
+
+
+def test_foreign_lease_is_not_released(db):
+    worker_a, worker_b = SingleFlight(), SingleFlight()
+    assert worker_a._acquire(db, "test:foreign-release")
+    assert not worker_b._acquire(db, "test:foreign-release")
+
+    worker_b._release(db, "test:foreign-release", "done", {"from": "b"}, 60)
+
+    lease = worker_a._read(db, "test:foreign-release")
+    assert lease.owner == worker_a.owner
+    assert lease.status == "running"
+    assert lease.result is None
+
+
+def test_running_lease_is_not_taken_over(db):
+    worker_a, worker_b = SingleFlight(), SingleFlight()
+    assert worker_a._acquire(db, "test:takeover")
+    assert not worker_b._acquire(db, "test:takeover")
+
+    # Only once it has expired (its worker died) can another owner take it
+    db.query(models.OperationLease).filter_by(key="test:takeover").update(
+        {"expires_at": datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+    assert worker_b._acquire(db, "test:takeover")
+    assert worker_b._read(db, "test:takeover").owner == worker_b.owner
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork()")
+def test_forked_child_gets_its_own_owner():
+    parent_owner = single_flight.owner
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_end)
+        os.write(write_end, single_flight.owner.encode())
+        os._exit(0)
+    os.close(write_end)
+    child_owner = os.read(read_end, 200).decode()
+    os.close(read_end)
+    os.waitpid(pid, 0)
+
+    assert child_owner and child_owner != parent_owner
+    assert single_flight.owner == parent_owner
@@ -77,10 +77,10 @@ export default function App() {
       const user = JSON.parse(localStorage.getItem("logged_in_user") || "{}");
       if (!user.id) return;
 
-      const [progressData, pathsData] = await Promise.all([
-        apiFetch(`/progress/overview/${user.id}`),
-        apiFetch(`/learning-paths/?user_id=${user.id}`),
-      ]);
+      // One request (one auth check) for everything the dashboard needs
+      const dashboard = await apiFetch(`/dashboard?sections=overview,paths`);
+      const progressData = dashboard.overview;
+      const pathsData = dashboard.paths;
 
       setUserProgress(progressData);
 
@@ -283,6 +283,9 @@ export default function App() {
                       }
                     }
 
+                    // The API caps one session at 12 hours (MAX_SESSION_HOURS)
+                    hours = Math.min(hours, 12);
+
                     await apiFetch(`/progress/complete/${skillId}?user_id=${user.id}&time_spent=${hours.toFixed(2)}`, {
                       method: 'POST'
                     });
@@ -41,6 +41,7 @@ export function DashboardLayout({
   const [assistantOpen, setAssistantOpen] = useState(false);
   const [assistantMessage, setAssistantMessage] = useState('');
   const [chatMessages, setChatMessages] = useState<ChatMessage[]>([]);
+  const [conversationId, setConversationId] = useState<number | null>(null);
   const [loading, setLoading] = useState(false);
 
 
@@ -65,16 +66,21 @@ export function DashboardLayout({
     setAssistantMessage("");
 
     try {
+      const token = localStorage.getItem("access_token");
       const res = await fetch("/api/ai/chat", {
         method: "POST",
-        headers: { "Content-Type": "application/json" },
+        headers: {
+          "Content-Type": "application/json",
+          "Authorization": `Bearer ${token}`
+        },
         body: JSON.stringify({
           message: userMessage,
-          history: chatMessages
+          conversation_id: conversationId
         })
       });
 
       const data = await res.json();
+      if (data.conversation_id) setConversationId(data.conversation_id);
 
       setChatMessages(prev => [...prev, { text: data.reply, isUser: false }]);
     } catch (e) {
@@ -93,18 +99,21 @@ export function DashboardLayout({
     setChatMessages(prev => [...prev, { text: question, isUser: true }]);
 
     try {
+      const token = localStorage.getItem("access_token");
       const res = await fetch("/api/ai/chat", {
         method: "POST",
         headers: {
-          "Content-Type": "application/json"
+          "Content-Type": "application/json",
+          "Authorization": `Bearer ${token}`
         },
         body: JSON.stringify({
           message: question,
-          history: chatMessages
+          conversation_id: conversationId
         })
       });
 
       const data = await res.json();
+      if (data.conversation_id) setConversationId(data.conversation_id);
 
       setChatMessages(prev => [
         ...prev,
@@ -34,6 +34,7 @@ export function QuizView() {
     const [isAnswered, setIsAnswered] = useState(false);
     const [score, setScore] = useState(0);
     const [showResults, setShowResults] = useState(false);
+    const [answers, setAnswers] = useState<{ question_id: number; selected_index: number }[]>([]);
 
     const handleGenerate = async () => {
         if (!topic) {
@@ -45,6 +46,7 @@ export function QuizView() {
         setQuizData(null);
         setShowResults(false);
         setScore(0);
+        setAnswers([]);
         setCurrentQuestionIndex(0);
 
         try {
@@ -75,6 +77,7 @@ export function QuizView() {
         if (selectedOption === null || !quizData) return;
 
         setIsAnswered(true);
+        setAnswers(prev => [...prev, { question_id: quizData.questions[currentQuestionIndex].id, selected_index: selectedOption }]);
         const correctInfo = quizData.questions[currentQuestionIndex].correct_index;
         if (selectedOption === correctInfo) {
             setScore(s => s + 1);
@@ -93,6 +96,21 @@ export function QuizView() {
             setIsAnswered(false);
         } else {
             setShowResults(true);
+            recordAttempt();
+        }
+    };
+
+    const recordAttempt = async () => {
+        const user = JSON.parse(localStorage.getItem('logged_in_user') || '{}');
+        if (!user.id || answers.length === 0) return;
+        try {
+            // Scored again server-side against the question bank
+            await apiFetch('/quizzes/attempts', {
+                method: 'POST',
+                body: JSON.stringify({ user_id: user.id, answers })
+            });
+        } catch (error) {
+            console.error('Failed to record quiz attempt', error);
         }
     };
 
@@ -101,6 +119,7 @@ export function QuizView() {
         setTopic('');
         setShowResults(false);
         setScore(0);
+        setAnswers([]);
         setCurrentQuestionIndex(0);
         setIsAnswered(false);
         setSelectedOption(null);